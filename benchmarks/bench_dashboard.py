@@ -0,0 +1,76 @@
+"""Dashboard benchmark : batched read model against the naive N+1 path
+
+Usage :
+    PYTHONPATH=. python benchmarks/bench_dashboard.py [n_tournaments] [n_players_per_tournament]
+
+Data is generated in a temporary folder, the data/ tables are not touched.
+"""
+
+import sys
+import tempfile
+import time
+
+from chess.models import storage
+from chess.models.dashboard import events_of_the_day
+from chess.models.pairings import berger_schedule, pairs_to_matches
+from chess.models.players import Player
+from chess.models.rounds import Round
+from chess.models.tournaments import Tournament
+
+DAY = "2024-06-01"
+
+
+def fill(n_tournaments: int, n_players: int) -> None:
+    """Running tournaments with precomputed round-robins, bulk inserted"""
+
+    players, rounds, tournaments = [], [], []
+    for i in range(n_tournaments):
+        player_ids = [f"t{i}_p{j}" for j in range(n_players)]
+        players += [Player("bench", f"p{j}", player_id=p).to_dict() for j, p in enumerate(player_ids)]
+
+        t = Tournament(f"Open {i}", "2024-05-30", "2024-06-02", tournament_id=f"t{i}")
+        t.player_id_list = player_ids
+        t.status = "In Progress"
+        t.current_round_number = 0
+        for n, pairs in enumerate(berger_schedule(player_ids)):
+            r = Round(n, pairs_to_matches(pairs), round_id=f"t{i}_round_{n}")
+            rounds.append(r.to_dict())
+            t.round_id_list.append(r.round_id)
+        tournaments.append(t.to_dict())
+
+    Player.db.insert_multiple(players)
+    Round.db.insert_multiple(rounds)
+    Tournament.db.insert_multiple(tournaments)
+
+
+def naive() -> list:
+    """One query per round and per player, as the models used to be used"""
+
+    events = []
+    for t in Tournament.read_all():
+        if not t.start_date <= DAY <= t.end_date:
+            continue
+        current_round = Round.search_by("round_id", t.round_id_list[t.current_round_number])
+        boards = []
+        for (white, _), (black, _) in current_round.matches:
+            boards.append((Player.read_one(white), Player.read_one(black)))
+        events.append((t, boards))
+
+    return events
+
+
+def main(n_tournaments: int = 20, n_players: int = 16) -> None:
+    with tempfile.TemporaryDirectory() as folder:
+        storage.set_data_dir(folder)
+        fill(n_tournaments, n_players)
+
+        for name, function in (("naive N+1", naive), ("batched", lambda: events_of_the_day(DAY))):
+            start = time.perf_counter()
+            function()
+            print(f"{name:<10} {(time.perf_counter() - start) * 1000:10.1f} ms")
+
+        storage.close_all()
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,38 @@
+"""Export benchmark : a generated season exported in every format
+
+Usage :
+    PYTHONPATH=. python benchmarks/bench_export.py [n_tournaments] [n_workers]
+
+Data is generated in a temporary folder, the data/ tables are not touched.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from chess.models import export, storage, synthetic
+
+
+def main(n_tournaments: int = 3000, n_workers: int = 4) -> None:
+    with tempfile.TemporaryDirectory() as folder:
+        storage.set_data_dir(folder)
+        print(synthetic.generate(n_players=n_tournaments * 4, n_tournaments=n_tournaments))
+
+        start = time.perf_counter()
+        tournaments = export.select_tournaments()
+        print(f"{'read tournaments':<22} {time.perf_counter() - start:8.2f} s")
+
+        for output_format in export.FORMATS:
+            for workers in sorted({1, n_workers}):
+                path = os.path.join(folder, f"out_{workers}.{output_format}")
+                start = time.perf_counter()
+                export.export(output_format, path, tournaments, max_workers=workers)
+                elapsed = time.perf_counter() - start
+                print(f"{output_format:<6} {workers:>2} workers       {elapsed:8.2f} s")
+
+        storage.close_all()
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
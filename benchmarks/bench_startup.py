@@ -0,0 +1,48 @@
+"""Startup benchmark : import time and first query time of the models
+
+Usage :
+    python benchmarks/bench_startup.py [n_runs]
+
+Every measure runs in a fresh interpreter, like the CLI or a short script.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "python only": "pass",
+    "import chess": "import chess",
+    "import models": "import chess.models.tournaments",
+    "import + first query": (
+        "from chess.models.players import Player; Player.read_one('missing')"
+    ),
+}
+
+
+def run(code: str, n_runs: int) -> list[float]:
+    """Wall time of n_runs fresh interpreters running code"""
+
+    times = []
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        times.append(time.perf_counter() - start)
+
+    return times
+
+
+def main(n_runs: int = 10) -> None:
+    """Print the median time of every scenario"""
+
+    for name, code in SCENARIOS.items():
+        times = run(code, n_runs)
+        print(f"{name:<22} median {statistics.median(times) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
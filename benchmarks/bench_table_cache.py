@@ -0,0 +1,62 @@
+"""Parsed table cache benchmark : fresh processes reading a large table
+
+Usage :
+    PYTHONPATH=. python benchmarks/bench_table_cache.py [n_players] [n_runs]
+
+Compares a first query without the cache file (json parsed) and with it,
+then repeated queries in one process. Data is generated in a temporary folder.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from chess.models import storage
+from chess.models.players import Player
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CODE = "from chess.models.players import Player; Player.read_ratings()"
+
+
+def run(folder: str, n_runs: int, keep_cache: bool) -> float:
+    """Median wall time of fresh interpreters doing one query"""
+
+    env = dict(os.environ, CHESS_DATA_DIR=folder, PYTHONPATH=ROOT)
+    cache_path = os.path.join(folder, "players.json" + storage.CACHE_SUFFIX)
+
+    times = []
+    for _ in range(n_runs):
+        if not keep_cache and os.path.exists(cache_path):
+            os.unlink(cache_path)
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", CODE], env=env, check=True)
+        times.append(time.perf_counter() - start)
+
+    return statistics.median(times)
+
+
+def main(n_players: int = 100_000, n_runs: int = 5) -> None:
+    with tempfile.TemporaryDirectory() as folder:
+        storage.set_data_dir(folder)
+        Player.db.insert_multiple(
+            Player("bench", f"p{i}", player_id=f"p{i}").to_dict() for i in range(n_players)
+        )
+        storage.close_all()
+
+        print(f"{n_players} players")
+        print(f"process, json parsed   {run(folder, n_runs, False) * 1000:8.1f} ms")
+        print(f"process, cache file    {run(folder, n_runs, True) * 1000:8.1f} ms")
+
+        start = time.perf_counter()
+        for _ in range(n_runs):
+            Player.read_ratings()
+        print(f"in process, per query  {(time.perf_counter() - start) / n_runs * 1000:8.1f} ms")
+
+        storage.close_all()
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,207 @@
+"""Profiling harness : full tournament lifecycles on temporary storage
+
+Usage :
+    PYTHONPATH=. python benchmarks/profile_lifecycle.py [options]
+
+Every lifecycle is the production path of tests/models/test_run_tournaments.py :
+create the players, add them one by one, start the tournament, enter the
+results of every round with update_current_round until it is completed.
+
+Three runs, each on a fresh temporary data folder :
+    timed       wall time, sampled stacks (folded, for flamegraph.pl / speedscope)
+    cProfile    top functions by cumulative time
+    tracemalloc peak memory and top allocation sites
+
+Exit code is 1 when --max-seconds or --max-memory-mb is exceeded.
+"""
+
+import argparse
+import collections
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from chess.models import storage
+from chess.models.players import Player
+from chess.models.tournaments import Tournament
+
+RESULTS = ["1-0", "0-1", "1/2-1/2"]
+
+
+def lifecycle(
+    number: int, n_players: int, tournament_format: str, rng: random.Random
+) -> None:
+    """One tournament, from its creation to its completion"""
+
+    players = [
+        Player("profile", f"player{i}", player_id=f"l{number}_p{i}")
+        for i in range(n_players)
+    ]
+    for player in players:
+        player.rating = rng.randint(1000, 2500)
+        player.create()
+
+    t = Tournament(
+        f"profile {number}",
+        "2024-01-01",
+        "2024-01-31",
+        tournament_format=tournament_format,
+        max_players=n_players,
+    )
+    t.create()
+    for player in players:
+        t.add_player(player.player_id)
+
+    t.update_status("In Progress")
+
+    # knockout games can not be drawn
+    choices = RESULTS[:2] if tournament_format == "knockout" else RESULTS
+    while t.status == "In Progress":
+        match_list = []
+        for (player_a, _), (player_b, _) in t.get_current_round().matches:
+            if player_b is None:
+                continue
+            result = rng.choice(choices)
+            score_a = {"1-0": 1, "0-1": 0}.get(result, 0.5)
+            match_list.append([[player_a, score_a], [player_b, 1 - score_a]])
+        t.update_current_round(match_list)
+
+
+def run(args: argparse.Namespace) -> None:
+    """All the lifecycles, in a fresh temporary data folder"""
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as folder:
+        storage.set_data_dir(folder)
+        try:
+            for number in range(args.lifecycles):
+                lifecycle(number, args.players, args.format, rng)
+        finally:
+            storage.close_all()
+
+
+class StackSampler:
+    """Sample the stack of a thread at a fixed interval, as folded stacks
+
+    Positionnal args:
+        thread_id - int - thread to sample
+
+    Optional args:
+        interval - float - seconds between two samples - default = 0.001
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.001) -> None:
+        """Init method for samplers"""
+
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: collections.Counter = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def __enter__(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str) -> None:
+        """One "frame;frame;frame count" line per distinct stack"""
+
+        with open(path, "w", encoding="utf-8") as handle:
+            for stack, count in self.stacks.most_common():
+                handle.write(f"{stack} {count}\n")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command line entry point, return the exit code"""
+
+    parser = argparse.ArgumentParser(description="Profile full tournament lifecycles")
+    parser.add_argument("--lifecycles", type=int, default=20, help="tournaments run")
+    parser.add_argument(
+        "--players", type=int, default=Tournament.N_PLAYERS, help="players per tournament"
+    )
+    parser.add_argument(
+        "--format", default="round_robin", choices=Tournament.AUTHORISED_FORMATS
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of ratings and results")
+    parser.add_argument("--top", type=int, default=15, help="lines of the tops")
+    parser.add_argument("--stacks", default="lifecycle.folded", help="folded stacks file")
+    parser.add_argument(
+        "--max-seconds", type=float, default=None, help="time budget of the timed run"
+    )
+    parser.add_argument(
+        "--max-memory-mb", type=float, default=None, help="peak memory budget"
+    )
+    args = parser.parse_args(argv)
+
+    # the models log every update, keep the output readable
+    logging.disable(logging.WARNING)
+
+    # 1 - timed run, sampled
+    with StackSampler(threading.get_ident()) as sampler:
+        start = time.perf_counter()
+        run(args)
+        elapsed = time.perf_counter() - start
+    sampler.write(args.stacks)
+
+    # 2 - cProfile
+    profiler = cProfile.Profile()
+    profiler.runcall(run, args)
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(args.top)
+
+    # 3 - tracemalloc
+    tracemalloc.start(25)
+    run(args)
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    peak_mb = peak / 2**20
+
+    print(output.getvalue())
+    print(f"Top {args.top} allocation sites (still allocated at the end):")
+    for stat in snapshot.statistics("lineno")[: args.top]:
+        print(f"  {stat}")
+    print()
+    print(
+        f"{args.lifecycles} {args.format} lifecycles of {args.players} players : "
+        f"{elapsed:.3f} s ({elapsed / args.lifecycles * 1000:.1f} ms each), "
+        f"peak memory {peak_mb:.1f} MB"
+    )
+    print(f"{sum(sampler.stacks.values())} stack samples written to {args.stacks}")
+
+    failures = []
+    if args.max_seconds is not None and elapsed > args.max_seconds:
+        failures.append(f"time {elapsed:.3f} s > budget {args.max_seconds} s")
+    if args.max_memory_mb is not None and peak_mb > args.max_memory_mb:
+        failures.append(f"memory {peak_mb:.1f} MB > budget {args.max_memory_mb} MB")
+    for failure in failures:
+        print(f"BUDGET EXCEEDED: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
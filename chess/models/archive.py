@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import copy
+import gzip
+import json
+import os
+import tempfile
+from typing import Dict, Iterable, List
+
+from chess.models import storage
+
+# file => ((mtime, size), content), archives are read once per process,
+# documents handed out are copies so the cached content is never modified
+_cache: Dict[str, tuple] = {}
+
+
+def archive_dir() -> str:
+    """Folder of the archive files, inside the data folder"""
+
+    return os.path.join(storage.DATA_DIR, "archive")
+
+
+def season_of(tournament: dict) -> str:
+    """Season of a tournament : year of its end date"""
+
+    return str(tournament.get("end_date") or tournament.get("start_date") or "unknown")[:4]
+
+
+def _season_path(season: str) -> str:
+    return os.path.join(archive_dir(), f"{season}.json.gz")
+
+
+def _index_path() -> str:
+    return os.path.join(archive_dir(), "index.json")
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    """Write a file through a temporary file and a rename"""
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle = tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False)
+    try:
+        with handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(handle.name, path)
+    except BaseException:
+        os.unlink(handle.name)
+        raise
+
+
+def _load(path: str, compressed: bool, empty: dict) -> dict:
+    """Load a json (or gzip json) file, cached until the file changes"""
+
+    if not os.path.exists(path):
+        return empty
+
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    opener = gzip.open if compressed else open
+    with opener(path, "rt", encoding="utf-8") as handle:
+        content = json.load(handle)
+    _cache[path] = (key, content)
+
+    return content
+
+
+def load_index() -> dict:
+    """{"tournaments": {id: season}, "rounds": {id: season}}"""
+
+    return _load(_index_path(), False, {"tournaments": {}, "rounds": {}})
+
+
+def load_season(season: str) -> dict:
+    """{"tournaments": {id: doc}, "rounds": {id: doc}} of one season"""
+
+    return _load(_season_path(season), True, {"tournaments": {}, "rounds": {}})
+
+
+def write(tournaments: Iterable[dict], rounds_by_id: Dict[str, dict]) -> List[str]:
+    """Add tournaments and their rounds to the archive, return their ids
+
+    Every season file touched is rewritten once (gzip json), then the index.
+    """
+
+    index = load_index()
+    index = {"tournaments": dict(index["tournaments"]), "rounds": dict(index["rounds"])}
+
+    by_season: Dict[str, list] = {}
+    for tournament in tournaments:
+        by_season.setdefault(season_of(tournament), []).append(tournament)
+
+    archived = []
+    for season, season_tournaments in sorted(by_season.items()):
+        content = load_season(season)
+        content = {
+            "tournaments": dict(content["tournaments"]),
+            "rounds": dict(content["rounds"]),
+        }
+        for tournament in season_tournaments:
+            tournament_id = tournament["tournament_id"]
+            content["tournaments"][tournament_id] = dict(tournament)
+            index["tournaments"][tournament_id] = season
+            for round_id in tournament.get("round_id_list", []):
+                if round_id in rounds_by_id:
+                    content["rounds"][round_id] = dict(rounds_by_id[round_id])
+                    index["rounds"][round_id] = season
+            archived.append(tournament_id)
+
+        _atomic_write(
+            _season_path(season), gzip.compress(json.dumps(content).encode("utf-8"))
+        )
+
+    _atomic_write(_index_path(), json.dumps(index).encode("utf-8"))
+
+    return archived
+
+
+def read_tournament(tournament_id: str) -> dict | None:
+    """An archived tournament, None if it is not archived"""
+
+    season = load_index()["tournaments"].get(tournament_id)
+    if season is None:
+        return None
+
+    return copy.deepcopy(load_season(season)["tournaments"].get(tournament_id))
+
+
+def read_rounds(round_ids: Iterable[str]) -> Dict[str, dict]:
+    """Archived rounds by id, unknown ids are skipped"""
+
+    seasons = load_index()["rounds"]
+    found = {}
+    for round_id in round_ids:
+        season = seasons.get(round_id)
+        if season is not None:
+            found[round_id] = copy.deepcopy(load_season(season)["rounds"][round_id])
+
+    return found
+
+
+def all_tournaments() -> List[dict]:
+    """Every archived tournament"""
+
+    seasons = sorted(set(load_index()["tournaments"].values()))
+
+    return copy.deepcopy(
+        [doc for s in seasons for doc in load_season(s)["tournaments"].values()]
+    )
+
+
+def all_rounds() -> List[dict]:
+    """Every archived round"""
+
+    seasons = sorted(set(load_index()["rounds"].values()))
+
+    return copy.deepcopy(
+        [doc for s in seasons for doc in load_season(s)["rounds"].values()]
+    )
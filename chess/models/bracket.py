@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from typing import Dict, List, NamedTuple
+
+from chess.models.pairings import Pair
+
+
+def seed_positions(size: int) -> List[int]:
+    """Seeds (from 1) in bracket order, seeds 1 and 2 only meet in the final
+
+    size 8 : [1, 8, 4, 5, 2, 7, 3, 6]
+    """
+
+    positions = [1]
+    while len(positions) < size:
+        total = 2 * len(positions) + 1
+        positions = [seed for position in positions for seed in (position, total - position)]
+
+    return positions
+
+
+class Step(NamedTuple):
+    """One stage of a player's path in a bracket"""
+
+    stage: int
+    opponent: str | None  # None : a bye, or an opponent not known yet
+    won: bool | None  # None : not played yet
+
+
+class Bracket:
+    """Knockout bracket as an array, like a binary heap
+
+    nodes[1] is the winner of the final, the two players of the game deciding
+    nodes[i] are nodes[2 * i] and nodes[2 * i + 1], the leaves nodes[size] to
+    nodes[2 * size - 1] are the seeded players (size is a power of two, None
+    for the byes given to the top seeds). A node is None until its game is
+    decided. nodes[0] is unused.
+
+    The list is the one saved with the tournament : advancing a winner is one
+    assignment, finding a player's game or path is a walk up from their leaf
+    (log2(size) steps). Earlier rounds are never read again.
+
+    Positionnal args:
+        nodes - List[str | None] - the array, shared (see seeded to build one)
+    """
+
+    def __init__(self, nodes: List[str | None]) -> None:
+        """Init method for brackets"""
+
+        self.nodes = nodes
+        self.size = len(nodes) // 2
+        self.n_stages = self.size.bit_length() - 1
+        self._leaves: Dict[str, int] | None = None
+
+    @classmethod
+    def seeded(cls, player_ids: List[str]) -> "Bracket":
+        """Bracket of players sorted by seed, byes for the top seeds
+
+        The byes are decided at once : those players are already in stage 2.
+        """
+
+        if len(player_ids) < 2:
+            raise ValueError("Un tableau à élimination demande au moins 2 joueurs.")
+
+        size = 1 << (len(player_ids) - 1).bit_length()
+        nodes: List[str | None] = [None] * (2 * size)
+        for offset, seed in enumerate(seed_positions(size)):
+            if seed <= len(player_ids):
+                nodes[size + offset] = player_ids[seed - 1]
+
+        # with size < 2 * n players, a first round game has at most one bye
+        for node in range(size // 2, size):
+            upper, lower = nodes[2 * node], nodes[2 * node + 1]
+            if lower is None:
+                nodes[node] = upper
+
+        return cls(nodes)
+
+    def leaf(self, player_id: str) -> int:
+        """Leaf of a player, KeyError for unknown players"""
+
+        if self._leaves is None:
+            self._leaves = {
+                self.nodes[i]: i for i in range(self.size, 2 * self.size) if self.nodes[i]
+            }
+
+        return self._leaves[player_id]
+
+    def _stage_nodes(self, stage: int) -> range:
+        """Nodes decided by the games of a stage (from 0)"""
+
+        depth = self.n_stages - 1 - stage
+
+        return range(1 << depth, 2 << depth)
+
+    def _position(self, player_id: str) -> int:
+        """Highest node reached by a player"""
+
+        node = self.leaf(player_id)
+        while node > 1 and self.nodes[node // 2] == player_id:
+            node //= 2
+
+        return node
+
+    def stage_pairs(self, stage: int) -> List[Pair]:
+        """Games of a stage, upper player first, byes as (player, None)
+
+        Only games whose players are both known : call it once the previous
+        stage is decided.
+        """
+
+        pairs: List[Pair] = []
+        for node in self._stage_nodes(stage):
+            upper, lower = self.nodes[2 * node], self.nodes[2 * node + 1]
+            if upper is not None and lower is not None:
+                pairs.append((upper, lower))
+            elif stage == 0 and upper is not None:
+                pairs.append((upper, None))
+
+        return pairs
+
+    def current_stage(self) -> int | None:
+        """First stage with a game left, None once the final is decided"""
+
+        for stage in range(self.n_stages):
+            if any(self.nodes[node] is None for node in self._stage_nodes(stage)):
+                return stage
+
+        return None
+
+    def advance(self, winner: str) -> None:
+        """The winner of a game goes to the next node, O(log n)
+
+        Raises ValueError if the player has no game to win (eliminated, bye
+        or champion, or opponent not known yet).
+        """
+
+        try:
+            node = self._position(winner)
+        except KeyError:
+            raise ValueError(f"{winner} n'est pas dans le tableau.") from None
+
+        if node == 1:
+            raise ValueError(f"{winner} a déjà gagné le tournoi.")
+        if self.nodes[node // 2] is not None:
+            raise ValueError(f"{winner} est éliminé.")
+        if self.nodes[node ^ 1] is None:
+            raise ValueError(f"{winner} n'a pas encore d'adversaire.")
+
+        self.nodes[node // 2] = winner
+
+    @property
+    def champion(self) -> str | None:
+        """Winner of the final, None until it is played"""
+
+        return self.nodes[1]
+
+    def path(self, player_id: str) -> List[Step]:
+        """Games of a player, stage by stage, until eliminated or champion
+
+        A walk up from the leaf, O(log n). The last step is the next game
+        (won is None) while the player is still in.
+        """
+
+        node = self.leaf(player_id)
+        steps = []
+        for stage in range(self.n_stages):
+            parent = node // 2
+            opponent = self.nodes[node ^ 1]
+            winner = self.nodes[parent]
+            steps.append(Step(stage, opponent, None if winner is None else winner == player_id))
+            if winner != player_id:
+                break
+            node = parent
+
+        return steps
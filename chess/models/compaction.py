@@ -0,0 +1,249 @@
+"""Compaction of the data/*.json tables
+
+Usage :
+    python -m chess.models.compaction [--data-dir DIR] [--drop-test-data]
+
+Every table is read document by document, filtered, renumbered from 1 and
+written to a temporary file that atomically replaces the original one.
+Rounds not referenced by any tournament are always dropped, test data
+(players and tournaments created by the tests or by bootstrap) only with
+--drop-test-data.
+
+The tables stay locked from the first read to the last replace : running
+processes wait, then reopen the compacted files.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import tempfile
+from typing import Callable, Iterator, NamedTuple, Tuple
+
+from chess.models import storage
+
+CHUNK_SIZE = 1 << 16
+
+
+class TableReport(NamedTuple):
+    """What compaction did to one table"""
+
+    path: str
+    docs_before: int
+    docs_after: int
+    bytes_before: int
+    bytes_after: int
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+    def __str__(self) -> str:
+        return (
+            f"{self.path}: {self.docs_before} -> {self.docs_after} documents, "
+            f"{self.bytes_before} -> {self.bytes_after} bytes "
+            f"({self.bytes_reclaimed} reclaimed)"
+        )
+
+
+def iter_documents(path: str) -> Iterator[Tuple[str, str, dict]]:
+    """Yield (table name, doc id, document) from a TinyDB json file
+
+    The file is read by chunks and decoded one document at a time, so the
+    whole table is never held in memory as python objects.
+    """
+
+    decoder = json.JSONDecoder()
+
+    with open(path, encoding="utf-8") as handle:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def fill() -> bool:
+            nonlocal buffer, pos, eof
+            chunk = handle.read(CHUNK_SIZE)
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip(chars: str = "") -> str:
+            """skip whitespace and the given separators, return next char"""
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] in chars):
+                    pos += 1
+                if pos < len(buffer) or not fill():
+                    return buffer[pos] if pos < len(buffer) else ""
+
+        def decode():
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof or not fill():
+                        raise
+                    continue
+                # a number or string may continue in the next chunk
+                if end == len(buffer) and not eof and fill():
+                    continue
+                pos = end
+                return value
+
+        if skip() != "{":
+            return
+        pos += 1
+
+        while skip(",") not in ("}", ""):
+            table_name = decode()
+            skip(":")
+            pos += 1  # opening brace of the table
+            while skip(",") not in ("}", ""):
+                doc_id = decode()
+                skip(":")
+                yield table_name, doc_id, decode()
+            pos += 1  # closing brace of the table
+
+
+def _size(path: str) -> int:
+    """Size of a file, 0 if missing"""
+
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def rewrite_table(path: str, keep: Callable[[dict], bool]) -> TableReport:
+    """Rewrite a table with only the kept documents, ids renumbered from 1"""
+
+    with storage.replacing(path):
+        return _rewrite_table(path, keep)
+
+
+def _rewrite_table(path: str, keep: Callable[[dict], bool]) -> TableReport:
+    bytes_before = _size(path)
+    docs_before = docs_after = 0
+
+    if not bytes_before:
+        return TableReport(path, 0, 0, 0, 0)
+
+    folder = os.path.dirname(os.path.abspath(path))
+    handle = tempfile.NamedTemporaryFile(
+        "w", dir=folder, prefix=".compact_", suffix=".json", delete=False, encoding="utf-8"
+    )
+
+    try:
+        with handle:
+            current_table = None
+            for table_name, _, doc in iter_documents(path):
+                docs_before += 1
+                if table_name != current_table:
+                    handle.write("{" if current_table is None else "}, ")
+                    handle.write(f"{json.dumps(table_name)}: {{")
+                    current_table = table_name
+                    n_in_table = 0
+                if not keep(doc):
+                    continue
+                docs_after += 1
+                n_in_table += 1
+                separator = ", " if n_in_table > 1 else ""
+                handle.write(f'{separator}"{n_in_table}": {json.dumps(doc)}')
+            handle.write("}}" if current_table is not None else "{}")
+            handle.flush()
+            os.fsync(handle.fileno())
+
+        os.replace(handle.name, path)
+        storage.remove_cache(path)
+
+    except BaseException:
+        os.unlink(handle.name)
+        raise
+
+    return TableReport(path, docs_before, docs_after, bytes_before, os.path.getsize(path))
+
+
+def is_test_player(doc: dict) -> bool:
+    """Players created by the tests and by Player.bootstrap"""
+
+    return str(doc.get("firstname", "")).startswith("Test")
+
+
+def is_test_tournament(doc: dict) -> bool:
+    """Tournaments created by the tests and by Tournament.bootstrap"""
+
+    return str(doc.get("tournament_id", "")).startswith("boot_") or str(
+        doc.get("name", "")
+    ).startswith("TestTournament")
+
+
+def compact(data_dir: str | None = None, drop_test_data: bool = False) -> list[TableReport]:
+    """Compact the players, tournaments and rounds tables of data_dir"""
+
+    data_dir = data_dir or storage.DATA_DIR
+    players_path = os.path.join(data_dir, "players.json")
+    rounds_path = os.path.join(data_dir, "rounds.json")
+    tournaments_path = os.path.join(data_dir, "tournaments.json")
+
+    # the opened TinyDB handles would keep pointing to the old files
+    storage.close_all()
+
+    with contextlib.ExitStack() as stack:
+        # same order as the writes of a tournament : tournaments, rounds, players
+        for path in (tournaments_path, rounds_path, players_path):
+            stack.enter_context(storage.replacing(path))
+
+        # first pass on tournaments : which rounds and players are still used
+        used_rounds: set[str] = set()
+        used_players: set[str] = set()
+        if _size(tournaments_path):
+            for _, _, doc in iter_documents(tournaments_path):
+                if drop_test_data and is_test_tournament(doc):
+                    continue
+                used_rounds.update(doc.get("round_id_list", []))
+                used_players.update(doc.get("player_id_list", []))
+
+        reports = [
+            rewrite_table(
+                tournaments_path,
+                lambda doc: not (drop_test_data and is_test_tournament(doc)),
+            ),
+            rewrite_table(rounds_path, lambda doc: doc.get("round_id") in used_rounds),
+            rewrite_table(
+                players_path,
+                lambda doc: not (drop_test_data and is_test_player(doc))
+                or doc.get("player_id") in used_players,
+            ),
+        ]
+
+    for report in reports:
+        logging.info(report)
+
+    return reports
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Compact the data/*.json tables")
+    parser.add_argument("--data-dir", default=None, help="folder of the json tables")
+    parser.add_argument(
+        "--drop-test-data",
+        action="store_true",
+        help="also drop Test... players, boot_ and TestTournament tournaments",
+    )
+    args = parser.parse_args(argv)
+
+    reports = compact(args.data_dir, drop_test_data=args.drop_test_data)
+
+    for report in reports:
+        print(report)
+    print(f"Total reclaimed: {sum(r.bytes_reclaimed for r in reports)} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Optimistic concurrency for the model tables
+
+Every player, round and tournament document carries a version, bumped by
+each update. An update is a compare-and-swap : it is only written if the
+document on disk still has the version the object was read with, otherwise
+ConflictError is raised and nothing is written. Writers never wait for each
+other while they work, a conflict is detected instead of silently losing
+the other writer's changes ; retry_on_conflict reads again and re-applies.
+
+Only the read-compare-write of the table itself is serialised (an exclusive
+flock on the json file, held for one TinyDB write, see storage), so that two
+processes cannot both see the old version. Every other write of a table
+(insert, remove ...) takes the same lock and can not overwrite an update.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import random
+import threading
+import time
+from typing import Callable, Iterator, TypeVar
+
+from tinydb import TinyDB, where
+
+from chess.models.storage import CachedJSONStorage
+
+RETRY_ATTEMPTS = 5
+RETRY_DELAY = 0.01  # seconds, doubled after every conflict
+RETRY_MAX_DELAY = 0.5
+
+T = TypeVar("T")
+
+_thread_lock = threading.Lock()
+
+
+class ConflictError(Exception):
+    """A document changed (or was deleted) since it was read"""
+
+
+@contextlib.contextmanager
+def table_lock(db: TinyDB) -> Iterator[None]:
+    """Exclusive access to a table for a read-compare-write, or several writes
+
+    Under the lock the file is the only truth : the table reads it again
+    (see CachedJSONStorage.locked), and after a conflict the next read sees
+    the winning write.
+    """
+
+    storage = db.storage
+    if not isinstance(storage, CachedJSONStorage):
+        # other storages (tests in memory ...) : threads of this process only
+        with _thread_lock:
+            yield
+        return
+
+    with storage.locked():
+        yield
+
+
+def _check_version(doc: dict | None, value: str, expected_version: int) -> None:
+    if doc is None:
+        raise ConflictError(f"{value} n'existe plus.")
+    if doc.get("version", 0) != expected_version:
+        raise ConflictError(
+            f"{value} a été modifié par ailleurs (version {doc.get('version', 0)}, "
+            f"attendue {expected_version})."
+        )
+
+
+def check_version(db: TinyDB, key: str, value: str, expected_version: int) -> None:
+    """Raise ConflictError unless the document whose key is value has expected_version
+
+    Under table_lock the version can not change until the lock is released :
+    several writes checked first this way are all done, or none is.
+
+        with table_lock(Tournament.db):
+            check_version(Tournament.db, "tournament_id", t.tournament_id, t.version)
+            ... # other writes
+            t.update()  # can not conflict
+    """
+
+    _check_version(db.get(where(key) == value), value, expected_version)
+
+
+def compare_and_swap(
+    db: TinyDB, key: str, value: str, expected_version: int, document: dict
+) -> None:
+    """Replace the document whose key is value, if its version is expected_version
+
+    Positionnal args:
+        db - TinyDB - table of the document
+        key - str - id field ("player_id", "round_id" ...)
+        value - str - id of the document
+        expected_version - int - version the document was read with
+        document - dict - new content, its version already bumped
+
+    Documents saved before versions existed are version 0.
+    """
+
+    def swap(doc: dict) -> None:
+        # raising here aborts the TinyDB update before anything is written
+        _check_version(doc, value, expected_version)
+        doc.update(document)
+
+    with table_lock(db):
+        updated = db.update(swap, where(key) == value)
+
+    if not updated:
+        raise ConflictError(f"{value} n'existe plus.")
+
+
+def retry_on_conflict(
+    function: Callable[[], T],
+    attempts: int = RETRY_ATTEMPTS,
+    delay: float = RETRY_DELAY,
+) -> T:
+    """Call function until it does not raise ConflictError
+
+    function must read the documents it changes again at every call :
+
+        def rename():
+            t = Tournament.read_one(tournament_id)
+            t.name = "Open d'été"
+            t.update()
+
+        retry_on_conflict(rename)
+
+    Optional args:
+        attempts - int - calls before giving up (the last ConflictError is raised) - default = 5
+        delay - float - first wait between calls, doubled each time (at most
+            RETRY_MAX_DELAY), with jitter - default = 0.01
+    """
+
+    for attempt in range(1, attempts + 1):
+        try:
+            return function()
+        except ConflictError as e:
+            if attempt == attempts:
+                raise
+            logging.warning(f"Conflit, nouvel essai ({attempt}/{attempts}) : {e}")
+            wait = min(delay * 2 ** (attempt - 1), RETRY_MAX_DELAY)
+            time.sleep(wait * random.uniform(0.5, 1.5))
+
+    raise ValueError("attempts doit être au moins 1.")
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import datetime
+from typing import List
+
+from chess.models.pairings import format_result
+from chess.models.players import Player
+from chess.models.rounds import Round
+from chess.models.tournaments import Tournament
+
+
+def _player_view(player: Player | None, player_id: str | None) -> dict | None:
+    """What a board shows of a player"""
+
+    if player_id is None:
+        return None
+    if player is None:
+        return {"player_id": player_id, "name": player_id, "rating": None}
+
+    return {
+        "player_id": player_id,
+        "name": f"{player.firstname} {player.lastname}",
+        "rating": round(player.rating),
+    }
+
+
+def events_of_the_day(day: str | None = None) -> List[dict]:
+    """Every tournament running on day, with its current round, ready to render
+
+    day - str - "YYYY-MM-DD" - default = None (today)
+
+    Three reads whatever the number of events : the tournaments, the current
+    rounds of all of them, and all their players. Everything is then joined
+    in memory with dicts.
+    """
+
+    day = day or datetime.date.today().isoformat()
+
+    # 1 - tournaments
+    tournaments = [
+        t
+        for t in Tournament.read_all()
+        if str(t.start_date) <= day <= str(t.end_date) and t.status != "Created"
+    ]
+
+    current_round_ids = {}
+    for t in tournaments:
+        if 0 <= t.current_round_number < len(t.round_id_list):
+            current_round_ids[t.tournament_id] = t.round_id_list[t.current_round_number]
+
+    # 2 - current rounds
+    rounds = {r.round_id: r for r in Round.read_many(list(current_round_ids.values()))}
+
+    # 3 - players of those rounds
+    player_ids = {
+        player_id
+        for r in rounds.values()
+        for match in r.matches
+        for player_id, _ in match
+        if player_id is not None
+    }
+    players = {p.player_id: p for p in Player.read_many(list(player_ids))}
+
+    events = []
+    for t in tournaments:
+        current_round = rounds.get(current_round_ids.get(t.tournament_id))
+        boards = []
+        if current_round is not None:
+            for board, match in enumerate(current_round.matches, start=1):
+                if len(match) != 2:
+                    continue
+                (white, score_white), (black, score_black) = match
+                boards.append(
+                    {
+                        "board": board,
+                        "white": _player_view(players.get(white), white),
+                        "black": _player_view(players.get(black), black),
+                        "result": format_result(score_white, score_black),
+                    }
+                )
+
+        events.append(
+            {
+                "tournament_id": t.tournament_id,
+                "name": t.name,
+                "location": t.location,
+                "status": t.status,
+                "round_number": t.current_round_number + 1,
+                "n_rounds": t.n_rounds,
+                "boards": boards,
+            }
+        )
+
+    return events
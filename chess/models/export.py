@@ -0,0 +1,328 @@
+"""Bulk export of tournaments : results and standings
+
+Usage :
+    python -m chess.models.export --format csv|jsonl|trf --output PATH
+        [--season 2024] [--standings] [--workers 4] [--data-dir DIR]
+
+csv and jsonl write one file, trf (FIDE Tournament Report File) one file
+per tournament in the PATH folder. The tables are read once (tournaments,
+rounds and players, archive included), then every tournament is formatted
+by a pool of threads and written as soon as it is ready, in order : the
+output itself is never held in memory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import csv
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple
+
+from chess.models import archive, storage
+from chess.models.pairings import format_result
+from chess.models.players import Player
+from chess.models.rounds import Round
+from chess.models.tiebreaks import TIEBREAKS, ResultsMatrix
+from chess.models.tournaments import Tournament
+
+FORMATS = ["csv", "jsonl", "trf"]
+RESULT_COLUMNS = [
+    "tournament_id", "tournament", "round", "board", "white_id", "white",
+    "black_id", "black", "white_score", "black_score", "result",
+]  # fmt: skip
+STANDING_COLUMNS = [
+    "tournament_id", "tournament", "rank", "player_id", "name", "rating", "points",
+] + TIEBREAKS  # fmt: skip
+
+
+class Event(NamedTuple):
+    """A tournament with everything needed to export it"""
+
+    tournament: Tournament
+    rounds: List[Round]
+    players: Dict[str, Player]
+
+
+def select_tournaments(
+    season: str | None = None, include_archived: bool = True
+) -> List[Tournament]:
+    """Tournaments to export : one season (year of the end date) or all"""
+
+    tournaments = Tournament.read_all(include_archived=include_archived)
+    if season is not None:
+        tournaments = [t for t in tournaments if archive.season_of(t.to_dict()) == season]
+
+    return sorted(tournaments, key=lambda t: (t.start_date, t.tournament_id))
+
+
+def iter_events(tournaments: List[Tournament]) -> Iterator[Event]:
+    """Join tournaments with their rounds and players, each table read once"""
+
+    round_ids = [i for t in tournaments for i in t.round_id_list]
+    player_ids = list({i for t in tournaments for i in t.player_id_list})
+
+    rounds_by_id = {r.round_id: r for r in Round.read_many(round_ids)}
+    players = {p.player_id: p for p in Player.read_many(player_ids)}
+
+    for t in tournaments:
+        rounds = [rounds_by_id[i] for i in t.round_id_list if i in rounds_by_id]
+        rounds.sort(key=lambda r: r.round_number)
+        yield Event(t, rounds, {i: players[i] for i in t.player_id_list if i in players})
+
+
+def player_name(event: Event, player_id: str | None) -> str:
+    """ "Firstname LASTNAME", the id for unknown players, empty for a bye"""
+
+    if player_id is None:
+        return ""
+    player = event.players.get(player_id)
+
+    return f"{player.firstname} {player.lastname}" if player else player_id
+
+
+def standings(event: Event) -> List[tuple]:
+    """(rank, player_id, points, *tiebreaks) sorted by points, tiebreaks, starting rank"""
+
+    matrix = ResultsMatrix.from_rounds(event.tournament.player_id_list, event.rounds)
+
+    return [tuple(line) for line in matrix.standings()]
+
+
+def result_rows(event: Event) -> Iterator[list]:
+    """One row per board, RESULT_COLUMNS"""
+
+    t = event.tournament
+    for round_ in event.rounds:
+        for board, match in enumerate(round_.matches, start=1):
+            if len(match) != 2:
+                continue
+            (white, score_white), (black, score_black) = match
+            yield [
+                t.tournament_id,
+                t.name,
+                round_.round_number + 1,
+                board,
+                white,
+                player_name(event, white),
+                black or "",
+                player_name(event, black),
+                score_white,
+                score_black,
+                "bye" if black is None else format_result(score_white, score_black) or "",
+            ]
+
+
+def standing_rows(event: Event) -> Iterator[list]:
+    """One row per player, STANDING_COLUMNS"""
+
+    t = event.tournament
+    for rank, player_id, points, *tiebreaks in standings(event):
+        player = event.players.get(player_id)
+        yield [
+            t.tournament_id,
+            t.name,
+            rank,
+            player_id,
+            player_name(event, player_id),
+            round(player.rating) if player else "",
+            points,
+            *tiebreaks,
+        ]
+
+
+def to_csv(event: Event, kind: str = "results") -> str:
+    """Rows of one tournament, without the header"""
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(result_rows(event) if kind == "results" else standing_rows(event))
+
+    return buffer.getvalue()
+
+
+def to_jsonl(event: Event, kind: str = "results") -> str:
+    """One json line per tournament : its description, standings and rounds"""
+
+    doc = {
+        key: value
+        for key, value in event.tournament.to_dict().items()
+        if key not in ("round_id_list", "player_id_list")
+    }
+    doc["standings"] = [
+        dict(zip(STANDING_COLUMNS[2:], row[2:])) for row in standing_rows(event)
+    ]
+    if kind == "results":
+        doc["results"] = [
+            dict(zip(RESULT_COLUMNS[2:], row[2:])) for row in result_rows(event)
+        ]
+
+    return json.dumps(doc) + "\n"
+
+
+def _trf_result(score: float, bye: bool) -> str:
+    if bye:
+        return {0: "Z", 0.5: "H"}.get(score, "U")
+
+    return {1: "1", 0.5: "=", 0: "0"}[score]
+
+
+def to_trf(event: Event, kind: str = "results") -> str:
+    """FIDE TRF (2016) report of one tournament
+
+    Starting ranks are the seeded order of player_id_list. Unplayed rounds
+    are left blank, byes are written 0000 with U (pairing allocated bye), H
+    (half point) or Z (zero point).
+    """
+
+    t = event.tournament
+    start_rank = {player_id: n for n, player_id in enumerate(t.player_id_list, start=1)}
+    places = {line[1]: (line[0], line[2]) for line in standings(event)}
+
+    # player => one 10 characters block per round
+    blocks: Dict[str, List[str]] = collections.defaultdict(list)
+    for n, round_ in enumerate(event.rounds):
+        for match in round_.matches:
+            if len(match) != 2:
+                continue
+            for (player_id, score), (opponent_id, opponent_score) in (match, match[::-1]):
+                if player_id is None or player_id not in start_rank:
+                    continue
+                blocks[player_id] += [" " * 10] * (n - len(blocks[player_id]))
+                if score < 0:
+                    continue
+                if opponent_id is None:
+                    block = f"  0000 - {_trf_result(score, bye=True)}"
+                else:
+                    colour = "w" if player_id == match[0][0] else "b"
+                    opponent = start_rank.get(opponent_id, 0)
+                    block = f"  {opponent:>4} {colour} {_trf_result(score, bye=False)}"
+                blocks[player_id].append(block)
+
+    lines = [
+        f"012 {t.name}",
+        f"022 {t.location}",
+        f"042 {str(t.start_date).replace('-', '/')}",
+        f"052 {str(t.end_date).replace('-', '/')}",
+        f"062 {len(t.player_id_list)}",
+        f"092 {t.tournament_format}",
+        f"XXR {t.n_rounds or len(event.rounds)}",
+    ]
+    for player_id in t.player_id_list:
+        player = event.players.get(player_id)
+        name = f"{player.lastname}, {player.firstname}" if player else player_id
+        rating = round(player.rating) if player else 0
+        birthdate = str(player.birthdate).replace("-", "/") if player else ""
+        rank, points = places.get(player_id, (0, 0))
+        lines.append(
+            f"001 {start_rank[player_id]:>4}      {name[:33]:<33} {rating:>4} "
+            f"{'':>3} {'':>11} {birthdate:>10} {points:>4.1f} {rank:>4}"
+            + "".join(blocks.get(player_id, []))
+        )
+
+    return "\n".join(line.rstrip() for line in lines) + "\n"
+
+
+FORMATTERS: Dict[str, Callable[[Event, str], str]] = {
+    "csv": to_csv,
+    "jsonl": to_jsonl,
+    "trf": to_trf,
+}
+
+
+def _ordered(function: Callable, items: Iterable, max_workers: int) -> Iterator:
+    """function(item) computed by a thread pool, yielded in order
+
+    At most 2 * max_workers results are pending, so memory stays bounded.
+    """
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending: collections.deque = collections.deque()
+        for item in items:
+            pending.append(pool.submit(function, item))
+            if len(pending) >= 2 * max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def export(
+    output_format: str,
+    path: str,
+    tournaments: List[Tournament] | None = None,
+    kind: str = "results",
+    max_workers: int = 4,
+) -> int:
+    """Export tournaments, return the number exported
+
+    output_format - str - "csv", "jsonl" or "trf"
+    path - str - output file (csv, jsonl) or folder (trf)
+    tournaments - List[Tournament] - default = None (all, archive included)
+    kind - str - "results" (one row per board) or "standings" (one row per
+        player), for csv and jsonl (standings only)
+    """
+
+    if output_format not in FORMATTERS:
+        raise ValueError(f"Format d'export inconnu : {output_format}.")
+    if kind not in ("results", "standings"):
+        raise ValueError(f"Export inconnu : {kind}.")
+
+    if tournaments is None:
+        tournaments = select_tournaments()
+    formatter = FORMATTERS[output_format]
+    events = iter_events(tournaments)
+
+    if output_format == "trf":
+        os.makedirs(path, exist_ok=True)
+
+        def write_report(event: Event) -> None:
+            file_path = os.path.join(path, f"{event.tournament.tournament_id}.trf")
+            with open(file_path, "w", encoding="utf-8") as handle:
+                handle.write(formatter(event, kind))
+
+        return sum(1 for _ in _ordered(write_report, events, max_workers))
+
+    count = 0
+
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        if output_format == "csv":
+            columns = RESULT_COLUMNS if kind == "results" else STANDING_COLUMNS
+            handle.write(",".join(columns) + "\n")
+        for text in _ordered(lambda e: formatter(e, kind), events, max_workers):
+            handle.write(text)
+            count += 1
+
+    return count
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Export tournaments results")
+    parser.add_argument("--format", choices=FORMATS, required=True)
+    parser.add_argument("--output", required=True, help="file (csv, jsonl) or folder (trf)")
+    parser.add_argument("--season", default=None, help="year of the end date")
+    parser.add_argument("--standings", action="store_true", help="standings, not results")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--data-dir", default=None, help="folder of the json tables")
+    args = parser.parse_args(argv)
+
+    if args.data_dir:
+        storage.set_data_dir(args.data_dir)
+
+    count = export(
+        args.format,
+        args.output,
+        select_tournaments(args.season),
+        kind="standings" if args.standings else "results",
+        max_workers=args.workers,
+    )
+
+    print(f"{count} tournaments exported to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""Change feed of the tournaments and rounds, for live result boards
+
+Usage :
+    python -m chess.models.feed [--socket PATH] [--kind tournament|round]
+
+Tournament and Round publish a Change on create, update and delete.
+Displays subscribe instead of reading the tables again every few seconds :
+
+- in the process, with an observer : ChangeFeed.subscribe(callback)
+- in asyncio code, with a queue : async for change in ChangeFeed.changes()
+- in another process, through a local (unix) socket : the process writing
+  the results calls ChangeFeed.serve(path), displays read one json line per
+  change with listen(path), or this command.
+
+Nothing is done (not even a copy of the document) while nobody listens.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import os
+import selectors
+import socket
+import threading
+from typing import AsyncIterator, Callable, Dict, Iterator, List, NamedTuple, Set
+
+from chess.helpers import now
+from chess.models import storage
+
+KINDS = ["tournament", "round"]
+ACTIONS = ["created", "updated", "deleted"]
+SOCKET_NAME = "feed.sock"
+# output kept for a client too slow to read, it is dropped beyond that
+MAX_PENDING = 1 << 20
+
+
+class Change(NamedTuple):
+    """One write of a tournament or a round"""
+
+    seq: int  # order of the changes published by a process
+    kind: str  # "tournament" or "round"
+    action: str  # "created", "updated" or "deleted"
+    id: str
+    document: dict | None  # content after the write, None when deleted
+    at: str  # helpers.now()
+
+    def to_json(self) -> str:
+        return json.dumps(self._asdict())
+
+    @classmethod
+    def from_json(cls, line: str) -> "Change":
+        return cls(**json.loads(line))
+
+
+class ChangeFeed:
+    """Publish / subscribe of the changes of this process (class only, no instance)"""
+
+    _lock = threading.Lock()
+    _seq = 0
+    _observers: List[tuple] = []  # (callback, kinds)
+    _server: "FeedServer | None" = None
+
+    @classmethod
+    def active(cls) -> bool:
+        """True if somebody listens"""
+
+        return bool(cls._observers)
+
+    @classmethod
+    def subscribe(
+        cls, callback: Callable[[Change], None], kinds: List[str] | None = None
+    ) -> Callable[[], None]:
+        """Call callback(change) after every write, return the unsubscribe function
+
+        kinds - List[str] - only "tournament" or "round" changes - default = None (all)
+
+        The callback runs in the writing thread, right after the write : it
+        must be quick. An exception in a callback is logged, never raised to
+        the writer.
+        """
+
+        observer = (callback, frozenset(kinds or KINDS))
+        with cls._lock:
+            cls._observers = cls._observers + [observer]
+
+        def unsubscribe() -> None:
+            with cls._lock:
+                cls._observers = [o for o in cls._observers if o is not observer]
+
+        return unsubscribe
+
+    @classmethod
+    def publish(cls, kind: str, action: str, id_: str, document: dict | None = None) -> None:
+        """Send a change to every observer (called by the models)"""
+
+        observers = cls._observers
+        if not observers:
+            return
+
+        with cls._lock:
+            cls._seq += 1
+            seq = cls._seq
+        change = Change(seq, kind, action, id_, copy.deepcopy(document), now())
+
+        for callback, kinds in observers:
+            if kind not in kinds:
+                continue
+            try:
+                callback(change)
+            except Exception as e:
+                logging.error(f"Change feed observer {callback!r} failed: {e}")
+
+    @classmethod
+    async def changes(
+        cls, kinds: List[str] | None = None, maxsize: int = 0
+    ) -> AsyncIterator[Change]:
+        """Changes as an async iterator, for the writes of every thread
+
+        maxsize - int - changes waiting at most, older ones dropped - default = 0 (no limit)
+        """
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def put(change: Change) -> None:
+            if maxsize and queue.qsize() >= maxsize:
+                queue.get_nowait()
+            queue.put_nowait(change)
+
+        unsubscribe = cls.subscribe(lambda c: loop.call_soon_threadsafe(put, c), kinds)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            unsubscribe()
+
+    @classmethod
+    def serve(cls, path: str | None = None) -> "FeedServer":
+        """Broadcast the changes on a unix socket (one per process)
+
+        path - str - default = None (feed.sock in the data folder)
+        """
+
+        if cls._server is None:
+            server = FeedServer(path or default_socket_path())
+            server.start()
+            cls._server = server
+
+        return cls._server
+
+    @classmethod
+    def stop(cls) -> None:
+        """Stop the socket server, the other observers are left subscribed"""
+
+        if cls._server is not None:
+            cls._server.stop()
+            cls._server = None
+
+
+def default_socket_path() -> str:
+    """feed.sock in the folder of the tables"""
+
+    # read at call time, the data folder can change
+    return os.path.join(storage.DATA_DIR, SOCKET_NAME)
+
+
+class FeedServer:
+    """Unix socket server writing every change as a json line to its clients
+
+    Positionnal args:
+        path - str - socket file, replaced if left by a server no longer running
+
+    Writers only append the line to the output buffer of every client : the
+    server thread sends them when the clients can read, never blocking the
+    writers nor cutting a line. A client too slow to read (more than
+    MAX_PENDING bytes waiting) gets no new line and is dropped once what it
+    was sent ends with a whole line.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Init method for feed servers"""
+
+        self.path = path
+        # client => output not sent yet
+        self._clients: Dict[socket.socket, bytearray] = {}
+        self._closing: Set[socket.socket] = set()
+        self._clients_lock = threading.Lock()
+        self._socket: socket.socket | None = None
+        self._wake_r: socket.socket | None = None
+        self._wake_w: socket.socket | None = None
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self._unsubscribe: Callable[[], None] | None = None
+
+    def start(self) -> None:
+        """Serve in a daemon thread, broadcast from the writing threads
+
+        Raises ValueError if another server answers on the path.
+        """
+
+        # a socket file nobody accepts on is left by a stopped (killed) server
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(self.path)
+            except FileNotFoundError:
+                pass
+            except ConnectionRefusedError:
+                os.unlink(self.path)
+            else:
+                raise ValueError(f"Changements déjà diffusés sur {self.path}.")
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.bind(self.path)
+        self._socket.listen()
+        self._socket.setblocking(False)
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._thread = threading.Thread(target=self._serve, name="change-feed", daemon=True)
+        self._thread.start()
+        self._unsubscribe = ChangeFeed.subscribe(self.broadcast)
+
+    def _wake(self) -> None:
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass  # a wake up is already waiting, or stopped
+
+    def _serve(self) -> None:
+        """Accept clients and send their output when they can read"""
+
+        selector = selectors.DefaultSelector()
+        selector.register(self._socket, selectors.EVENT_READ)
+        selector.register(self._wake_r, selectors.EVENT_READ)
+        watched: Set[socket.socket] = set()
+        try:
+            while not self._stopping:
+                for key, _ in selector.select():
+                    if key.fileobj is self._socket:
+                        self._accept()
+                    elif key.fileobj is self._wake_r:
+                        try:
+                            self._wake_r.recv(4096)
+                        except OSError:
+                            pass
+
+                with self._clients_lock:
+                    for client in list(self._clients):
+                        self._flush(client)
+                    # only clients with output left wait until they can read
+                    waiting = {c for c, pending in self._clients.items() if pending}
+                for client in watched - waiting:
+                    selector.unregister(client)
+                for client in waiting - watched:
+                    selector.register(client, selectors.EVENT_WRITE)
+                watched = waiting
+
+            # what was broadcast before stop, as far as the clients read it
+            with self._clients_lock:
+                for client in list(self._clients):
+                    self._flush(client)
+        finally:
+            selector.close()
+
+    def _accept(self) -> None:
+        try:
+            client, _ = self._socket.accept()
+        except OSError:
+            return
+        client.setblocking(False)
+        with self._clients_lock:
+            self._clients[client] = bytearray()
+
+    def _flush(self, client: socket.socket) -> None:
+        """Send what the client can read now, drop it if it is gone or too slow"""
+
+        pending = self._clients[client]
+        try:
+            while pending:
+                del pending[: client.send(pending)]
+        except BlockingIOError:
+            return
+        except OSError:
+            pass
+        else:
+            if client not in self._closing:
+                return
+        # gone, or too slow and its last line fully sent
+        del self._clients[client]
+        self._closing.discard(client)
+        client.close()
+
+    def broadcast(self, change: Change) -> None:
+        """Queue a change for every client, sent by the server thread"""
+
+        data = (change.to_json() + "\n").encode("utf-8")
+        with self._clients_lock:
+            for client, pending in self._clients.items():
+                if client in self._closing:
+                    continue
+                if len(pending) > MAX_PENDING:
+                    logging.warning("Client du flux trop lent, déconnecté.")
+                    self._closing.add(client)
+                    continue
+                pending += data
+        self._wake()
+
+    @property
+    def n_clients(self) -> int:
+        return len(self._clients)
+
+    def stop(self) -> None:
+        """Stop serving, close the socket and every client"""
+
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+        self._stopping = True
+        if self._thread is not None:
+            self._wake()
+            self._thread.join(5)
+        for handle in (self._socket, self._wake_r, self._wake_w):
+            if handle is not None:
+                handle.close()
+        with self._clients_lock:
+            for client in self._clients:
+                client.close()
+            self._clients.clear()
+            self._closing.clear()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def listen(path: str | None = None, kinds: List[str] | None = None) -> Iterator[Change]:
+    """Changes broadcast by FeedServer on path, until the server stops
+
+    path - str - default = None (feed.sock in the data folder)
+    """
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path or default_socket_path())
+        for line in client.makefile("r", encoding="utf-8"):
+            if not line.endswith("\n"):
+                break  # the server stopped in the middle of a line
+            change = Change.from_json(line)
+            if kinds is None or change.kind in kinds:
+                yield change
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point : print the changes as json lines"""
+
+    parser = argparse.ArgumentParser(description="Follow the changes of tournaments and rounds")
+    parser.add_argument("--socket", default=None, help="socket of the writing process")
+    parser.add_argument("--kind", choices=KINDS, action="append", default=None)
+    args = parser.parse_args(argv)
+
+    try:
+        for change in listen(args.socket, args.kind):
+            print(change.to_json(), flush=True)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
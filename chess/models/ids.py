@@ -0,0 +1,141 @@
+"""Ids of the players, tournaments and rounds
+
+Ids are ULIDs : 48 bits of milliseconds since the epoch then 80 random bits,
+written as 26 Crockford base32 characters. They sort like their creation
+time, so a range of ids is a range of creation dates, and two processes
+creating ids at the same millisecond only collide with a 2**-80 chance.
+Inside a process ids are strictly increasing : in the same millisecond the
+random part of the previous id is incremented.
+
+Round ids are the id of their tournament followed by "_round_<n>", they
+carry its date. Old ids (8 hex characters) are still valid ids, they just
+carry no date.
+"""
+
+from __future__ import annotations
+
+import datetime
+import os
+import threading
+import time
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+LENGTH = 26
+RANDOM_BITS = 80
+
+_lock = threading.Lock()
+_last = (0, 0)  # (milliseconds, random part) of the last id
+
+
+# every 10 bits value as 2 characters, an id is 13 lookups
+_PAIRS = [a + b for a in ALPHABET for b in ALPHABET]
+
+
+def encode(value: int) -> str:
+    """128 bits integer to 26 base32 characters"""
+
+    return "".join(_PAIRS[(value >> shift) & 0x3FF] for shift in range(120, -1, -10))
+
+
+def decode(id_: str) -> int:
+    """26 base32 characters to an integer, ValueError if it is not a ULID"""
+
+    if len(id_) != LENGTH:
+        raise ValueError(f"{id_} n'est pas un identifiant ULID.")
+    value = 0
+    for char in id_.upper():
+        index = ALPHABET.find(char)
+        if index < 0:
+            raise ValueError(f"{id_} n'est pas un identifiant ULID.")
+        value = value * 32 + index
+
+    return value
+
+
+def make_id(milliseconds: int, randomness: int) -> str:
+    """Id from its two parts (for generated data : seeded randomness)"""
+
+    randomness &= (1 << RANDOM_BITS) - 1
+
+    return encode((milliseconds << RANDOM_BITS) | randomness)
+
+
+def new_id() -> str:
+    """A new id, greater than every id created before in this process"""
+
+    global _last
+
+    with _lock:
+        milliseconds = time.time_ns() // 1_000_000
+        last_milliseconds, last_random = _last
+        if milliseconds <= last_milliseconds:
+            # same millisecond (or clock going back) : keep the order
+            milliseconds = last_milliseconds
+            randomness = last_random + 1
+            if randomness >> RANDOM_BITS:
+                milliseconds, randomness = milliseconds + 1, 0
+        else:
+            randomness = int.from_bytes(os.urandom(RANDOM_BITS // 8), "big")
+        _last = (milliseconds, randomness)
+
+    return make_id(milliseconds, randomness)
+
+
+def is_ulid(id_: str) -> bool:
+    """True for ids made by this module, False for old ids"""
+
+    try:
+        decode(id_)
+    except (TypeError, ValueError):
+        return False
+
+    return True
+
+
+def created_at(id_: str) -> datetime.datetime | None:
+    """Creation date (UTC) of an id starting with a ULID, None for old ids"""
+
+    if not is_ulid(id_[:LENGTH]):
+        return None
+
+    milliseconds = decode(id_[:LENGTH]) >> RANDOM_BITS
+
+    return datetime.datetime.fromtimestamp(milliseconds / 1000, datetime.timezone.utc)
+
+
+def milliseconds(moment: datetime.datetime | datetime.date | str) -> int:
+    """Milliseconds since the epoch, naive dates being UTC"""
+
+    if isinstance(moment, str):
+        moment = datetime.datetime.fromisoformat(moment)
+    elif not isinstance(moment, datetime.datetime):
+        moment = datetime.datetime(moment.year, moment.month, moment.day)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+
+    return int(moment.timestamp() * 1000)
+
+
+def id_range(start, end) -> tuple[str, str]:
+    """Lowest and highest ids created in [start, end[
+
+    start, end - datetime, date or iso string ("2024-01-01")
+
+    Compare ids as strings : start_id <= id_ <= end_id.
+    """
+
+    return (
+        make_id(milliseconds(start), 0),
+        make_id(milliseconds(end) - 1, (1 << RANDOM_BITS) - 1),
+    )
+
+
+def in_range(id_: str, bounds: tuple[str, str]) -> bool:
+    """True if an id starting with a ULID is inside id_range bounds
+
+    Always False for old ids.
+    """
+
+    prefix = id_[:LENGTH]
+
+    return is_ulid(prefix) and bounds[0] <= prefix.upper() <= bounds[1]
@@ -0,0 +1,196 @@
+"""Bulk import of player registrations
+
+Usage :
+    python -m chess.models.imports FILE [--format csv|jsonl] [--batch-size N]
+        [--dry-run] [--data-dir DIR]
+
+Columns (csv header or jsonl keys) : firstname, lastname, birthdate
+(YYYY-MM-DD or DD/MM/YYYY) and optionally rating and player_id.
+
+The file is read row by row, names are normalised like Player does, and a
+player already known with the same name and birthdate (in the table or
+earlier in the file) is skipped. New players are inserted by batches : one
+write of the players table per batch.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime
+import json
+import logging
+import os
+import time
+from typing import Iterator, NamedTuple, Tuple
+
+from chess.models import storage
+from chess.models.players import Player
+
+BATCH_SIZE = 10000
+
+
+class ImportReport(NamedTuple):
+    """What an import did"""
+
+    rows: int
+    imported: int
+    duplicates: int
+    rejected: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.rows} rows : {self.imported} imported, {self.duplicates} duplicates, "
+            f"{self.rejected} rejected in {self.seconds:.2f} s "
+            f"({self.rows_per_second:.0f} rows/s)"
+        )
+
+
+def player_key(player_dict: dict) -> Tuple[str, str, str]:
+    """Identity of a player for duplicates : normalised names and birthdate"""
+
+    return (
+        str(player_dict.get("firstname", "")).casefold(),
+        str(player_dict.get("lastname", "")).casefold(),
+        str(player_dict.get("birthdate", "")),
+    )
+
+
+def parse_birthdate(value: str) -> str:
+    """YYYY-MM-DD or DD/MM/YYYY to YYYY-MM-DD, ValueError otherwise"""
+
+    value = value.strip()
+    try:
+        if "/" in value:
+            day, month, year = value.split("/")
+            return datetime.date(int(year), int(month), int(day)).isoformat()
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"Date de naissance invalide : {value!r}.") from None
+
+
+def iter_rows(path: str, input_format: str | None = None) -> Iterator[Tuple[int, dict]]:
+    """(line number, row) of a csv or jsonl file, read line by line
+
+    The row is None for a jsonl line that is not json.
+    """
+
+    input_format = input_format or os.path.splitext(path)[1].lstrip(".").lower()
+    if input_format not in ("csv", "jsonl"):
+        raise ValueError(f"Format d'import inconnu : {input_format}.")
+
+    with open(path, encoding="utf-8-sig", newline="") as handle:
+        if input_format == "csv":
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError:
+                    yield line_number, None
+
+
+def player_from_row(row: dict) -> Player:
+    """Player of an imported row, ValueError if a field is missing or wrong"""
+
+    firstname = str(row.get("firstname") or "").strip()
+    lastname = str(row.get("lastname") or "").strip()
+    if not firstname or not lastname:
+        raise ValueError("Prénom et nom obligatoires.")
+
+    birthdate = row.get("birthdate")
+    rating = row.get("rating")
+
+    return Player(
+        firstname,
+        lastname,
+        birthdate=parse_birthdate(str(birthdate)) if birthdate else "1970-01-01",
+        player_id=row.get("player_id") or None,
+        rating=float(rating) if rating not in (None, "") else Player.DEFAULT_RATING,
+    )
+
+
+def import_players(
+    path: str,
+    input_format: str | None = None,
+    batch_size: int = BATCH_SIZE,
+    dry_run: bool = False,
+) -> ImportReport:
+    """Import the players of a csv or jsonl file
+
+    dry_run - bool - count what would be imported, write nothing - default = False
+    """
+
+    start = time.perf_counter()
+
+    # one pass over the table for the duplicates index
+    docs = Player.db.all()
+    known = {player_key(doc) for doc in docs}
+    known_ids = {doc["player_id"] for doc in docs}
+    del docs
+
+    rows = imported = duplicates = rejected = 0
+    batch = []
+
+    def flush() -> None:
+        if batch and not dry_run:
+            Player.db.insert_multiple(batch)
+            Player._index_players(batch)
+        batch.clear()
+
+    for line, row in iter_rows(path, input_format):
+        rows += 1
+        try:
+            player_dict = player_from_row(row).to_dict()
+        except (AttributeError, TypeError, ValueError) as e:
+            rejected += 1
+            logging.warning(f"{path}:{line} refusé : {e}")
+            continue
+
+        key = player_key(player_dict)
+        if key in known or player_dict["player_id"] in known_ids:
+            duplicates += 1
+            continue
+        known.add(key)
+        known_ids.add(player_dict["player_id"])
+
+        batch.append(player_dict)
+        imported += 1
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+
+    return ImportReport(rows, imported, duplicates, rejected, time.perf_counter() - start)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Import player registrations")
+    parser.add_argument("file", help="csv or jsonl file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="write nothing")
+    parser.add_argument("--data-dir", default=None, help="folder of the json tables")
+    args = parser.parse_args(argv)
+
+    if args.data_dir:
+        storage.set_data_dir(args.data_dir)
+
+    report = import_players(args.file, args.format, args.batch_size, args.dry_run)
+
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
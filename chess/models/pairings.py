@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Set, Tuple
+
+# (player_a_id, player_b_id), player_b_id is None for a bye
+Pair = Tuple[str, "str | None"]
+
+UNPLAYED = -1
+
+# results accepted for a board, as (score of white, score of black)
+RESULTS = {
+    "1-0": (1, 0),
+    "0-1": (0, 1),
+    "1/2-1/2": (0.5, 0.5),
+    "½-½": (0.5, 0.5),
+}
+
+
+def berger_schedule(player_ids: List[str]) -> List[List[Pair]]:
+    """Compute a full round-robin schedule with Berger tables
+
+    Players are expected in seed order. With an odd number of players a None
+    opponent is added and whoever meets it has a bye for the round.
+    Returns one list of pairs per round, the first player having white.
+    """
+
+    players: List[str | None] = list(player_ids)
+    if len(players) < 2:
+        return []
+    if len(players) % 2:
+        players.append(None)
+
+    n = len(players)
+    fixed = players[-1]
+    rotating = players[:-1]
+
+    schedule = []
+    for round_number in range(n - 1):
+        # the fixed player alternates colours every round
+        if round_number % 2 == 0:
+            pairs = [(rotating[0], fixed)]
+        else:
+            pairs = [(fixed, rotating[0])]
+
+        for i in range(1, n // 2):
+            pairs.append((rotating[i], rotating[-i]))
+
+        # a bye is always stored with the player first
+        schedule.append([(a, b) if a is not None else (b, a) for a, b in pairs])
+
+        rotating = rotating[-1:] + rotating[:-1]
+
+    return schedule
+
+
+class PairingHistory:
+    """Who met whom, and with which colour, in one tournament
+
+    An n x n adjacency matrix (one byte per pair of players) answers
+    "have a and b met ?" in constant time, colours and byes are kept per
+    player. Built once from the rounds, then fed every new round.
+
+    Positionnal args:
+        player_ids - List[str] - players of the tournament
+    """
+
+    def __init__(self, player_ids: List[str]) -> None:
+        """Init method for pairing histories"""
+
+        self.index = {player_id: i for i, player_id in enumerate(player_ids)}
+        self.n = len(player_ids)
+        self._met = bytearray(self.n * self.n)
+        self._colours = [""] * self.n
+        self._balance = [0] * self.n
+        self.byes: Set[str] = set()
+
+    @classmethod
+    def from_rounds(cls, player_ids: List[str], rounds) -> "PairingHistory":
+        """Build the history of already created rounds"""
+
+        history = cls(player_ids)
+        for round_ in rounds:
+            history.add_round(round_.matches)
+
+        return history
+
+    def _ensure(self, player_id: str) -> int:
+        """Index of a player, the matrix grows for unknown players"""
+
+        i = self.index.get(player_id)
+        if i is not None:
+            return i
+
+        # players added late (or legacy data) : grow the matrix
+        n = self.n + 1
+        met = bytearray(n * n)
+        for row in range(self.n):
+            met[row * n : row * n + self.n] = self._met[row * self.n : (row + 1) * self.n]
+        self._met = met
+        self._colours.append("")
+        self._balance.append(0)
+        self.index[player_id] = self.n
+        self.n = n
+
+        return n - 1
+
+    def add_round(self, matches: List[list]) -> None:
+        """Record the pairs of a round, first player of a match has white"""
+
+        for match in matches:
+            if len(match) != 2:
+                continue
+            (player_a, _), (player_b, _) = match
+            if player_b is None:
+                self.byes.add(player_a)
+                continue
+            a, b = self._ensure(player_a), self._ensure(player_b)
+            self._met[a * self.n + b] = self._met[b * self.n + a] = 1
+            self._colours[a] += "W"
+            self._colours[b] += "B"
+            self._balance[a] += 1
+            self._balance[b] -= 1
+
+    def has_met(self, player_a: str, player_b: str) -> bool:
+        """True if the two players already played each other"""
+
+        a, b = self.index.get(player_a), self.index.get(player_b)
+        if a is None or b is None:
+            return False
+
+        return bool(self._met[a * self.n + b])
+
+    def colours(self, player_id: str) -> str:
+        """Colours played so far, "WBW" ..."""
+
+        i = self.index.get(player_id)
+
+        return self._colours[i] if i is not None else ""
+
+    def colour_balance(self, player_id: str) -> int:
+        """Number of whites minus number of blacks"""
+
+        i = self.index.get(player_id)
+
+        return self._balance[i] if i is not None else 0
+
+
+def swiss_pairs(standings: List[str], history: PairingHistory) -> List[Pair]:
+    """Pair a Swiss round
+
+    standings - players sorted by score (then seed), best first
+    history - pairs already met, colours and byes of the tournament
+
+    Each player is paired with the best ranked opponent they have not met
+    yet, falling back to a rematch only when nobody else is left. With an
+    odd number of players the lowest ranked player without a bye sits out.
+    White goes to the player who had it least.
+    """
+
+    remaining = list(standings)
+
+    pairs: List[Pair] = []
+    if len(remaining) % 2:
+        bye = next(
+            (i for i in reversed(remaining) if i not in history.byes), remaining[-1]
+        )
+        remaining.remove(bye)
+        pairs_bye = [(bye, None)]
+    else:
+        pairs_bye = []
+
+    while remaining:
+        player = remaining.pop(0)
+        opponent = next(
+            (i for i in remaining if not history.has_met(player, i)), remaining[0]
+        )
+        remaining.remove(opponent)
+        if history.colour_balance(opponent) < history.colour_balance(player):
+            pairs.append((opponent, player))
+        else:
+            pairs.append((player, opponent))
+
+    return pairs + pairs_bye
+
+
+def knockout_first_pairs(player_ids: List[str]) -> List[Pair]:
+    """Pair the first knockout round : seed 1 v n, 2 v n-1 ..."""
+
+    n = len(player_ids)
+
+    return [(player_ids[i], player_ids[n - 1 - i]) for i in range(n // 2)]
+
+
+def knockout_next_pairs(winners: List[str]) -> List[Pair]:
+    """Pair the winners of a knockout round, keeping top seeds apart"""
+
+    return knockout_first_pairs(winners)
+
+
+def is_power_of_two(n: int) -> bool:
+    """True for 1, 2, 4, 8 ..."""
+
+    return n > 0 and n & (n - 1) == 0
+
+
+def default_n_rounds(tournament_format: str, n_players: int) -> int:
+    """Number of rounds needed by a format for n_players"""
+
+    if n_players < 2:
+        return 0
+    if tournament_format == "round_robin":
+        return n_players - 1 if n_players % 2 == 0 else n_players
+    # swiss and knockout : log2 rounds
+    return math.ceil(math.log2(n_players))
+
+
+def pairs_to_matches(pairs: List[Pair], bye_score: float = 0) -> List[list]:
+    """Convert pairs to the match format stored in rounds, scores unplayed
+
+    A bye is stored already scored : bye_score for the player, 0 for None.
+    """
+
+    return [
+        [[a, UNPLAYED], [b, UNPLAYED]] if b is not None else [[a, bye_score], [b, 0]]
+        for a, b in pairs
+    ]
+
+
+def format_result(score_a: float, score_b: float) -> str | None:
+    """Board result as text, None while unplayed"""
+
+    if score_a == UNPLAYED or score_b == UNPLAYED:
+        return None
+    if score_a == score_b == 0.5:
+        return "1/2-1/2"
+
+    return f"{score_a:g}-{score_b:g}"
+
+
+def parse_result(result) -> Tuple[float, float]:
+    """Scores of a board result : "1-0", "0-1", "1/2-1/2" or (1, 0) ...
+
+    Raises ValueError unless both scores are 0, 0.5 or 1 and sum to 1.
+    """
+
+    if isinstance(result, str):
+        if result.strip() not in RESULTS:
+            raise ValueError(f"Résultat inconnu : {result!r}.")
+        return RESULTS[result.strip()]
+
+    try:
+        score_a, score_b = result
+    except (TypeError, ValueError):
+        raise ValueError(f"Résultat inconnu : {result!r}.") from None
+
+    if score_a not in (0, 0.5, 1) or score_b not in (0, 0.5, 1) or score_a + score_b != 1:
+        raise ValueError(f"Scores impossibles : {result!r}.")
+
+    return score_a, score_b
+
+
+def scores_from_rounds(rounds) -> Dict[str, float]:
+    """Sum the played scores of every player over rounds (in memory)"""
+
+    scores: Dict[str, float] = {}
+    for round_ in rounds:
+        for match in round_.matches:
+            for player_id, score in match:
+                if player_id is not None and score > 0:
+                    scores[player_id] = scores.get(player_id, 0) + score
+
+    return scores
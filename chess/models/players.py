@@ -3,13 +3,23 @@ from __future__ import annotations
 import random
 import secrets
 
-from tinydb import Query, TinyDB, where
+from tinydb import Query, where
+
+from chess.models import ids
+from chess.models.concurrency import compare_and_swap, table_lock
+from chess.models.search import NameIndex
+from chess.models.storage import LazyTinyDB, TableIndex
 
 
 class Player:
     """players model class"""
 
-    db = TinyDB("data/players.json")
+    db = LazyTinyDB("players.json")
+
+    DEFAULT_RATING = 1500.0
+
+    # name index for search_name
+    _names = TableIndex("player_id", NameIndex)
 
     def __init__(
         self,
@@ -17,13 +27,18 @@ class Player:
         lastname: str,
         birthdate: str = "1970-01-01",
         player_id: int | None = None,
+        rating: float = DEFAULT_RATING,
+        version: int = 0,
     ) -> None:
         """Init method for players"""
 
-        self.player_id = player_id if player_id else secrets.token_hex(4)
+        self.player_id = player_id if player_id else ids.new_id()
         self.firstname = firstname.capitalize()
         self.lastname = lastname.upper()
         self.birthdate = birthdate
+        self.rating = rating
+        # bumped by every update, see chess.models.concurrency
+        self.version = version
 
     def to_dict(self) -> dict:
         """convert player to dict"""
@@ -40,6 +55,7 @@ class Player:
         """Create method for players"""
 
         self.db.insert(self.to_dict())
+        self._index_players([self.to_dict()])
 
     @classmethod
     def read_one(cls, player_id: str) -> dict | None:
@@ -51,6 +67,17 @@ class Player:
 
         return Player.from_dict(res) if res else None
 
+    @classmethod
+    def read_many(cls, player_ids: list[str]) -> list["Player"]:
+        """Read many players in a single pass, in the order of player_ids"""
+
+        wanted = set(player_ids)
+        found = {
+            doc["player_id"]: doc for doc in cls.db.all() if doc["player_id"] in wanted
+        }
+
+        return [Player.from_dict(found[i]) for i in player_ids if i in found]
+
     @classmethod
     def read_all(cls) -> list[dict]:
         """Read all method for players"""
@@ -59,6 +86,19 @@ class Player:
 
         return [Player.from_dict(player) for player in res]
 
+    @classmethod
+    def created_between(cls, start, end) -> list["Player"]:
+        """Players created in [start, end[ (dates or iso strings), id order
+
+        A range on the ids, old ids carry no date and are never returned.
+        """
+
+        bounds = ids.id_range(start, end)
+        res = cls.db.search(where("player_id").test(lambda i: ids.in_range(i, bounds)))
+        res.sort(key=lambda doc: doc["player_id"])
+
+        return [Player.from_dict(doc) for doc in res]
+
     @classmethod
     def search(cls, player_id: str) -> list[dict]:
         """Search for a player by player_id"""
@@ -76,13 +116,84 @@ class Player:
 
         return [Player.from_dict(player) for player in res]
 
+    @classmethod
+    def name_index(cls) -> NameIndex:
+        """Name index of the players table"""
+
+        return cls._names.get(cls.db)
+
+    @classmethod
+    def _index_players(cls, player_dicts: list[dict]) -> None:
+        cls._names.wrote(cls.db, player_dicts)
+
+    @classmethod
+    def search_name(cls, query: str, limit: int = 10) -> list["Player"]:
+        """Type-ahead search : ranked, case insensitive and typo tolerant
+
+        "dup", "jean dup" or "dupnt" all find Jean DUPONT.
+        """
+
+        return [Player.from_dict(doc) for doc in cls.name_index().search(query, limit)]
+
+    def tournaments(self) -> list:
+        """Tournaments the player is registered in, found with the player index"""
+
+        # imported here, tournaments already import the players model
+        from chess.models.tournaments import Tournament
+
+        return Tournament.read_many(Tournament.tournament_ids_of(self.player_id))
+
     def update(self) -> None:
-        """Update method for players"""
+        """Update method for players
 
-        self.db.update(self.to_dict(), where("player_id") == self.player_id)
+        Raises ConflictError if the player changed since it was read.
+        """
+
+        self.version += 1
+        try:
+            compare_and_swap(
+                self.db, "player_id", self.player_id, self.version - 1, self.to_dict()
+            )
+        except Exception:
+            self.version -= 1
+            raise
+        self._index_players([self.to_dict()])
 
         print(f"Player {self.player_id} updated successfully.")
 
+    @classmethod
+    def read_ratings(cls) -> dict[str, float]:
+        """Return a {player_id: rating} dict read in a single pass"""
+
+        return {
+            doc["player_id"]: doc.get("rating", cls.DEFAULT_RATING)
+            for doc in cls.db.all()
+        }
+
+    @classmethod
+    def update_ratings(cls, ratings: dict[str, float]) -> None:
+        """Write many ratings at once (one read and one write of the table)
+
+        Only the players whose rating changes are written, and get a new
+        version : a Player read before can not be saved over its new rating,
+        the other players are left alone.
+        """
+
+        changed = []
+
+        def _set_rating(doc):
+            rating = ratings.get(doc["player_id"])
+            if rating is not None and doc.get("rating") != rating:
+                doc["rating"] = rating
+                doc["version"] = doc.get("version", 0) + 1
+                changed.append(dict(doc))
+
+        if not ratings:
+            return
+        with table_lock(cls.db):
+            cls.db.update(_set_rating, where("player_id").test(ratings.__contains__))
+        cls._index_players(changed)
+
     def delete(self) -> None:
         """Delete method for players"""
         # not necessary
@@ -94,6 +205,7 @@ class Player:
         """delete all method for players"""
 
         cls.db.truncate()
+        cls._names.reset()
 
     @classmethod
     def bootstrap(cls, num_players: int = 3) -> None:
@@ -119,5 +231,5 @@ class Player:
 
         return (
             f"Player(firstname={self.firstname}, lastname={self.lastname}, birthdate={self.birthdate}, "
-            f"player_id={self.player_id})"
+            f"player_id={self.player_id}, rating={self.rating}, version={self.version})"
         )
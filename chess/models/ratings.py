@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import logging
+from typing import Iterable, List, Tuple
+
+from chess.models import archive
+from chess.models.players import Player
+from chess.models.rounds import Round
+
+# (player_a_id, player_b_id, score of player a)
+Game = Tuple[str, str, float]
+
+
+class Elo:
+    """Elo rating engine
+
+    Games are rated round by round : every game of a round is rated from the
+    ratings the players had *before* the round, so a whole round is computed
+    as one batch (array in, array out) and written back at once.
+
+    Optional args:
+        ratings - dict - {player_id: rating} to start from - default = None (empty)
+        k_factor - float - K factor of the Elo formula - default = 20
+    """
+
+    K_FACTOR = 20.0
+
+    def __init__(
+        self, ratings: dict[str, float] | None = None, k_factor: float = K_FACTOR
+    ) -> None:
+        """Init method for the rating engine"""
+
+        self.ratings = dict(ratings) if ratings else {}
+        self.k_factor = k_factor
+        # players who played a rated game : the only ratings save writes
+        self.rated: set[str] = set()
+
+    @staticmethod
+    def expected_score(rating_a: float, rating_b: float) -> float:
+        """Expected score of a player rated rating_a against rating_b"""
+
+        return 1.0 / (1.0 + 10.0 ** ((rating_b - rating_a) / 400.0))
+
+    @staticmethod
+    def games_from_round(round_: Round) -> List[Game]:
+        """Extract the played games of a round
+
+        A match is [[player_a_id, score_a], [player_b_id, score_b]], negative
+        scores mean the match has not been played yet and is skipped.
+        """
+
+        games = []
+        for match in round_.matches:
+            if len(match) != 2:
+                continue
+            (player_a, score_a), (player_b, score_b) = match
+            if player_a is None or player_b is None or score_a < 0 or score_b < 0:
+                continue
+            games.append((player_a, player_b, float(score_a)))
+
+        return games
+
+    def rate_batch(self, games: Iterable[Game]) -> None:
+        """Rate a batch of games played at the same time (one round)"""
+
+        games = list(games)
+        if not games:
+            return
+
+        # map every player of the batch to an index in flat arrays
+        index: dict[str, int] = {}
+        for player_a, player_b, _ in games:
+            index.setdefault(player_a, len(index))
+            index.setdefault(player_b, len(index))
+
+        player_ids = list(index)
+        before = [self.ratings.get(i, Player.DEFAULT_RATING) for i in player_ids]
+        idx_a = [index[game[0]] for game in games]
+        idx_b = [index[game[1]] for game in games]
+        scores = [game[2] for game in games]
+
+        # vectorised Elo update, computed on the ratings before the batch
+        expected = [
+            1.0 / (1.0 + 10.0 ** ((before[b] - before[a]) / 400.0))
+            for a, b in zip(idx_a, idx_b)
+        ]
+        deltas = [self.k_factor * (s - e) for s, e in zip(scores, expected)]
+
+        gains = [0.0] * len(player_ids)
+        for a, b, delta in zip(idx_a, idx_b, deltas):
+            gains[a] += delta
+            gains[b] -= delta
+
+        for player_id, rating, gain in zip(player_ids, before, gains):
+            self.ratings[player_id] = rating + gain
+        self.rated.update(player_ids)
+
+    def rate_tournament(self, tournament, rounds_by_id: dict[str, Round]) -> None:
+        """Rate every round of a tournament, in round order"""
+
+        rounds = [rounds_by_id[i] for i in tournament.round_id_list if i in rounds_by_id]
+        for round_ in sorted(rounds, key=lambda r: r.round_number):
+            self.rate_batch(self.games_from_round(round_))
+
+    @staticmethod
+    def load_rounds(round_ids: Iterable[str] | None = None) -> dict[str, Round]:
+        """Load rounds in a single pass over the rounds table (and archive)"""
+
+        if round_ids is not None:
+            return {r.round_id: r for r in Round.read_many(list(round_ids))}
+
+        docs = Round.db.all() + archive.all_rounds()
+
+        return {doc["round_id"]: Round.from_dict(doc) for doc in docs}
+
+    @classmethod
+    def recompute(cls, tournaments, k_factor: float = K_FACTOR) -> "Elo":
+        """Recompute all ratings from scratch
+
+        Completed tournaments are replayed in chronological order (end date,
+        then start date), starting every player from the default rating.
+        Pass Tournament.read_all(include_archived=True) to replay everything.
+        """
+
+        completed = [t for t in tournaments if t.status == "Completed"]
+        completed.sort(key=lambda t: (t.end_date, t.start_date, t.tournament_id))
+
+        rounds_by_id = cls.load_rounds()
+
+        engine = cls(k_factor=k_factor)
+        for tournament in completed:
+            engine.rate_tournament(tournament, rounds_by_id)
+
+        logging.info(
+            f"Ratings recomputed for {len(engine.ratings)} players "
+            f"from {len(completed)} tournaments"
+        )
+
+        return engine
+
+    @classmethod
+    def apply_tournament(
+        cls,
+        tournament,
+        k_factor: float = K_FACTOR,
+        ratings: dict[str, float] | None = None,
+    ) -> "Elo":
+        """Incremental update : rate one newly completed tournament and save
+
+        ratings - dict - current ratings, if already read - default = None (read them)
+        """
+
+        if ratings is None:
+            ratings = Player.read_ratings()
+        engine = cls(ratings, k_factor=k_factor)
+        engine.rate_tournament(tournament, cls.load_rounds(tournament.round_id_list))
+        engine.save()
+
+        return engine
+
+    def save(self) -> None:
+        """Write the ratings of the players who played to the players table"""
+
+        Player.update_ratings({i: self.ratings[i] for i in self.rated})
@@ -1,30 +1,202 @@
 from __future__ import annotations
 
 import logging
-import secrets
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from tinydb import Query, TinyDB, where
+from tinydb import Query, where
+
+from chess.helpers import now
+from chess.models import archive, ids
+from chess.models.concurrency import ConflictError, compare_and_swap
+from chess.models.feed import ChangeFeed
+from chess.models.pairings import UNPLAYED
+from chess.models.storage import LazyTinyDB, TableIndex
+
+
+PENDING = "pending"
+ONGOING = "ongoing"
+FINISHED = "finished"
+STATUSES = [PENDING, ONGOING, FINISHED]
+
+
+def tournament_of(round_doc: dict) -> str | None:
+    """Tournament id of a round document, from its id for old rounds"""
+
+    tournament_id = round_doc.get("tournament_id")
+    if tournament_id is None and "_round_" in round_doc["round_id"]:
+        tournament_id = round_doc["round_id"].rsplit("_round_", 1)[0]
+
+    return tournament_id
+
+
+class RoundStates:
+    """Rounds by state : per tournament, and finished rounds per day
+
+    Documents are added / replaced one at a time, so the index follows
+    create and update without being rebuilt.
+
+    Positionnal args:
+        docs - Iterable[dict] - round documents
+    """
+
+    def __init__(self, docs=()) -> None:
+        """Init method for round state indexes"""
+
+        # tournament_id => status => {round_id: round_number}
+        self.by_tournament: Dict[str, Dict[str, Dict[str, int]]] = {}
+        # "YYYY-MM-DD" => {round_id: None}, in finishing order
+        self.finished_by_day: Dict[str, Dict[str, None]] = {}
+        # round_id => (tournament_id, status, day, version) to move a round
+        # when it changes
+        self._entries: Dict[str, tuple] = {}
+
+        for doc in docs:
+            self.add(doc)
+
+    def add(self, doc: dict) -> None:
+        """Index a round document, replacing its previous state"""
+
+        round_id = doc["round_id"]
+        self.remove(round_id)
+
+        tournament_id = tournament_of(doc)
+        status = Round.normalize_status(doc.get("status"))
+        day = (doc.get("finished_at") or "")[:10] if status == FINISHED else ""
+
+        if tournament_id is not None:
+            states = self.by_tournament.setdefault(tournament_id, {})
+            states.setdefault(status, {})[round_id] = doc.get("round_number", 0)
+        if day:
+            self.finished_by_day.setdefault(day, {})[round_id] = None
+        self._entries[round_id] = (tournament_id, status, day, doc.get("version", 0))
+
+    def remove(self, round_id: str) -> None:
+        """Forget a round"""
+
+        entry = self._entries.pop(round_id, None)
+        if entry is None:
+            return
+        tournament_id, status, day, _ = entry
+        if tournament_id is not None:
+            self.by_tournament[tournament_id][status].pop(round_id, None)
+        if day:
+            self.finished_by_day[day].pop(round_id, None)
+
+    def version(self, round_id: str) -> int | None:
+        """Version of a round in the table, None if it is not in the table"""
+
+        entry = self._entries.get(round_id)
+
+        return entry[3] if entry is not None else None
+
+    def round_ids(self, tournament_id: str, status: str) -> List[str]:
+        """Rounds of a tournament in a state, by round number"""
+
+        rounds = self.by_tournament.get(tournament_id, {}).get(status, {})
+
+        return sorted(rounds, key=rounds.__getitem__)
+
+    def current(self, tournament_id: str) -> str | None:
+        """The ongoing round of a tournament, None if none is"""
+
+        round_ids = self.round_ids(tournament_id, ONGOING)
+
+        return round_ids[0] if round_ids else None
+
+    def finished_on(self, day: str) -> List[str]:
+        """Rounds of every tournament finished on day ("YYYY-MM-DD")"""
+
+        return list(self.finished_by_day.get(day, ()))
 
 
 class Round:
-    """Round model class"""
+    """Round model class
+
+    Positionnal args:
+        round_number - int - number of the round in its tournament, from 0
+        matches - List - [[player_id, score], [player_id, score]] per board
+
+    Optional args:
+        round_id - str - id of the round - default = None (new id)
+        status - str - "pending", "ongoing" or "finished" - default = "pending"
+        version - int - bumped by every update (compare-and-swap) - default = 0
+        tournament_id - str - id of the tournament - default = None
+        started_at - str - helpers.now() when it became ongoing - default = None
+        finished_at - str - helpers.now() when its last result was entered - default = None
+    """
 
-    db = TinyDB("./data/rounds.json")
+    db = LazyTinyDB("rounds.json")
+
+    # rounds by state
+    _states = TableIndex("round_id", RoundStates)
 
     def __init__(
         self,
         round_number: int,
         matches: List[str],
         round_id: str | None = None,
-        status: str = "Created",
+        status: str = PENDING,
+        version: int = 0,
+        tournament_id: str | None = None,
+        started_at: str | None = None,
+        finished_at: str | None = None,
     ) -> None:
         """Init method for rounds"""
 
-        self.round_id = round_id if round_id else secrets.token_hex(4)
+        self.round_id = round_id if round_id else ids.new_id()
         self.round_number = round_number
         self.matches = matches
         self.status = status
+        # bumped by every update, see chess.models.concurrency
+        self.version = version
+        self.tournament_id = tournament_id
+        self.started_at = started_at
+        self.finished_at = finished_at
+
+    @staticmethod
+    def normalize_status(status: str | None) -> str:
+        """State of a status : statuses saved before states ("Created" ...) are mapped"""
+
+        status = str(status).lower()
+        if status in (FINISHED, "completed"):
+            return FINISHED
+        if status in (ONGOING, "in progress"):
+            return ONGOING
+
+        return PENDING
+
+    @property
+    def state(self) -> str:
+        """State of the round : pending, ongoing or finished"""
+
+        return self.normalize_status(self.status)
+
+    def start(self) -> None:
+        """pending => ongoing, not saved"""
+
+        if self.state != PENDING:
+            raise ValueError(f"Le round {self.round_id} n'est pas en attente ({self.status}).")
+        self.status = ONGOING
+        self.started_at = now()
+
+    def finish(self) -> None:
+        """ongoing (or pending) => finished, not saved"""
+
+        if self.state == FINISHED:
+            raise ValueError(f"Le round {self.round_id} est déjà terminé.")
+        if self.started_at is None:
+            self.started_at = now()
+        self.status = FINISHED
+        self.finished_at = now()
+
+    def unfinished_boards(self) -> List[int]:
+        """Boards (from 1) still waiting for a result"""
+
+        return [
+            board
+            for board, ((_, score_a), (player_b, _)) in enumerate(self.matches, start=1)
+            if player_b is not None and score_a == UNPLAYED
+        ]
 
     def to_dict(self) -> dict:
         """Convert round to dict"""
@@ -39,6 +211,88 @@ class Round:
     def create(self) -> None:
         """Create method for rounds"""
         self.db.insert(self.to_dict())
+        self._index_rounds([self.to_dict()])
+        ChangeFeed.publish("round", "created", self.round_id, self.to_dict())
+
+    @classmethod
+    def create_many(cls, rounds: List["Round"]) -> None:
+        """Create many rounds with a single write"""
+
+        cls.db.insert_multiple([r.to_dict() for r in rounds])
+        cls._index_rounds([r.to_dict() for r in rounds])
+        for r in rounds:
+            ChangeFeed.publish("round", "created", r.round_id, r.to_dict())
+
+    @classmethod
+    def read_many(cls, round_ids: List[str]) -> List["Round"]:
+        """Read many rounds in a single pass, in the order of round_ids
+
+        Rounds not found in the table are read from the archive.
+        """
+
+        wanted = set(round_ids)
+        found = {
+            doc["round_id"]: doc for doc in cls.db.all() if doc["round_id"] in wanted
+        }
+        if len(found) < len(wanted):
+            found.update(archive.read_rounds(wanted.difference(found)))
+
+        return [cls.from_dict(found[i]) for i in round_ids if i in found]
+
+    @classmethod
+    def created_between(cls, start, end) -> list["Round"]:
+        """Rounds of the tournaments created in [start, end[ (dates or iso strings)
+
+        A range on the ids (a round id starts with its tournament id), old ids
+        carry no date and are never returned.
+        """
+
+        bounds = ids.id_range(start, end)
+        res = cls.db.search(where("round_id").test(lambda i: ids.in_range(i, bounds)))
+        res.sort(key=lambda doc: (doc["round_id"][: ids.LENGTH], doc["round_number"]))
+
+        return [Round.from_dict(doc) for doc in res]
+
+    @classmethod
+    def states(cls) -> RoundStates:
+        """Rounds by state (archive excluded)"""
+
+        return cls._states.get(cls.db)
+
+    @classmethod
+    def check_versions(cls, rounds: List["Round"]) -> None:
+        """Raise ConflictError unless every round still has the version it was read with
+
+        The versions come from the round state index : under the lock of the
+        rounds table (concurrency.table_lock) it follows every write, the
+        table is only read again if it changed.
+        """
+
+        states = cls.states()
+        for r in rounds:
+            version = states.version(r.round_id)
+            if version is None:
+                raise ConflictError(f"{r.round_id} n'existe plus.")
+            if version != r.version:
+                raise ConflictError(
+                    f"{r.round_id} a été modifié par ailleurs (version {version}, "
+                    f"attendue {r.version})."
+                )
+
+    @classmethod
+    def _index_rounds(cls, round_dicts: List[dict]) -> None:
+        cls._states.wrote(cls.db, round_dicts)
+
+    @classmethod
+    def finished_on(cls, day: str | None = None) -> List["Round"]:
+        """Rounds of every tournament finished on day, index lookup
+
+        day - str - "YYYY-MM-DD" - default = None (today)
+        """
+
+        day = day or now()[:10]
+
+        return cls.read_many(cls.states().finished_on(day))
 
     def search(self, round_id: str) -> List[dict]:
         """Search for a round by round_id"""
@@ -72,11 +326,19 @@ class Round:
             return None
 
     def update(self):
-        """Update method for round"""
+        """Update method for round
 
-        self.db.update(
-            self.to_dict(), where("round_id") & (Query().round_id == self.round_id)
-        )
+        Raises ConflictError if the round changed since it was read.
+        """
+
+        self.version += 1
+        try:
+            compare_and_swap(self.db, "round_id", self.round_id, self.version - 1, self.to_dict())
+        except Exception:
+            self.version -= 1
+            raise
+        self._index_rounds([self.to_dict()])
+        ChangeFeed.publish("round", "updated", self.round_id, self.to_dict())
 
         logging.warning(f"Round {self.round_id} updated successfully.")
 
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from functools import lru_cache
+from math import ceil
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+def normalize(text: str) -> str:
+    """Lower case and strip accents : "Élodie" => "elodie" """
+
+    text = str(text)
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize("NFKD", text)
+
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+@lru_cache(maxsize=65536)
+def trigrams(token: str) -> frozenset:
+    """Trigrams of a token, padded so short tokens still have some"""
+
+    padded = f"  {token} "
+
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+@lru_cache(maxsize=65536)
+def _name_tokens(firstname: str, lastname: str) -> Tuple[str, ...]:
+    """Normalized tokens of a name : names repeat, each is normalized once"""
+
+    name = f"{firstname} {lastname}"
+
+    return tuple(dict.fromkeys(normalize(name).replace("-", " ").split()))
+
+
+class NameIndex:
+    """In-memory name index for type-ahead player search
+
+    Every distinct name token (firstname, lastname) is kept with its players,
+    in a sorted list for prefix lookups with bisect and in a trigram table
+    for fuzzy matches (typos). Names repeat : both are much smaller than the
+    players. A query looks at a bounded number of tokens and players,
+    whatever the size of the index. Documents are added / replaced one at a
+    time, so the index is kept up to date without being rebuilt.
+    """
+
+    # how many candidates are ranked at most for one query
+    MAX_CANDIDATES = 100
+    # how many players are looked at most for one query
+    MAX_SCAN = 2000
+    # how many tokens one query token matches at most
+    MAX_TOKENS = 200
+    # share of the trigrams of a query token a fuzzy match must have
+    MIN_OVERLAP = 0.5
+
+    def __init__(self, docs: Iterable[dict] = ()) -> None:
+        """Init method for the name index"""
+
+        # the last document of a player id wins, like with add
+        self.docs: Dict[str, dict] = {doc["player_id"]: doc for doc in docs}
+        self._tokens: Dict[str, Tuple[str, ...]] = {
+            player_id: _name_tokens(doc.get("firstname", ""), doc.get("lastname", ""))
+            for player_id, doc in self.docs.items()
+        }
+        # token => player ids (ordered set), sorted distinct tokens,
+        # trigram => tokens
+        self._players: Dict[str, Dict[str, None]] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+
+        # bulk build : one sort and the trigrams of every distinct token at the end
+        for player_id, tokens in self._tokens.items():
+            for token in tokens:
+                players = self._players.get(token)
+                if players is None:
+                    players = self._players[token] = {}
+                players[player_id] = None
+        self._sorted: List[str] = sorted(self._players)
+        for token in self._sorted:
+            for trigram in trigrams.__wrapped__(token):
+                self._trigrams.setdefault(trigram, set()).add(token)
+
+    @staticmethod
+    def tokens_of(doc: dict) -> Tuple[str, ...]:
+        """Normalized name tokens of a player document"""
+
+        return _name_tokens(doc.get("firstname", ""), doc.get("lastname", ""))
+
+    def _add_tokens(self, doc: dict) -> None:
+        player_id = doc["player_id"]
+        tokens = self.tokens_of(doc)
+
+        self.docs[player_id] = doc
+        self._tokens[player_id] = tokens
+        for token in tokens:
+            players = self._players.get(token)
+            if players is None:
+                players = self._players[token] = {}
+                insort(self._sorted, token)
+                for trigram in trigrams(token):
+                    self._trigrams.setdefault(trigram, set()).add(token)
+            players[player_id] = None
+
+    def remove(self, player_id: str) -> None:
+        """Remove a player from the index"""
+
+        for token in self._tokens.pop(player_id, ()):
+            players = self._players[token]
+            players.pop(player_id, None)
+            if not players:
+                del self._players[token]
+                i = bisect_left(self._sorted, token)
+                if i < len(self._sorted) and self._sorted[i] == token:
+                    del self._sorted[i]
+                for trigram in trigrams(token):
+                    self._trigrams[trigram].discard(token)
+        self.docs.pop(player_id, None)
+
+    def add(self, doc: dict) -> None:
+        """Add or replace a player document"""
+
+        self.remove(doc["player_id"])
+        self._add_tokens(doc)
+
+    def _prefixed(self, query_token: str) -> Dict[str, float]:
+        """Tokens starting with query_token : 3 if equal, 2 otherwise"""
+
+        start = bisect_left(self._sorted, query_token)
+        end = bisect_left(self._sorted, query_token + "\uffff", lo=start)
+
+        return {
+            token: 3.0 if token == query_token else 2.0
+            for token in self._sorted[start : min(end, start + self.MAX_TOKENS)]
+        }
+
+    def _similar(self, query_token: str) -> Dict[str, float]:
+        """Tokens sharing at least MIN_OVERLAP of the trigrams of query_token
+
+        With their Jaccard index, the most similar MAX_TOKENS. A token with
+        enough shared trigrams has one of the rarest trigrams of the query :
+        only the tokens of those are looked at, about MAX_SCAN at most.
+        """
+
+        query_grams = trigrams(query_token)
+        minimum = max(1, ceil(self.MIN_OVERLAP * len(query_grams)))
+        postings = sorted((self._trigrams.get(g, ()) for g in query_grams), key=len)
+
+        # candidates counted on the rarest trigrams, the others are lookups
+        overlap: Counter = Counter()
+        n_counted = 0
+        while n_counted < len(query_grams) - minimum + 1 and (
+            not n_counted or len(overlap) + len(postings[n_counted]) <= self.MAX_SCAN
+        ):
+            overlap.update(postings[n_counted])
+            n_counted += 1
+        others = postings[n_counted:]
+
+        similarity = {}
+        for token, n in overlap.items():
+            n += sum(token in posting for posting in others)
+            if n >= minimum:
+                similarity[token] = n / (len(query_grams) + len(trigrams(token)) - n)
+
+        return dict(
+            sorted(similarity.items(), key=lambda item: (-item[1], item[0]))[: self.MAX_TOKENS]
+        )
+
+    def _candidates(self, matches: List[Dict[str, float]]) -> List[str]:
+        """Players with a token of each of matches, best tokens first
+
+        The players of the smallest matches are looked at, MAX_SCAN at most.
+        """
+
+        sizes = [sum(len(self._players[t]) for t in tokens) for tokens in matches]
+        order = sorted(range(len(matches)), key=sizes.__getitem__)
+        scanned = matches[order[0]]
+        # the players of a single token are filtered in C, the others checked
+        exact = [self._players[next(iter(matches[i]))] for i in order[1:]
+                 if len(matches[i]) == 1]  # fmt: skip
+        filters = [matches[i].keys() for i in order[1:] if len(matches[i]) > 1]
+
+        found: Dict[str, None] = {}
+        n_scanned = 0
+        for token in sorted(scanned, key=lambda t: (-scanned[t], t)):
+            players = iter(self._players[token])
+            for other in exact:
+                players = filter(other.__contains__, players)
+            for player_id in players:
+                tokens = self._tokens[player_id]
+                for keys in filters:
+                    if keys.isdisjoint(tokens):
+                        break
+                else:
+                    found[player_id] = None
+                    if len(found) >= self.MAX_CANDIDATES:
+                        return list(found)
+                n_scanned += 1
+                if n_scanned >= self.MAX_SCAN:
+                    return list(found)
+
+        return list(found)
+
+    def search(self, query: str, limit: int = 10) -> List[dict]:
+        """Best matching player documents for a (partial, misspelt) name"""
+
+        query_tokens = list(dict.fromkeys(normalize(query).replace("-", " ").split()))
+        if not query_tokens:
+            return []
+
+        # every query token has to match one of the player tokens by prefix
+        matches = [self._prefixed(q) for q in query_tokens]
+        fuzzy = not all(matches)
+        if fuzzy:
+            # nothing starts like that : typo tolerant match, a query token
+            # like no name at all does not select anything
+            matches = [m or (self._similar(q) if len(q) >= 3 else {})
+                       for q, m in zip(query_tokens, matches)]  # fmt: skip
+            selecting = [m for m in matches if m]
+            if not selecting:
+                return []
+            candidates = self._candidates(selecting)
+            if not candidates:
+                smallest = min(selecting, key=lambda m: sum(len(self._players[t]) for t in m))
+                candidates = self._candidates([smallest])
+        else:
+            candidates = self._candidates(matches)
+
+        # exact tokens > prefixes > shared trigrams
+        scores = {
+            i: sum(max(m.get(t, 0.0) for t in self._tokens[i]) for m in matches)
+            for i in candidates
+        }
+        if fuzzy:
+            # keep only candidates that look like the query
+            minimum = 0.3 * len(query_tokens)
+            candidates = [i for i in candidates if scores[i] >= minimum]
+
+        ranked = sorted(candidates, key=lambda i: (-scores[i], self._tokens[i]))
+
+        return [self.docs[i] for i in ranked[:limit]]
+
+    def __len__(self) -> int:
+        return len(self.docs)
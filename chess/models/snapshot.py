@@ -0,0 +1,292 @@
+"""Read-only binary snapshot of rounds, read through mmap
+
+Layout (little endian) :
+
+    header      magic (with format version), counts, widths and section offsets
+    players     n_players fixed-width player ids (utf-8, zero padded)
+    index       n_rounds entries sorted by round_id :
+                round_id (key_width bytes), round_number, status, n_matches,
+                first match
+    matches     n_matches fixed records : player a, player b, score a, score b
+                (player indexes in the players section, NO_PLAYER for a bye)
+
+Opening a snapshot only maps the file : a round lookup is a binary search on
+the index and reads just the pages holding that round.
+
+Usage :
+    python -m chess.models.snapshot rounds.snap
+"""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from typing import Iterable, Iterator, List
+
+from chess.models import archive
+from chess.models.rounds import Round
+
+MAGIC = b"CHSNAP\x00\x01"
+HEADER = struct.Struct("<8sIIIHHQQQ")
+INDEX_TAIL = struct.Struct("<i16sIQ")
+MATCH = struct.Struct("<IIff")
+NO_PLAYER = 0xFFFFFFFF
+
+
+def _pad(value: str, width: int) -> bytes:
+    return value.encode("utf-8").ljust(width, b"\x00")
+
+
+def _unpad(value: bytes) -> str:
+    return bytes(value).rstrip(b"\x00").decode("utf-8")
+
+
+def _is_side(side, bye: bool = False) -> bool:
+    """[player id, score] : None as player id only for the bye side"""
+
+    if not isinstance(side, (list, tuple)) or len(side) != 2:
+        return False
+    player_id, score = side
+
+    return (
+        (isinstance(player_id, str) or (bye and player_id is None))
+        and isinstance(score, (int, float))
+        and not isinstance(score, bool)
+    )
+
+
+def _pairs(round_: Round) -> Iterator[list]:
+    """Matches of a round that are a pair of players (old data may hold others)"""
+
+    return (
+        match
+        for match in round_.matches
+        if isinstance(match, (list, tuple))
+        and len(match) == 2
+        and _is_side(match[0])
+        and _is_side(match[1], bye=True)
+    )
+
+
+def export_rounds(path: str, rounds: Iterable[Round]) -> int:
+    """Write rounds to a snapshot file, return the number of rounds written
+
+    Matches that are not a pair of players (old data) are skipped.
+
+    The snapshot is written to a temporary file of the same folder that
+    replaces path once complete : a crash never leaves a truncated snapshot.
+    Index entries and match records are streamed to it, round by round.
+    """
+
+    rounds = sorted(rounds, key=lambda r: r.round_id)
+
+    player_index: dict[str | None, int] = {}
+    counts = []
+    for round_ in rounds:
+        n_pairs = 0
+        for match in _pairs(round_):
+            n_pairs += 1
+            for player_id, _ in match:
+                if player_id is not None:
+                    player_index.setdefault(player_id, len(player_index))
+        counts.append(n_pairs)
+    n_matches = sum(counts)
+    skipped = sum(len(r.matches) for r in rounds) - n_matches
+
+    key_width = max((len(r.round_id.encode("utf-8")) for r in rounds), default=1)
+    player_width = max((len(i.encode("utf-8")) for i in player_index), default=1)
+
+    index_entry_size = key_width + INDEX_TAIL.size
+    players_offset = HEADER.size
+    index_offset = players_offset + player_width * len(player_index)
+    matches_offset = index_offset + index_entry_size * len(rounds)
+
+    folder = os.path.dirname(os.path.abspath(path))
+    handle = tempfile.NamedTemporaryFile(
+        "wb", dir=folder, prefix=".write_", suffix=".snap", delete=False
+    )
+    try:
+        with handle:
+            handle.write(
+                HEADER.pack(
+                    MAGIC,
+                    len(rounds),
+                    len(player_index),
+                    n_matches,
+                    key_width,
+                    player_width,
+                    players_offset,
+                    index_offset,
+                    matches_offset,
+                )
+            )
+            for player_id in player_index:
+                handle.write(_pad(player_id, player_width))
+
+            first = 0
+            for round_, n_pairs in zip(rounds, counts):
+                handle.write(_pad(round_.round_id, key_width))
+                handle.write(
+                    INDEX_TAIL.pack(
+                        round_.round_number, _pad(round_.status, 16)[:16], n_pairs, first
+                    )
+                )
+                first += n_pairs
+
+            for round_ in rounds:
+                handle.write(
+                    b"".join(
+                        MATCH.pack(
+                            player_index[player_a],
+                            NO_PLAYER if player_b is None else player_index[player_b],
+                            score_a,
+                            score_b,
+                        )
+                        for (player_a, score_a), (player_b, score_b) in _pairs(round_)
+                    )
+                )
+
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.chmod(handle.name, 0o644)
+        os.replace(handle.name, path)
+    finally:
+        if os.path.exists(handle.name):
+            os.unlink(handle.name)
+
+    if skipped:
+        logging.warning(f"{skipped} matches that are not pairs were not exported.")
+
+    return len(rounds)
+
+
+def export_history(path: str) -> int:
+    """Snapshot every round, from the rounds table and the archive"""
+
+    docs = Round.db.all() + archive.all_rounds()
+
+    return export_rounds(path, (Round.from_dict(doc) for doc in docs))
+
+
+class Snapshot:
+    """Read-only, memory mapped snapshot of rounds
+
+    Positionnal args:
+        path - str - snapshot file written by export_rounds
+    """
+
+    def __init__(self, path: str) -> None:
+        """Init method for snapshots : map the file, nothing else is read"""
+
+        self.path = path
+        with open(path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        (
+            magic,
+            self.n_rounds,
+            self.n_players,
+            self.n_matches,
+            self._key_width,
+            self._player_width,
+            self._players_offset,
+            self._index_offset,
+            self._matches_offset,
+        ) = HEADER.unpack_from(self._mmap, 0)
+
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a rounds snapshot.")
+
+        self._entry_size = self._key_width + INDEX_TAIL.size
+
+    def close(self) -> None:
+        """Unmap the file"""
+
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.n_rounds
+
+    def _key(self, position: int) -> bytes:
+        start = self._index_offset + position * self._entry_size
+        return self._mmap[start : start + self._key_width]
+
+    def _find(self, round_id: str) -> int:
+        """Position of round_id in the index, -1 if missing (binary search)"""
+
+        key = _pad(round_id, self._key_width)
+        if len(key) != self._key_width:
+            return -1
+
+        low, high = 0, self.n_rounds
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low if low < self.n_rounds and self._key(low) == key else -1
+
+    def player_id(self, index: int) -> str | None:
+        """Player id stored at index in the players section"""
+
+        if index == NO_PLAYER:
+            return None
+        start = self._players_offset + index * self._player_width
+
+        return _unpad(self._view[start : start + self._player_width])
+
+    def _round_at(self, position: int) -> Round:
+        start = self._index_offset + position * self._entry_size
+        round_id = _unpad(self._view[start : start + self._key_width])
+        round_number, status, n_matches, first = INDEX_TAIL.unpack_from(
+            self._mmap, start + self._key_width
+        )
+
+        matches_start = self._matches_offset + first * MATCH.size
+        records = self._view[matches_start : matches_start + n_matches * MATCH.size]
+        matches = [
+            [[self.player_id(a), score_a], [self.player_id(b), score_b]]
+            for a, b, score_a, score_b in MATCH.iter_unpack(records)
+        ]
+
+        return Round(round_number, matches, round_id=round_id, status=_unpad(status))
+
+    def get(self, round_id: str) -> Round | None:
+        """Round by id, None if it is not in the snapshot"""
+
+        position = self._find(round_id)
+
+        return self._round_at(position) if position >= 0 else None
+
+    def read_many(self, round_ids: List[str]) -> List[Round]:
+        """Rounds by ids, in the order of round_ids, missing ones skipped"""
+
+        rounds = [self.get(i) for i in round_ids]
+
+        return [r for r in rounds if r is not None]
+
+    def __iter__(self) -> Iterator[Round]:
+        """Every round, sorted by round_id"""
+
+        for position in range(self.n_rounds):
+            yield self._round_at(position)
+
+
+if __name__ == "__main__":
+    n_rounds = export_history(sys.argv[1] if len(sys.argv) > 1 else "rounds.snap")
+    print(f"{n_rounds} rounds exported.")
@@ -0,0 +1,277 @@
+"""Materialised career statistics of the players
+
+One document per player, updated when a tournament completes, so a player
+profile is a single keyed read instead of a scan of every tournament and
+every round.
+
+Usage (full rebuild from the tournaments, archive included) :
+    python -m chess.models.stats [--data-dir DIR]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from typing import Dict, Iterable, List
+
+from tinydb import where
+
+from chess.models import storage
+from chess.models.concurrency import table_lock
+from chess.models.players import Player
+from chess.models.ratings import Elo
+from chess.models.rounds import Round
+from chess.models.storage import LazyTinyDB
+
+
+def tournament_lines(rounds: Iterable[Round], ratings: Dict[str, float]) -> Dict[str, dict]:
+    """Counters of every player over the rounds of a tournament, in one pass
+
+    ratings - dict - {player_id: rating} of the opponents before the tournament
+    """
+
+    lines: Dict[str, dict] = {}
+
+    def line(player_id: str) -> dict:
+        if player_id not in lines:
+            lines[player_id] = dict.fromkeys(
+                ["games", "wins", "draws", "losses", "byes", "points", "opponents_rating"], 0
+            )
+        return lines[player_id]
+
+    for round_ in rounds:
+        for match in round_.matches:
+            if len(match) != 2:
+                continue
+            for (player_id, score), (opponent_id, opponent_score) in (match, match[::-1]):
+                if player_id is None or score < 0:
+                    continue
+                counters = line(player_id)
+                counters["points"] += score
+                if opponent_id is None:
+                    counters["byes"] += 1
+                    continue
+                if opponent_score < 0:
+                    continue
+                counters["games"] += 1
+                counters["opponents_rating"] += ratings.get(opponent_id, Player.DEFAULT_RATING)
+                if score > opponent_score:
+                    counters["wins"] += 1
+                elif score < opponent_score:
+                    counters["losses"] += 1
+                else:
+                    counters["draws"] += 1
+
+    return lines
+
+
+class PlayerStats:
+    """Career statistics of a player
+
+    Positionnal args:
+        player_id - str - id of the player
+
+    Optional args:
+        tournaments, games, wins, draws, losses, byes - int - counters - default = 0
+        points - float - points scored, byes included - default = 0
+        opponents_rating - float - sum of the ratings of the opponents when
+            the games were played - default = 0
+        tournament_ids - List[str] - completed tournaments counted - default = None
+    """
+
+    db = LazyTinyDB("player_stats.json")
+
+    def __init__(
+        self,
+        player_id: str,
+        tournaments: int = 0,
+        games: int = 0,
+        wins: int = 0,
+        draws: int = 0,
+        losses: int = 0,
+        byes: int = 0,
+        points: float = 0,
+        opponents_rating: float = 0,
+        tournament_ids: List[str] | None = None,
+    ) -> None:
+        """Init method for player statistics"""
+
+        self.player_id = player_id
+        self.tournaments = tournaments
+        self.games = games
+        self.wins = wins
+        self.draws = draws
+        self.losses = losses
+        self.byes = byes
+        self.points = points
+        self.opponents_rating = opponents_rating
+        self.tournament_ids = tournament_ids if tournament_ids else []
+
+    def to_dict(self) -> dict:
+        """convert statistics to dict"""
+
+        return self.__dict__
+
+    @classmethod
+    def from_dict(cls, stats_dict: dict) -> "PlayerStats":
+        """convert dict to statistics"""
+
+        return PlayerStats(**stats_dict)
+
+    @property
+    def average_opponent(self) -> float | None:
+        """Average rating of the opponents, None without games"""
+
+        return self.opponents_rating / self.games if self.games else None
+
+    @property
+    def performance(self) -> float | None:
+        """Performance rating (linear) : average opponent + 400 * (W - L) / games"""
+
+        if not self.games:
+            return None
+
+        return self.average_opponent + 400.0 * (self.wins - self.losses) / self.games
+
+    @classmethod
+    def read_one(cls, player_id: str) -> "PlayerStats":
+        """Statistics of a player, empty ones if the player never completed a tournament"""
+
+        result = cls.db.search(where("player_id") == player_id)
+
+        return PlayerStats.from_dict(result[0]) if result else PlayerStats(player_id)
+
+    @classmethod
+    def read_many(cls, player_ids: list[str]) -> list["PlayerStats"]:
+        """Statistics of many players in a single pass, in the order of player_ids"""
+
+        wanted = set(player_ids)
+        found = {doc["player_id"]: doc for doc in cls.db.all() if doc["player_id"] in wanted}
+
+        return [
+            PlayerStats.from_dict(found[i]) if i in found else PlayerStats(i)
+            for i in player_ids
+        ]
+
+    def add_tournament(self, tournament_id: str, line: dict | None = None) -> None:
+        """Add the line of this player in a tournament (see tournament_lines)"""
+
+        self.tournaments += 1
+        self.tournament_ids.append(tournament_id)
+        for key, value in (line or {}).items():
+            setattr(self, key, getattr(self, key) + value)
+
+    @classmethod
+    def apply_tournament(
+        cls, tournament, ratings: Dict[str, float] | None = None
+    ) -> list["PlayerStats"]:
+        """Incremental update : add a newly completed tournament to its players
+
+        ratings - dict - ratings before the tournament - default = None (read them)
+
+        One read and one write of the statistics table, a tournament already
+        counted for a player is not counted twice.
+        """
+
+        if ratings is None:
+            ratings = Player.read_ratings()
+
+        stats = [
+            s
+            for s in cls.read_many(tournament.player_id_list)
+            if tournament.tournament_id not in s.tournament_ids
+        ]
+        lines = tournament_lines(tournament.rounds, ratings)
+        for s in stats:
+            s.add_tournament(tournament.tournament_id, lines.get(s.player_id))
+
+        cls._save(stats)
+
+        return stats
+
+    @classmethod
+    def _save(cls, stats: list["PlayerStats"]) -> None:
+        """Write many statistics at once : existing ones updated, new ones inserted"""
+
+        by_id = {s.player_id: s.to_dict() for s in stats}
+        existing = set()
+
+        def _replace(doc):
+            if doc["player_id"] in by_id:
+                existing.add(doc["player_id"])
+                doc.update(by_id[doc["player_id"]])
+
+        # one lock : no other process inserts the same statistics in between
+        with table_lock(cls.db):
+            cls.db.update(_replace)
+            cls.db.insert_multiple(d for i, d in by_id.items() if i not in existing)
+
+    @classmethod
+    def rebuild(cls, tournaments) -> int:
+        """Rebuild the whole table from scratch, return the number of players
+
+        Completed tournaments are replayed in chronological order, like
+        Elo.recompute, so the opponents ratings are the ratings replayed up
+        to each tournament. Pass Tournament.read_all(include_archived=True).
+        """
+
+        completed = [t for t in tournaments if t.status == "Completed"]
+        completed.sort(key=lambda t: (t.end_date, t.start_date, t.tournament_id))
+
+        rounds_by_id = Elo.load_rounds()
+
+        engine = Elo()
+        stats: Dict[str, PlayerStats] = {}
+        for tournament in completed:
+            rounds = [rounds_by_id[i] for i in tournament.round_id_list if i in rounds_by_id]
+            lines = tournament_lines(rounds, engine.ratings)
+            for player_id in dict.fromkeys(tournament.player_id_list):
+                stats.setdefault(player_id, PlayerStats(player_id)).add_tournament(
+                    tournament.tournament_id, lines.get(player_id)
+                )
+            engine.rate_tournament(tournament, rounds_by_id)
+
+        with table_lock(cls.db):
+            cls.db.truncate()
+            cls.db.insert_multiple(s.to_dict() for s in stats.values())
+
+        logging.info(
+            f"Statistics rebuilt for {len(stats)} players from {len(completed)} tournaments"
+        )
+
+        return len(stats)
+
+    @classmethod
+    def delete_all(cls) -> None:
+        """delete all method for statistics"""
+
+        cls.db.truncate()
+
+    def __repr__(self) -> str:
+        """Statistics representation"""
+
+        return (
+            f"PlayerStats(player_id={self.player_id}, tournaments={self.tournaments}, "
+            f"games={self.games}, points={self.points}, performance={self.performance})"
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point : full rebuild"""
+
+    from chess.models.tournaments import Tournament
+
+    parser = argparse.ArgumentParser(description="Rebuild the player statistics table")
+    parser.add_argument("--data-dir", default=None, help="folder of the json tables")
+    args = parser.parse_args(argv)
+
+    if args.data_dir:
+        storage.set_data_dir(args.data_dir)
+
+    n_players = PlayerStats.rebuild(Tournament.read_all(include_archived=True))
+
+    print(f"Statistics rebuilt for {n_players} players.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,616 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import marshal
+import os
+import struct
+import tempfile
+import threading
+
+from tinydb import TinyDB
+from tinydb.storages import JSONStorage
+from tinydb.table import Table
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - windows : no lock between processes
+    fcntl = None
+
+# folder of the json tables, can be changed with set_data_dir
+DATA_DIR = os.environ.get("CHESS_DATA_DIR", "data")
+
+# parsed table cache written next to every json file : header, then the
+# marshalled content of the table
+CACHE_SUFFIX = ".cache"
+CACHE_MAGIC = b"CHTC"
+CACHE_HEADER = struct.Struct("<4sBQQ16s")  # magic, marshal version, size, mtime, hash
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class CachedJSONStorage(JSONStorage):
+    """TinyDB json storage that parses an unchanged file only once
+
+    TinyDB reads the whole table on every query. This storage keeps the
+    marshalled content of the file and answers from it while the file size
+    and mtime do not change, in the process. Other processes share it through
+    a cache file next to the json file, used when its size, mtime and content
+    hash still match : a new process reads the file but does not parse it.
+
+    Every read returns a fresh copy, callers may modify what they get.
+
+    Threads take turns on the file handle, and processes too : a read holds a
+    shared flock on the file, a write an exclusive one, so no reader sees a
+    file half written. locked() holds the exclusive lock across several reads
+    and writes, every table write runs in one (see FollowingTable). Two writes
+    in the same mtime tick can leave size and mtime unchanged : under the
+    lock, the content hash of the file is checked too, and the file is only
+    parsed again if it differs. The write path never writes the cache file.
+
+    changes counts the times the in-process content changed : a table
+    compares it to notice writes it did not make.
+
+    A file replaced by another one (compaction, TableWriter : under the
+    same exclusive lock, see replacing) is reopened before the next read or
+    write, the old one is never written again.
+    """
+
+    def __init__(self, path: str, **kwargs) -> None:
+        """Init method for cached storages"""
+
+        super().__init__(path, **kwargs)
+        self.path = path
+        self._encoding = kwargs.get("encoding")
+        self.cache_path = path + CACHE_SUFFIX
+        # ((size, mtime_ns), content hash, marshalled content)
+        self._memo: tuple | None = None
+        self._lock = threading.RLock()
+        self._locked = 0  # depth of locked() blocks of the thread holding _lock
+        self.changes = 0
+
+    @contextlib.contextmanager
+    def _flock(self, operation):
+        """Thread lock, then flock operation unless a locked() block holds it"""
+
+        with self._lock:
+            if self._locked:
+                yield
+                return
+            if fcntl is None:
+                self._reopen_if_replaced()
+                yield
+                return
+            # the file may be replaced while waiting for the lock of the old one
+            fcntl.flock(self._handle.fileno(), operation)
+            while self._reopen_if_replaced():
+                fcntl.flock(self._handle.fileno(), operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+
+    def _reopen_if_replaced(self) -> bool:
+        """Reopen the json file if path is now another file, True if reopened"""
+
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        opened = os.fstat(self._handle.fileno())
+        if (current.st_ino, current.st_dev) == (opened.st_ino, opened.st_dev):
+            return False
+
+        logging.debug(f"{self.path} was replaced, reopened")
+        # closing releases the lock held on the old file
+        self._handle.close()
+        self._handle = open(self.path, mode=self._mode, encoding=self._encoding)
+
+        return True
+
+    @contextlib.contextmanager
+    def locked(self):
+        """Exclusive access to the file for this thread, re-entrant
+
+        Entering the outermost block checks the in-process cache against the
+        content hash of the file : under the lock the file is the only truth.
+        """
+
+        with self._flock(fcntl and fcntl.LOCK_EX):
+            if not self._locked:
+                self._load(verify=True, save_cache=False)
+            self._locked += 1
+            try:
+                yield
+            finally:
+                self._locked -= 1
+
+    def _stat_key(self) -> tuple:
+        # the path, not the handle : a replaced file changes the key too
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            stat = os.fstat(self._handle.fileno())
+
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+    def read(self) -> dict | None:
+        """Content of the table, parsed only if the file changed"""
+
+        with self._flock(fcntl and fcntl.LOCK_SH):
+            return self._read()
+
+    def _read(self) -> dict | None:
+        blob = self._load()
+
+        return None if blob is None else marshal.loads(blob)
+
+    def _load(self, verify: bool = False, save_cache: bool = True) -> bytes | None:
+        """Marshalled content of the file, parsed only if it changed
+
+        Optional args:
+            verify - bool - hash the file even if size and mtime match - default = False
+            save_cache - bool - write the cache file after a parse - default = True
+        """
+
+        key = self._stat_key()
+        if not key[0]:
+            if self._memo is not None:
+                self._memo = None
+                self.changes += 1
+            return None
+        if not verify and self._memo is not None and self._memo[0] == key:
+            return self._memo[2]
+
+        self._handle.seek(0)
+        text = self._handle.read()
+        digest = _digest(text)
+        if self._memo is not None and self._memo[1] == digest:
+            self._memo = (key, digest, self._memo[2])
+            return self._memo[2]
+
+        blob = self._load_cache(key, digest)
+        if blob is None:
+            blob = marshal.dumps(json.loads(text))
+            if save_cache:
+                self._save_cache(key, digest, blob)
+        self._memo = (key, digest, blob)
+        self.changes += 1
+
+        return blob
+
+    def write(self, data: dict) -> None:
+        """Write the json file, the in-process cache follows"""
+
+        serialized = json.dumps(data, **self.kwargs)
+        with self._flock(fcntl and fcntl.LOCK_EX):
+            self._handle.seek(0)
+            self._handle.write(serialized)
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+            self._handle.truncate()
+            self._memo = (self._stat_key(), _digest(serialized), marshal.dumps(data))
+            self.changes += 1
+
+    def _load_cache(self, key: tuple, digest: bytes) -> bytes | None:
+        """Marshalled content from the cache file, None if missing or stale"""
+
+        try:
+            with open(self.cache_path, "rb") as handle:
+                header = handle.read(CACHE_HEADER.size)
+                if len(header) != CACHE_HEADER.size:
+                    return None
+                magic, version, size, mtime_ns, cached_digest = CACHE_HEADER.unpack(header)
+                if (magic, version, (size, mtime_ns), cached_digest) != (
+                    CACHE_MAGIC,
+                    marshal.version,
+                    key[:2],
+                    digest,
+                ):
+                    return None
+                return handle.read()
+        except OSError:
+            return None
+
+    def _save_cache(self, key: tuple, digest: bytes, blob: bytes) -> None:
+        """Write the cache file (temporary file and rename), best effort"""
+
+        folder = os.path.dirname(os.path.abspath(self.cache_path))
+        handle = None
+        try:
+            handle = tempfile.NamedTemporaryFile(dir=folder, suffix=CACHE_SUFFIX, delete=False)
+            with handle:
+                handle.write(CACHE_HEADER.pack(CACHE_MAGIC, marshal.version, *key[:2], digest))
+                handle.write(blob)
+            os.replace(handle.name, self.cache_path)
+        except OSError as e:
+            if handle is not None and os.path.exists(handle.name):
+                os.unlink(handle.name)
+            logging.debug(f"Cache of {self.path} not written: {e}")
+
+
+def remove_cache(path: str) -> None:
+    """Remove the cache file of a json table replaced by another file, if any"""
+
+    try:
+        os.unlink(path + CACHE_SUFFIX)
+    except FileNotFoundError:
+        pass
+
+
+class FollowingTable(Table):
+    """TinyDB table that notices writes made by other processes
+
+    TinyDB keeps search results and the next document id until the table
+    writes itself : after another process wrote the file they are stale.
+    Both are dropped when the size or mtime of the file changed, or the
+    storage content changed under the lock.
+
+    Every write (insert, update, remove, truncate ...) holds the exclusive
+    lock of the storage from the read of the table to the write, the next
+    document id included : a write never overwrites one made meanwhile by
+    another process. The key of the table just before and just after the
+    last write are kept, see key_after_write.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Init method for following tables"""
+
+        super().__init__(*args, **kwargs)
+        self._file_key: tuple | None = None
+        self.key_before_write: tuple | None = None
+        self.last_write_key: tuple | None = None
+
+    def _key(self) -> tuple:
+        # the storage itself : a table of another folder never has the same key
+        return self._storage, self._storage._stat_key(), self._storage.changes
+
+    def _follow(self) -> None:
+        key = self._key()
+        if key != self._file_key:
+            self._file_key = key
+            self.clear_cache()
+            self._next_id = None
+
+    @contextlib.contextmanager
+    def _writing(self):
+        """Exclusive lock of the storage, if it has one, around a write"""
+
+        locked = getattr(self._storage, "locked", None)
+        with locked() if locked is not None else contextlib.nullcontext():
+            self._follow()
+            self.key_before_write = self._file_key
+            yield
+            self._file_key = self.last_write_key = self._key()
+
+    def search(self, cond) -> list:
+        """Documents matching cond, never from a stale cache"""
+
+        self._follow()
+
+        return super().search(cond)
+
+    def insert(self, document) -> int:
+        """Insert a document, its id chosen under the lock"""
+
+        with self._writing():
+            return super().insert(document)
+
+    def insert_multiple(self, documents) -> list:
+        """Insert many documents, their ids chosen under the lock"""
+
+        with self._writing():
+            return super().insert_multiple(documents)
+
+    def _update_table(self, updater) -> None:
+        with self._writing():
+            super()._update_table(updater)
+
+
+class FollowingTinyDB(TinyDB):
+    """TinyDB with FollowingTable tables"""
+
+    table_class = FollowingTable
+
+
+def table_key(db: TinyDB) -> tuple:
+    """Key of the content of a table, changed by any write of any process
+
+    A cache built from a table keeps the key it was built at, and is stale
+    once the key differs : size and mtime of the file for the writes of
+    other processes, and the content changes seen under the lock for two
+    writes in the same mtime tick.
+    """
+
+    return db.table(db.default_table_name)._key()
+
+
+def read_all(db: TinyDB) -> tuple:
+    """(table_key, documents) of a table, read together under the lock
+
+    Plain dicts read from the storage, not TinyDB documents : wrapping each
+    of them costs more than the read of a large table.
+    """
+
+    locked = getattr(db.storage, "locked", contextlib.nullcontext)
+    with locked():
+        tables = db.storage.read() or {}
+        return table_key(db), list(tables.get(db.default_table_name, {}).values())
+
+
+def key_after_write(db: TinyDB, key: tuple | None) -> tuple | None:
+    """Key of a table after the last write of this process, if key was current
+
+    A cache built at key, then updated with what this process just wrote,
+    stays current : it takes the returned key. None when another process
+    wrote the table in between, the cache must be rebuilt.
+    """
+
+    table = db.table(db.default_table_name)
+    if key is not None and key == table.key_before_write:
+        return table.last_write_key
+
+    return None
+
+
+class TableIndex:
+    """Side index of a table : built on first use, then patched, never rebuilt
+
+    The writes of this process are applied as they are made (wrote), the
+    ones of other processes when the key of the table changed : the table is
+    compared with the one indexed, slice by slice (documents keep their
+    place), then by id, and only the changed documents are applied. The
+    index is built again only for another table (data folder).
+
+    Positionnal args:
+        id_field - str - field identifying a document
+        factory - Callable[[list], index] - index of documents, the index has
+            add(doc) and remove(doc_id) methods
+    """
+
+    # documents compared at once
+    SLICE = 1024
+
+    def __init__(self, id_field: str, factory) -> None:
+        """Init method for table indexes"""
+
+        self.id_field = id_field
+        self.factory = factory
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the index, built again on next use"""
+
+        self._index = None
+        self._key: tuple | None = None
+        self._storage = None
+        # documents of the table when it was last read, and the documents
+        # this process wrote since (None when removed) by id
+        self._docs: list = []
+        self._wrote: dict = {}
+
+    def get(self, db: TinyDB):
+        """The index, current with the table"""
+
+        if self._index is not None and self._key == table_key(db):
+            return self._index
+
+        key, docs = read_all(db)
+        if self._index is None or db.storage is not self._storage:
+            self._index = self.factory(docs)
+            self._storage = db.storage
+            self._docs = docs
+            self._wrote = {}
+        else:
+            self._apply(docs)
+        self._key = key
+
+        return self._index
+
+    def _apply(self, docs: list) -> None:
+        """Apply the documents that differ from the ones of the last read"""
+
+        before: dict = {}
+        after: list = []
+        kept = []
+        for start in range(0, max(len(docs), len(self._docs)), self.SLICE):
+            old = self._docs[start : start + self.SLICE]
+            new = docs[start : start + self.SLICE]
+            if old == new:
+                # the documents already indexed, the new copies are dropped
+                kept += old
+                continue
+            before.update((doc[self.id_field], doc) for doc in old)
+            after += new
+            kept += new
+        self._docs = kept
+
+        # what the index holds : the table of the last read, then the writes
+        # of this process (they changed the table, so their slices differ)
+        for doc_id, doc in self._wrote.items():
+            if doc is None:
+                before.pop(doc_id, None)
+            else:
+                before[doc_id] = doc
+        self._wrote = {}
+
+        for doc in after:
+            if before.pop(doc[self.id_field], None) != doc:
+                self._index.add(doc)
+        for doc_id in before:
+            self._index.remove(doc_id)
+
+    def wrote(self, db: TinyDB, docs: list, removed: list = ()) -> None:
+        """Apply documents this process just wrote, if the index has been built
+
+        When another process wrote the table before, its changes are applied
+        on next use.
+        """
+
+        if self._index is None:
+            return
+        self._key = key_after_write(db, self._key)
+        for doc in docs:
+            # a copy : the models hand their own __dict__
+            doc = marshal.loads(marshal.dumps(dict(doc)))
+            self._wrote[doc[self.id_field]] = doc
+            self._index.add(doc)
+        for doc_id in removed:
+            self._wrote[doc_id] = None
+            self._index.remove(doc_id)
+
+
+# depth of replacing() blocks of this process, by file
+_replacing: dict = {}
+_replacing_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def replacing(path: str):
+    """Exclusive lock of a json table while it is read and replaced, re-entrant
+
+    The lock readers and writers of the table take (see CachedJSONStorage) :
+    no write is made to the old file after it was read, and waiting writers
+    go on with the new file. Nothing to lock if the file does not exist yet.
+    """
+
+    real_path = os.path.realpath(path)
+    with _replacing_lock:
+        depth = _replacing.get(real_path, 0)
+        _replacing[real_path] = depth + 1
+    try:
+        if depth or fcntl is None or not os.path.exists(real_path):
+            yield
+            return
+        handle = open(real_path, "rb")
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            # replaced by someone else while waiting : lock the new file
+            while os.path.exists(real_path) and os.stat(real_path).st_ino != os.fstat(
+                handle.fileno()
+            ).st_ino:
+                handle.close()
+                handle = open(real_path, "rb")
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            yield
+        finally:
+            handle.close()
+    finally:
+        with _replacing_lock:
+            if depth:
+                _replacing[real_path] = depth
+            else:
+                del _replacing[real_path]
+
+
+class TableWriter:
+    """Stream documents to a new TinyDB json file, never holding the table
+
+    Documents go to a temporary file (single "_default" table, ids from 1)
+    that replaces path when the block exits without error.
+
+    Positionnal args:
+        path - str - json file to (re)write
+    """
+
+    def __init__(self, path: str) -> None:
+        """Init method for table writers"""
+
+        self.path = path
+        self.count = 0
+        self._handle = None
+
+    def __enter__(self) -> "TableWriter":
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        self._handle = tempfile.NamedTemporaryFile(
+            "w", dir=folder, prefix=".write_", suffix=".json", delete=False, encoding="utf-8"
+        )
+        self._handle.write('{"_default": {')
+        return self
+
+    def write(self, doc: dict) -> None:
+        """Append a document"""
+
+        self.count += 1
+        separator = ", " if self.count > 1 else ""
+        self._handle.write(f'{separator}"{self.count}": {json.dumps(doc)}')
+
+    def __exit__(self, exc_type, *exc) -> None:
+        try:
+            with self._handle:
+                if exc_type is None:
+                    self._handle.write("}}")
+                    self._handle.flush()
+                    os.fsync(self._handle.fileno())
+            if exc_type is None:
+                os.chmod(self._handle.name, 0o644)
+                with replacing(self.path):
+                    os.replace(self._handle.name, self.path)
+                    remove_cache(self.path)
+        finally:
+            if os.path.exists(self._handle.name):
+                os.unlink(self._handle.name)
+
+
+class LazyTinyDB:
+    """Class attribute opening a TinyDB json file on first access
+
+    Importing a model does no I/O at all : the file is only opened (and
+    created if missing) the first time Model.db is used.
+
+    Positionnal args:
+        filename - str - name of the json file in DATA_DIR
+    """
+
+    _opened: list["LazyTinyDB"] = []
+
+    def __init__(self, filename: str) -> None:
+        """Init method for lazy tables"""
+
+        self.filename = filename
+        self._db: TinyDB | None = None
+
+    @property
+    def path(self) -> str:
+        """Full path of the json file"""
+
+        return os.path.join(DATA_DIR, self.filename)
+
+    def __get__(self, instance, owner) -> TinyDB:
+        """Open the database on first access"""
+
+        if self._db is None:
+            logging.debug(f"Opening {self.path}")
+            self._db = FollowingTinyDB(self.path, storage=CachedJSONStorage)
+            LazyTinyDB._opened.append(self)
+
+        return self._db
+
+    def close(self) -> None:
+        """Close the file, it will be reopened on next access"""
+
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def set_data_dir(path: str) -> None:
+    """Point every model table to json files in another folder"""
+
+    global DATA_DIR
+
+    close_all()
+    DATA_DIR = str(path)
+
+
+def close_all() -> None:
+    """Close every opened table"""
+
+    for table in LazyTinyDB._opened:
+        table.close()
+    LazyTinyDB._opened.clear()
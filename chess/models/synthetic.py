@@ -0,0 +1,270 @@
+"""Seeded synthetic data : players, tournaments and their full results
+
+Usage :
+    python -m chess.models.synthetic [--data-dir DIR] [--players N]
+        [--tournaments N] [--size N] [--formats round_robin,swiss] [--seed N]
+
+The same seed always gives the same data. Tournaments are paired with the
+same rules as Tournament (Berger tables, swiss pairing, knockout brackets)
+and played to completion, results drawn from the Elo expected score. The
+tables are streamed to the json files, the players, rounds and tournaments
+already in the data folder are replaced. Ratings are the generated ones,
+run python -m chess.models.stats afterwards for the career statistics.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import logging
+import os
+import random
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+from chess.models import ids, storage
+from chess.models.bracket import Bracket
+from chess.models.pairings import (
+    PairingHistory,
+    berger_schedule,
+    default_n_rounds,
+    pairs_to_matches,
+    swiss_pairs,
+)
+from chess.models.players import Player
+from chess.models.ratings import Elo
+from chess.models.rounds import FINISHED, Round
+from chess.models.tournaments import Tournament
+
+FIRSTNAMES = [
+    "alice", "anna", "boris", "camille", "chloe", "david", "elena", "emma",
+    "felix", "gabriel", "hugo", "ines", "jade", "jules", "karim", "lea",
+    "louis", "lucas", "manon", "maxime", "nina", "noah", "oscar", "paul",
+    "quentin", "rose", "sacha", "sofia", "theo", "victor", "yasmine", "zoe",
+]  # fmt: skip
+LASTNAMES = [
+    "bernard", "bonnet", "david", "dubois", "dupont", "durand", "fontaine",
+    "fournier", "garcia", "girard", "lambert", "laurent", "lefebvre", "leroy",
+    "martin", "mercier", "michel", "moreau", "morel", "petit", "richard",
+    "robert", "roux", "simon", "thomas", "vincent",
+]  # fmt: skip
+FIRST_SEASON = 2015
+N_SEASONS = 10
+DRAW_RATE = 0.25
+
+
+class GenerationReport(NamedTuple):
+    """What was generated"""
+
+    players: int
+    tournaments: int
+    rounds: int
+    games: int
+
+    def __str__(self) -> str:
+        return (
+            f"{self.players} players, {self.tournaments} tournaments, "
+            f"{self.rounds} rounds, {self.games} games"
+        )
+
+
+def generate_players(rng: random.Random, n_players: int) -> Iterator[dict]:
+    """Player documents, created one second apart before the first season"""
+
+    created = ids.milliseconds(datetime.date(FIRST_SEASON - 1, 1, 1))
+    for i in range(n_players):
+        birthdate = datetime.date(rng.randint(1950, 2012), 1, 1) + datetime.timedelta(
+            days=rng.randrange(365)
+        )
+        player = Player(
+            rng.choice(FIRSTNAMES),
+            rng.choice(LASTNAMES),
+            birthdate=birthdate.isoformat(),
+            player_id=ids.make_id(created + 1000 * i, rng.getrandbits(ids.RANDOM_BITS)),
+            rating=float(min(2800, max(1000, round(rng.gauss(1500, 300))))),
+        )
+        yield player.to_dict()
+
+
+def play(
+    rng: random.Random, rating_a: float, rating_b: float, drawable: bool = True
+) -> Tuple[float, float]:
+    """Scores of a game, the expected score of a being the Elo one"""
+
+    expected = Elo.expected_score(rating_a, rating_b)
+    draw = DRAW_RATE * min(expected, 1 - expected) * 2 if drawable else 0
+    r = rng.random()
+    if r < expected - draw / 2:
+        return 1, 0
+    if r < expected + draw / 2:
+        return 0.5, 0.5
+
+    return 0, 1
+
+
+def generate_tournament(
+    rng: random.Random,
+    number: int,
+    player_ids: List[str],
+    ratings: Dict[str, float],
+    tournament_format: str,
+) -> Tuple[dict, List[dict]]:
+    """A completed tournament document and its round documents"""
+
+    # seeded like Tournament.seed
+    player_ids = sorted(player_ids, key=lambda i: (-ratings[i], i))
+    n_rounds = default_n_rounds(tournament_format, len(player_ids))
+    bracket = Bracket.seeded(player_ids) if tournament_format == "knockout" else None
+
+    start = datetime.date(FIRST_SEASON + number % N_SEASONS, 1, 1) + datetime.timedelta(
+        days=rng.randrange(330)
+    )
+    tournament = Tournament(
+        f"Synthetic open {number}",
+        start.isoformat(),
+        (start + datetime.timedelta(days=n_rounds // 2 + 1)).isoformat(),
+        location=rng.choice(LASTNAMES).capitalize(),
+        tournament_id=ids.make_id(ids.milliseconds(start), rng.getrandbits(ids.RANDOM_BITS)),
+        player_id_list=player_ids,
+        current_round_number=n_rounds - 1,
+        status="Completed",
+        tournament_format=tournament_format,
+        max_players=len(player_ids),
+        n_rounds=n_rounds,
+        bracket=bracket.nodes if bracket else None,
+    )
+
+    schedule = berger_schedule(player_ids) if tournament_format == "round_robin" else None
+    history = PairingHistory(player_ids)
+    scores = dict.fromkeys(player_ids, 0.0)
+    seeds = {player_id: i for i, player_id in enumerate(player_ids)}
+
+    rounds = []
+    for round_number in range(n_rounds):
+        if schedule is not None:
+            matches = pairs_to_matches(schedule[round_number])
+        elif tournament_format == "swiss":
+            standings = sorted(player_ids, key=lambda i: (-scores[i], seeds[i]))
+            matches = pairs_to_matches(swiss_pairs(standings, history), bye_score=1)
+        else:
+            matches = pairs_to_matches(bracket.stage_pairs(round_number), bye_score=1)
+
+        for match in matches:
+            (player_a, score_a), (player_b, _) = match
+            if player_b is not None:
+                score_a, score_b = play(
+                    rng,
+                    ratings[player_a],
+                    ratings[player_b],
+                    drawable=tournament_format != "knockout",
+                )
+                match[0][1], match[1][1] = score_a, score_b
+                scores[player_b] += score_b
+                if bracket is not None:
+                    bracket.advance(player_a if score_a > score_b else player_b)
+            scores[player_a] += score_a
+        if tournament_format == "swiss":
+            history.add_round(matches)
+
+        round_id = f"{tournament.tournament_id}_round_{round_number}"
+        # two rounds a day, like helpers.now() stamps
+        day = (start + datetime.timedelta(days=round_number // 2)).isoformat()
+        hour = 10 + 5 * (round_number % 2)
+        round_ = Round(
+            round_number,
+            matches,
+            round_id=round_id,
+            status=FINISHED,
+            tournament_id=tournament.tournament_id,
+            started_at=f"{day}_{hour}:00:00",
+            finished_at=f"{day}_{hour + 3}:00:00",
+        )
+        tournament.round_id_list.append(round_.round_id)
+        rounds.append(round_.to_dict())
+
+    return tournament.to_dict(), rounds
+
+
+def generate(
+    data_dir: str | None = None,
+    n_players: int = 1000,
+    n_tournaments: int = 100,
+    tournament_size: int = 8,
+    formats: List[str] | None = None,
+    seed: int = 0,
+) -> GenerationReport:
+    """Write seeded players, tournaments and rounds tables to data_dir
+
+    tournament_size - int - players per tournament
+    formats - List[str] - formats used in turn - default = None (round_robin, swiss)
+    """
+
+    formats = formats or ["round_robin", "swiss"]
+    for tournament_format in formats:
+        if tournament_format not in Tournament.AUTHORISED_FORMATS:
+            raise ValueError(f"Invalid tournament format: {tournament_format}.")
+    if not 2 <= tournament_size <= n_players:
+        raise ValueError("Pas assez de joueurs pour un tournoi.")
+
+    data_dir = data_dir or storage.DATA_DIR
+    rng = random.Random(seed)
+
+    # the opened TinyDB handles would keep pointing to the old files
+    storage.close_all()
+
+    ratings = {}
+    with storage.TableWriter(os.path.join(data_dir, "players.json")) as players:
+        for doc in generate_players(rng, n_players):
+            ratings[doc["player_id"]] = doc["rating"]
+            players.write(doc)
+
+    player_ids = list(ratings)
+    n_rounds = n_games = 0
+    tournaments = storage.TableWriter(os.path.join(data_dir, "tournaments.json"))
+    rounds = storage.TableWriter(os.path.join(data_dir, "rounds.json"))
+    with tournaments, rounds:
+        for number in range(n_tournaments):
+            tournament, tournament_rounds = generate_tournament(
+                rng,
+                number,
+                rng.sample(player_ids, tournament_size),
+                ratings,
+                formats[number % len(formats)],
+            )
+            tournaments.write(tournament)
+            for doc in tournament_rounds:
+                rounds.write(doc)
+                n_games += sum(1 for match in doc["matches"] if match[1][0] is not None)
+            n_rounds += len(tournament_rounds)
+
+    report = GenerationReport(n_players, n_tournaments, n_rounds, n_games)
+    logging.info(f"Generated {report}")
+
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic data")
+    parser.add_argument("--data-dir", default=None, help="folder of the json tables")
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--tournaments", type=int, default=100)
+    parser.add_argument("--size", type=int, default=8, help="players per tournament")
+    parser.add_argument("--formats", default="round_robin,swiss", help="comma separated")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = generate(
+        args.data_dir,
+        n_players=args.players,
+        n_tournaments=args.tournaments,
+        tournament_size=args.size,
+        formats=args.formats.split(","),
+        seed=args.seed,
+    )
+
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
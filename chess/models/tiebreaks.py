@@ -0,0 +1,184 @@
+"""Tiebreaks of the standings : Buchholz, median Buchholz, Sonneborn-Berger
+and direct encounter
+
+Everything is computed from one results matrix built in a single pass over
+the rounds : score[i * n + j] is what player i scored against player j. A
+tiebreak is then a few sums over rows of the matrix (no numpy here : flat
+arrays and sum / map, the loops run in C), never a scan of the rounds.
+
+Byes count in the points of a player, not in the tiebreaks : a bye has no
+opponent. Unplayed games (score -1) are ignored.
+"""
+
+from __future__ import annotations
+
+import operator
+from array import array
+from typing import Dict, Iterable, List, NamedTuple
+
+TIEBREAKS = ["buchholz", "median_buchholz", "sonneborn_berger", "direct_encounter"]
+# direct encounter first : it only separates players with the same points
+DEFAULT_ORDER = ["direct_encounter", "buchholz", "median_buchholz", "sonneborn_berger"]
+
+
+class Standing(NamedTuple):
+    """One line of the standings"""
+
+    rank: int
+    player_id: str
+    points: float
+    buchholz: float
+    median_buchholz: float
+    sonneborn_berger: float
+    direct_encounter: float
+
+
+class ResultsMatrix:
+    """Results of a tournament between every pair of players
+
+    Positionnal args:
+        player_ids - List[str] - players in seed order
+    """
+
+    def __init__(self, player_ids: List[str]) -> None:
+        """Init method for results matrices"""
+
+        self.player_ids = list(player_ids)
+        self.index = {player_id: i for i, player_id in enumerate(self.player_ids)}
+        self.n = len(self.player_ids)
+        self.score = array("d", bytes(8 * self.n * self.n))
+        self.games = array("H", bytes(2 * self.n * self.n))
+        self.points = array("d", bytes(8 * self.n))
+        # opponent of every game played, with repeats (Buchholz counts each game)
+        self.opponents: List[List[int]] = [[] for _ in range(self.n)]
+
+    @classmethod
+    def from_rounds(cls, player_ids: List[str], rounds: Iterable) -> "ResultsMatrix":
+        """Matrix of already played rounds, in one pass"""
+
+        matrix = cls(player_ids)
+        for round_ in rounds:
+            matrix.add_round(round_.matches)
+
+        return matrix
+
+    def _ensure(self, player_id: str) -> int:
+        """Index of a player, unknown players (legacy data) are added"""
+
+        i = self.index.get(player_id)
+        if i is not None:
+            return i
+
+        n = self.n + 1
+        score, games = array("d", bytes(8 * n * n)), array("H", bytes(2 * n * n))
+        for row in range(self.n):
+            score[row * n : row * n + self.n] = self.score[row * self.n : (row + 1) * self.n]
+            games[row * n : row * n + self.n] = self.games[row * self.n : (row + 1) * self.n]
+        self.score, self.games = score, games
+        self.points.append(0.0)
+        self.opponents.append([])
+        self.player_ids.append(player_id)
+        self.index[player_id] = self.n
+        self.n = n
+
+        return n - 1
+
+    def add_round(self, matches: List[list]) -> None:
+        """Record the played games of a round"""
+
+        for match in matches:
+            if len(match) != 2:
+                continue
+            (player_a, score_a), (player_b, score_b) = match
+            if player_a is None or score_a < 0:
+                continue
+            a = self._ensure(player_a)
+            self.points[a] += score_a
+            if player_b is None or score_b < 0:
+                continue
+            b = self._ensure(player_b)
+            self.points[b] += score_b
+            self.score[a * self.n + b] += score_a
+            self.score[b * self.n + a] += score_b
+            self.games[a * self.n + b] += 1
+            self.games[b * self.n + a] += 1
+            self.opponents[a].append(b)
+            self.opponents[b].append(a)
+
+    def _row(self, values: array, i: int) -> array:
+        return values[i * self.n : (i + 1) * self.n]
+
+    def buchholz(self) -> List[float]:
+        """Sum of the points of the opponents met"""
+
+        points = self.points
+
+        return [sum(map(points.__getitem__, opponents)) for opponents in self.opponents]
+
+    def median_buchholz(self) -> List[float]:
+        """Buchholz without the best and the worst opponent (3 games or more)"""
+
+        points = self.points
+        result = []
+        for opponents in self.opponents:
+            scores = sorted(map(points.__getitem__, opponents))
+            result.append(sum(scores[1:-1]) if len(scores) >= 3 else sum(scores))
+
+        return result
+
+    def sonneborn_berger(self) -> List[float]:
+        """Sum of the points of the opponents, weighted by the score against them"""
+
+        points = self.points
+
+        return [sum(map(operator.mul, self._row(self.score, i), points)) for i in range(self.n)]
+
+    def direct_encounter(self) -> List[float]:
+        """Points scored against the players with the same points
+
+        Only when every two of them met, 0 otherwise (and for players alone
+        on their points).
+        """
+
+        groups: Dict[float, List[int]] = {}
+        for i, points in enumerate(self.points):
+            groups.setdefault(points, []).append(i)
+
+        result = [0.0] * self.n
+        for group in groups.values():
+            if len(group) < 2:
+                continue
+            if not all(self.games[i * self.n + j] for i in group for j in group if i != j):
+                continue
+            for i in group:
+                row = self._row(self.score, i)
+                result[i] = sum(row[j] for j in group)
+
+        return result
+
+    def standings(self, order: List[str] | None = None) -> List[Standing]:
+        """Players sorted by points, then the tiebreaks in order, then seed
+
+        order - List[str] - tiebreaks to apply, among TIEBREAKS - default = None (DEFAULT_ORDER)
+        """
+
+        order = DEFAULT_ORDER if order is None else order
+        unknown = set(order) - set(TIEBREAKS)
+        if unknown:
+            raise ValueError(f"Départage inconnu : {', '.join(sorted(unknown))}.")
+
+        columns = {name: getattr(self, name)() for name in TIEBREAKS}
+        ranked = sorted(
+            range(self.n),
+            key=lambda i: (-self.points[i], *(-columns[name][i] for name in order), i),
+        )
+
+        return [
+            Standing(
+                rank,
+                self.player_ids[i],
+                self.points[i],
+                *(columns[name][i] for name in TIEBREAKS),
+            )
+            for rank, i in enumerate(ranked, start=1)
+        ]
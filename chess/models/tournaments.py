@@ -1,13 +1,74 @@
 from __future__ import annotations
 
+import copy
 import logging
 import random
 import secrets
-from typing import List
+from typing import Dict, List
+
+from tinydb import Query, where
+
+from chess.models import archive, ids
+from chess.models.bracket import Bracket
+from chess.models.concurrency import check_version, compare_and_swap, table_lock
+from chess.models.feed import ChangeFeed
+from chess.models.pairings import (
+    UNPLAYED,
+    PairingHistory,
+    berger_schedule,
+    default_n_rounds,
+    knockout_next_pairs,
+    pairs_to_matches,
+    parse_result,
+    scores_from_rounds,
+    swiss_pairs,
+)
+from chess.models.players import Player
+from chess.models.ratings import Elo
+from chess.models.rounds import FINISHED, ONGOING, PENDING, Round
+from chess.models.stats import PlayerStats
+from chess.models.storage import LazyTinyDB, TableIndex
+from chess.models.tiebreaks import ResultsMatrix, Standing
+
+
+class Entrants:
+    """Tournaments of every player, archived tournaments included
 
-from tinydb import Query, TinyDB, where
+    Positionnal args:
+        docs - Iterable[dict] - tournament documents of the table
+    """
+
+    def __init__(self, docs=()) -> None:
+        """Init method for entrant indexes"""
+
+        # player_id => {tournament_id: None} (ordered set)
+        self.by_player: Dict[str, Dict[str, None]] = {}
+        # tournament_id => its players, to find the players that left it
+        self._players: Dict[str, tuple] = {}
+
+        for doc in archive.all_tournaments() + list(docs):
+            self.add(doc)
+
+    def _set(self, tournament_id: str, player_ids: List[str]) -> None:
+        before = self._players.pop(tournament_id, ())
+        after = tuple(dict.fromkeys(player_ids))
+        for player_id in set(before) - set(after):
+            self.by_player[player_id].pop(tournament_id, None)
+        for player_id in after:
+            self.by_player.setdefault(player_id, {})[tournament_id] = None
+        if after:
+            self._players[tournament_id] = after
 
-from chess.models.rounds import Round
+    def add(self, doc: dict) -> None:
+        """Index a tournament document, replacing its previous players"""
+
+        self._set(doc["tournament_id"], doc.get("player_id_list", []))
+
+    def remove(self, tournament_id: str) -> None:
+        """Forget a tournament removed from the table, unless it was archived"""
+
+        archived = archive.read_tournament(tournament_id)
+        self._set(tournament_id, archived.get("player_id_list", []) if archived else [])
 
 
 class Tournament:
@@ -26,14 +87,24 @@ class Tournament:
         player_id_list - List[str] - list of players id - default = None
         current_round_number - int - current round number - default = -1
         status - str - status of the tournament - default = "Created"
+        tournament_format - str - "round_robin", "swiss" or "knockout" - default = "round_robin"
+        max_players - int - maximum number of players - default = 4
+        n_rounds - int - number of rounds - default = None (computed at start from the format)
+        version - int - bumped by every update (compare-and-swap) - default = 0
+        bracket - List[str | None] - knockout bracket array, see Bracket - default = None
     """
 
-    db = TinyDB("./data/tournaments.json")
+    db = LazyTinyDB("tournaments.json")
 
+    # defaults, every tournament can set its own size at creation
     N_PLAYERS = 4
     N_ROUNDS = 3
     N_MATCHES_PER_ROUND = 2
     AUTHORISED_STATUS = ["Created", "In Progress", "Completed"]
+    AUTHORISED_FORMATS = ["round_robin", "swiss", "knockout"]
+
+    # tournaments of every player
+    _entrants = TableIndex("tournament_id", Entrants)
 
     def __init__(
         self,
@@ -47,9 +118,17 @@ class Tournament:
         player_id_list: List[str] | None = None,
         current_round_number: int = -1,  # change rand ? or ? !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
         status: str = "Created",
+        tournament_format: str = "round_robin",
+        max_players: int = N_PLAYERS,
+        n_rounds: int | None = None,
+        version: int = 0,
+        bracket: List[str | None] | None = None,
     ):
         """Init method for tournaments"""
 
+        if tournament_format not in self.AUTHORISED_FORMATS:
+            raise ValueError(f"Invalid tournament format: {tournament_format}.")
+
         # handle written args by user
         self.name = name
         self.start_date = start_date
@@ -57,15 +136,35 @@ class Tournament:
         self.description = description
         self.location = location
 
-        self.tournament_id = tournament_id if tournament_id else secrets.token_hex(4)
+        self.tournament_id = tournament_id if tournament_id else ids.new_id()
         self.round_id_list = round_id_list if round_id_list else []
         self.player_id_list = player_id_list if player_id_list else []
         self.current_round_number = current_round_number
         self.status = status
+        self.tournament_format = tournament_format
+        self.max_players = max_players
+        # tournaments saved before n_rounds existed had all rounds created at start
+        if n_rounds is None and status != "Created" and self.round_id_list:
+            n_rounds = len(self.round_id_list)
+        self.n_rounds = n_rounds
+        self.version = version
+        self.bracket = bracket
+
+        # lazy cache of the rounds, see the rounds property (not saved)
+        self._rounds: List[Round] | None = None
+        self._rounds_key: tuple | None = None
+        self._pairing_history: PairingHistory | None = None
+        self._pairing_history_key: tuple | None = None
+        self._bracket: Bracket | None = None
+        self._results: ResultsMatrix | None = None
+        self._results_key: tuple | None = None
+        self._standings: Dict[tuple, List[Standing]] = {}
+        # completed, its games are rated once the tournament is saved
+        self._to_rate = False
 
     def to_dict(self) -> dict:
         """Convert tournament to dict"""
-        return self.__dict__
+        return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
 
     @classmethod
     def from_dict(cls, tournament_dict):
@@ -77,33 +176,101 @@ class Tournament:
         """Create method for tournaments"""
 
         self.db.insert(self.to_dict())
+        self._entrants.wrote(self.db, [self.to_dict()])
+        ChangeFeed.publish("tournament", "created", self.tournament_id, self.to_dict())
 
     @classmethod
     def read_one(cls, tournament_id: str) -> dict | None:
-        """Read method for tournaments (Read one)"""
+        """Read method for tournaments (Read one), archived ones included"""
 
         tournament = Query()
         result = cls.db.search(tournament.tournament_id == tournament_id)
-        res = result[0] if result else None
+        res = result[0] if result else archive.read_tournament(tournament_id)
 
         return Tournament.from_dict(res) if res else None
 
     @classmethod
-    def read_all(cls) -> list[dict]:
+    def read_many(cls, tournament_ids: List[str]) -> List["Tournament"]:
+        """Read many tournaments in a single pass, in the order of tournament_ids
+
+        Tournaments missing from the table are looked up in the archive.
+        """
+
+        wanted = set(tournament_ids)
+        found = {
+            doc["tournament_id"]: doc
+            for doc in cls.db.all()
+            if doc["tournament_id"] in wanted
+        }
+        for tournament_id in wanted - found.keys():
+            doc = archive.read_tournament(tournament_id)
+            if doc is not None:
+                found[tournament_id] = doc
+
+        return [Tournament.from_dict(found[i]) for i in tournament_ids if i in found]
+
+    @classmethod
+    def read_all(cls, include_archived: bool = False) -> list[dict]:
         """Read all method for tournaments"""
 
         res = cls.db.all()
+        if include_archived:
+            res = res + archive.all_tournaments()
         return [Tournament.from_dict(tournament) for tournament in res]
 
+    @classmethod
+    def created_between(cls, start, end) -> list["Tournament"]:
+        """Tournaments created in [start, end[ (dates or iso strings), id order
+
+        A range on the ids, old ids carry no date and are never returned.
+        """
+
+        bounds = ids.id_range(start, end)
+        res = cls.db.search(where("tournament_id").test(lambda i: ids.in_range(i, bounds)))
+        res.sort(key=lambda doc: doc["tournament_id"])
+
+        return [Tournament.from_dict(doc) for doc in res]
+
     @classmethod
     def search(cls, tournament_id):
-        """Search for a tournament by tournament_id"""
+        """Search for a tournament by tournament_id, archived ones included"""
 
-        tournament = Query()
-        result = cls.db.search(tournament.tournament_id == tournament_id)
-        res = result[0] if result else None
+        return cls.read_one(tournament_id)
 
-        return Tournament.from_dict(res) if res else None
+    @classmethod
+    def archive_completed(cls, before: str | None = None) -> List[str]:
+        """Move completed tournaments and their rounds to the archive
+
+        before - str - only tournaments ending before this date - default = None (all)
+
+        Archived tournaments are still found by read_one / search and their
+        rounds by Round.read_many (and so Tournament.rounds), but they leave
+        the tables scanned by every query.
+        """
+
+        to_archive = [
+            doc
+            for doc in cls.db.all()
+            if doc.get("status") == "Completed"
+            and (before is None or doc.get("end_date", "") < before)
+        ]
+        if not to_archive:
+            return []
+
+        round_ids = {i for doc in to_archive for i in doc.get("round_id_list", [])}
+        rounds_by_id = {
+            doc["round_id"]: doc for doc in Round.db.all() if doc["round_id"] in round_ids
+        }
+
+        # archive first, the hot tables are only cleaned once it is written
+        archived = set(archive.write(to_archive, rounds_by_id))
+
+        cls.db.remove(where("tournament_id").test(lambda i: i in archived))
+        Round.db.remove(where("round_id").test(lambda i: i in round_ids))
+
+        logging.warning(f"{len(archived)} tournaments archived.")
+
+        return sorted(archived)
 
     @classmethod
     def search_by(cls, key: str, value) -> list[dict]:
@@ -113,23 +280,54 @@ class Tournament:
         return [Tournament.from_dict(tournament) for tournament in res]
 
     def update(self) -> None:
-        """Update method for tournaments"""
+        """Update method for tournaments
+
+        Raises ConflictError if the tournament changed since it was read : read
+        it again and re-apply (see concurrency.retry_on_conflict).
+        """
 
-        """ PB MAJ TPURNEMENT"""
-        self.db.update(self.to_dict(), where("tournament_id") == self.tournament_id)
+        self.version += 1
+        try:
+            compare_and_swap(
+                self.db, "tournament_id", self.tournament_id, self.version - 1, self.to_dict()
+            )
+        except Exception:
+            self.version -= 1
+            raise
+        self._entrants.wrote(self.db, [self.to_dict()])
+        # cleared once rated : a failed rating is done again by the next update
+        if self._to_rate:
+            self._rate()
+            self._to_rate = False
+        ChangeFeed.publish("tournament", "updated", self.tournament_id, self.to_dict())
 
         logging.warning(f"Tournament {self.tournament_id} updated successfully.")
 
     def delete(self) -> None:
-        """Delete method for tournaments"""
-        # Not necessary for now
-        raise NotImplementedError("Not included in specs")
+        """Delete method for tournaments (its rounds are left to compaction)"""
+
+        self.db.remove(where("tournament_id") == self.tournament_id)
+        self._entrants.wrote(self.db, [], removed=[self.tournament_id])
+        ChangeFeed.publish("tournament", "deleted", self.tournament_id)
 
     @classmethod
     def delete_all(cls) -> None:
         """Delete all method for tournaments"""
 
         cls.db.truncate()
+        cls._entrants.reset()
+
+    @classmethod
+    def player_index(cls) -> Dict[str, Dict[str, None]]:
+        """player_id => tournament ids, archived tournaments included"""
+
+        return cls._entrants.get(cls.db).by_player
+
+    @classmethod
+    def tournament_ids_of(cls, player_id: str) -> List[str]:
+        """Ids of the tournaments a player is registered in (index lookup)"""
+
+        return list(cls.player_index().get(player_id, ()))
 
     @classmethod
     def bootstrap(cls, num_tournaments: int = 3) -> None:
@@ -183,50 +381,162 @@ class Tournament:
 
         return len(self.player_id_list)
 
+    @property
+    def rounds(self) -> List[Round]:
+        """Rounds of the tournament, in round_id_list order
+
+        All rounds are read in one pass on first access and kept on the
+        instance. The rounds written through the instance are the kept ones,
+        only the rounds written elsewhere since (their version in the round
+        state index changed) are read again.
+        """
+
+        key = tuple(self.round_id_list)
+        if self._rounds is None or self._rounds_key != key:
+            self._rounds = Round.read_many(self.round_id_list)
+            self._rounds_key = key
+            return self._rounds
+
+        states = Round.states()
+        changed = [r.round_id for r in self._rounds
+                   if states.version(r.round_id) not in (None, r.version)]  # fmt: skip
+        if changed:
+            fresh = {r.round_id: r for r in Round.read_many(changed)}
+            self._rounds = [fresh.get(r.round_id, r) for r in self._rounds]
+
+        return self._rounds
+
+    @property
+    def pairing_history(self) -> PairingHistory:
+        """Who met whom in this tournament, built once from the rounds
+
+        Kept up to date by _add_round, so rematch checks never re-read the
+        earlier rounds.
+        """
+
+        key = tuple(self.round_id_list)
+        if self._pairing_history is None or self._pairing_history_key != key:
+            self._pairing_history = PairingHistory.from_rounds(
+                self.player_id_list, self.rounds
+            )
+            self._pairing_history_key = key
+
+        return self._pairing_history
+
+    @property
+    def knockout_bracket(self) -> Bracket | None:
+        """Bracket of a knockout started with one, None otherwise
+
+        Wraps the saved bracket list : advancing a winner changes it in place.
+        """
+
+        if self.bracket is None:
+            return None
+        if self._bracket is None or self._bracket.nodes is not self.bracket:
+            self._bracket = Bracket(self.bracket)
+
+        return self._bracket
+
+    def invalidate_rounds(self) -> None:
+        """Drop the cached rounds, next access to rounds reloads them"""
+
+        self._rounds = None
+        self._rounds_key = None
+
     def add_player(self, player_id: str) -> None:  # !!!!!!!!!!
         """Add player to tournament"""
 
-        # TODO : add verification that the player is not already in the tournament
-        # TODO : add verification that the player is not already in the Player DB Table
+        self.add_players([player_id])
 
-        if player_id in self.player_id_list:
-            raise ValueError("Le jouer existe deja dans le tournament.")
+    def add_players(self, player_ids: List[str]) -> None:
+        """Add many players to the tournament with a single update"""
 
         # TODO: Add verification that the player is not already in the Player DB Table
         # if self._player_exists_in_db(player_id):  # a implementer
         #     raise ValueError("Le jouer existe deja dans Player DB Table .")
 
         # si status != created => trop tard mon coco :)
+        if self.status != "Created":
+            raise ValueError("Impossible d'ajouter un joueur à un tournoi commencé.")
 
-        # verify that current player number not higher than number of players (4)
-        if len(self.player_id_list) > self.N_PLAYERS:
+        registered = set(self.player_id_list)
+        for player_id in player_ids:
+            if player_id in registered:
+                raise ValueError("Le jouer existe deja dans le tournament.")
+            registered.add(player_id)
+
+        # verify that current player number not higher than number of players
+        if len(registered) > self.max_players:
             raise AttributeError(
-                "Current player number is higher than the number of players (4)"
+                f"Current player number is higher than the number of players ({self.max_players})"
             )
 
-        # verify that the current player is not in the player list
-        if player_id in self.player_id_list:
-            raise AttributeError("Current player is already in the player list")
+        # add players to the player list
+        self.player_id_list.extend(player_ids)
+
+        self.update()
 
-        # add player to the player list
-        self.player_id_list.append(player_id)
+    def seed(self) -> None:
+        """Sort the players by rating (highest first) before the start"""
 
-        self.update()  # for now it is useless   !!!!!
+        # one pass over the players table for all the entrants
+        ratings = {p.player_id: p.rating for p in Player.read_many(self.player_id_list)}
+
+        self.player_id_list.sort(
+            key=lambda i: (-ratings.get(i, Player.DEFAULT_RATING), i)
+        )
 
     def _add_round(self, round_number: int, matches: List[str]) -> str:
         """Add a round to the tournament."""
 
-        round_id = f"{self.tournament_id}_round_{round_number}"
-        new_round = Round(round_number, matches, round_id=round_id)
-        new_round.create()
+        return self._add_rounds([matches], first_round_number=round_number)[0]
 
-        # Add the round to the list of rounds
-        self.round_id_list.append(new_round.round_id)
+    def _add_rounds(
+        self,
+        rounds_matches: List[List[str]],
+        first_round_number: int = 0,
+        save: bool = True,
+    ) -> List[str]:
+        """Add several rounds to the tournament with one write per table.
+
+        With save=False the tournament itself is left for the caller to save.
+        """
+
+        new_rounds = [
+            Round(
+                first_round_number + i,
+                matches,
+                round_id=f"{self.tournament_id}_round_{first_round_number + i}",
+                tournament_id=self.tournament_id,
+            )
+            for i, matches in enumerate(rounds_matches)
+        ]
+        # the round being played is ongoing, later ones (round-robin) pending
+        for new_round in new_rounds:
+            if new_round.round_number == self.current_round_number:
+                new_round.start()
+        Round.create_many(new_rounds)
+
+        # Add the rounds to the list of rounds, and to the cached rounds
+        cached = self._rounds is not None and self._rounds_key == tuple(self.round_id_list)
+        self.round_id_list.extend(r.round_id for r in new_rounds)
+        if cached:
+            self._rounds = self._rounds + new_rounds
+            self._rounds_key = tuple(self.round_id_list)
+        else:
+            self.invalidate_rounds()
+
+        # the pairing history follows without reading the rounds again
+        if self._pairing_history is not None:
+            for new_round in new_rounds:
+                self._pairing_history.add_round(new_round.matches)
+            self._pairing_history_key = tuple(self.round_id_list)
 
         # save the tournament
-        self.update()
+        if save:
+            self.update()
 
-        return new_round.round_id
+        return [r.round_id for r in new_rounds]
 
     # def update_status(self, new_status: str):
     #     """ """
@@ -312,42 +622,17 @@ class Tournament:
             raise ValueError("Invalid tournament status.")
 
         if self.status == "Created" and new_status == "In Progress":
-            # Check if there are enough players
-            if len(self.player_id_list) != self.N_PLAYERS:
-                raise ValueError(
-                    f"Impossible de passer à 'In Progress' sans {self.N_PLAYERS} joueurs."
-                )
-
-            # on initialize les matchs avec random scores (1 or 0)
-            # Ca au final c'est pas top
-            # car on peut avoir 1 1 en resultat ou 0 0
-            match_list = [
-                [
-                    [
-                        (player_id, random.choice([1, 0]))
-                        for player_id in self.player_id_list
-                    ]
-                    for _ in range(self.N_MATCHES_PER_ROUND)
-                ]
-                for _ in range(self.N_ROUNDS)
-            ]
-
-            # Add rounds to database
-            for i, round_matches in enumerate(match_list):
-                _ = self._add_round(i, round_matches)
-
-            # Update status to 'In Progress' and save
-            self.status = "In Progress"
-            self.current_round_number = 0
-            self.update()
+            self._start()
 
         elif self.status == "In Progress" and new_status == "Completed":
             # Check if all rounds are played
-            if len(self.round_id_list) < self.N_ROUNDS:
+            if len(self.round_id_list) < self.n_rounds:
                 raise ValueError(
                     "Impossible de terminer le tournoi sans que tous les rounds soient finis."
                 )
 
+            self._complete()
+
         else:
             raise ValueError(
                 f"Statut invalide. Impossible de changer le statut de {self.status} à {new_status}."
@@ -356,32 +641,297 @@ class Tournament:
         # Update the status
         self.update()
 
-    def _next_round(self):
-        """change the round +=1"""
+    def _start(self) -> None:
+        """Seed the players and create the first round(s)"""
+
+        n = len(self.player_id_list)
+
+        # Check if there are enough players
+        if n < 2:
+            raise ValueError("Impossible de passer à 'In Progress' sans 2 joueurs.")
+        if not self.n_rounds:
+            self.n_rounds = default_n_rounds(self.tournament_format, n)
+
+        # seed by rating, scores are unplayed (-1) until results are entered
+        self.seed()
+
+        # the first round is created ongoing
+        self.current_round_number = 0
+
+        if self.tournament_format == "round_robin":
+            # the whole round-robin is known in advance
+            schedule = berger_schedule(self.player_id_list)[: self.n_rounds]
+            self.n_rounds = len(schedule)
+            self._add_rounds([pairs_to_matches(pairs) for pairs in schedule])
+
+        elif self.tournament_format == "swiss":
+            # top half against bottom half
+            half = n // 2
+            pairs = list(zip(self.player_id_list[:half], self.player_id_list[half:]))
+            if n % 2:
+                pairs.append((self.player_id_list[-1], None))
+            self._add_round(0, pairs_to_matches(pairs, bye_score=1))
+
+        else:
+            # top seeds get the byes when the number of players is not a power of 2
+            bracket = Bracket.seeded(self.player_id_list)
+            self.bracket = bracket.nodes
+            self.n_rounds = bracket.n_stages
+            self._add_round(0, pairs_to_matches(bracket.stage_pairs(0), bye_score=1))
+
+        # Update status to 'In Progress' and save
+        self.status = "In Progress"
+
+    def _generate_round(self, round_number: int, save: bool = True) -> None:
+        """Pair a swiss or knockout round from the results already entered"""
+
+        # all previous rounds in one read, everything else is done in memory
+        rounds = self.rounds
+
+        if self.tournament_format == "swiss":
+            scores = scores_from_rounds(rounds)
+            seeds = {player_id: i for i, player_id in enumerate(self.player_id_list)}
+            standings = sorted(
+                self.player_id_list, key=lambda i: (-scores.get(i, 0), seeds[i])
+            )
+
+            matches = pairs_to_matches(
+                swiss_pairs(standings, self.pairing_history), bye_score=1
+            )
+
+        else:
+            last_round = max(rounds, key=lambda r: r.round_number)
+            winners = []
+            for (player_a, score_a), (player_b, score_b) in last_round.matches:
+                if score_a == score_b:
+                    raise ValueError(
+                        f"Match nul impossible en 'knockout' : {player_a} - {player_b}."
+                    )
+                winners.append(player_a if score_a > score_b else player_b)
+            matches = pairs_to_matches(knockout_next_pairs(winners))
+
+        self._add_rounds([matches], first_round_number=round_number, save=save)
+
+    def _advance_knockout(self) -> None:
+        """Winners of the current round go up the bracket, then the next stage
+
+        Drawn games are replayed (tiebreak game, colours reversed) in an extra
+        round before the stage goes on. Only the current round is read.
+        """
+
+        bracket = self.knockout_bracket
+        current_round = self.get_current_round()
+        matches = [m for m in current_round.matches if m[1][0] is not None]
+        missing = [m for m in matches if UNPLAYED in (m[0][1], m[1][1])]
+        if missing:
+            raise ValueError(f"Résultat manquant : {missing[0][0][0]} - {missing[0][1][0]}.")
+        self._finish_round(current_round)
+
+        replays = []
+        for (player_a, score_a), (player_b, score_b) in matches:
+            if score_a == score_b:
+                replays.append((player_b, player_a))
+            else:
+                bracket.advance(player_a if score_a > score_b else player_b)
+
+        stage = bracket.current_stage()
+        if replays:
+            self.n_rounds += 1
+            next_matches = pairs_to_matches(replays)
+        elif stage is None:
+            self._complete()
+            return
+        else:
+            next_matches = pairs_to_matches(bracket.stage_pairs(stage))
+
+        self.current_round_number += 1
+        self._add_rounds([next_matches], first_round_number=self.current_round_number, save=False)
+
+    @staticmethod
+    def _finish_round(round_: Round | None) -> None:
+        """Mark a round finished and save it, unless submit_results did"""
+
+        if round_ is not None and round_.state != FINISHED:
+            round_.finish()
+            round_.update()
+
+    def _advance(self) -> None:
+        """Move to the next round (paired if needed) or complete, no save"""
+
+        if self.knockout_bracket is not None:
+            self._advance_knockout()
+            return
+
+        self._finish_round(self.get_current_round())
 
         # Check si toutes le rounds sont finished
-        if self.current_round_number == self.N_ROUNDS - 1:
-            # Update status et save
-            self.status = "Completed"
+        if self.current_round_number >= self.n_rounds - 1:
+            self._complete()
 
         else:
             # On continue les rounds
             self.current_round_number += 1
 
+            # swiss and knockout rounds depend on the previous results
+            if self.current_round_number >= len(self.round_id_list):
+                self._generate_round(self.current_round_number, save=False)
+            else:
+                # created in advance (round-robin) : it starts now
+                next_round = self.get_current_round()
+                if next_round is not None and next_round.state == PENDING:
+                    next_round.start()
+                    next_round.update()
+
+    def _next_round(self):
+        """change the round +=1"""
+
+        self._advance()
         self.update()
 
+    def submit_results(self, results: dict) -> None:
+        """Enter the results of every board of the current round at once
+
+        results - dict - {board number (from 1): result}, a result being
+            "1-0", "0-1", "1/2-1/2" or a (score white, score black) tuple
+
+        Every board is checked in memory first (known board, known players,
+        legal scores, no board missing) and nothing is written if one fails.
+        Then the round is written once, the next round is paired if needed
+        and the tournament is saved once.
+
+        The writes are one unit : they run under the locks of the tournaments
+        and rounds tables, the versions of the tournament and of every round
+        to be written checked first. A document changed since it was read
+        raises ConflictError before anything is changed, in memory or on
+        disk, and the writes can not conflict anymore. Should a write fail
+        anyway, the tournament is put back as it was read.
+        """
+
+        if self.status != "In Progress":
+            raise ValueError(f"Le tournoi n'est pas en cours ({self.status}).")
+
+        current_round = self.get_current_round()
+        if current_round is None:
+            raise ValueError("Aucun round en cours.")
+
+        registered = set(self.player_id_list)
+        errors = []
+        new_matches = []
+        for board, match in enumerate(current_round.matches, start=1):
+            (player_a, score_a), (player_b, score_b) = match
+
+            # byes are scored when the round is paired
+            if player_b is None:
+                new_matches.append(match)
+                if board in results:
+                    errors.append(f"board {board}: bye, pas de résultat à saisir")
+                continue
+
+            if player_a not in registered or player_b not in registered:
+                errors.append(f"board {board}: joueur inconnu ({player_a}, {player_b})")
+                continue
+
+            if board not in results:
+                if score_a == UNPLAYED:
+                    errors.append(f"board {board}: résultat manquant")
+                new_matches.append(match)
+                continue
+
+            try:
+                score_a, score_b = parse_result(results[board])
+            except ValueError as e:
+                errors.append(f"board {board}: {e}")
+                continue
+            new_matches.append([[player_a, score_a], [player_b, score_b]])
+
+        unknown_boards = set(results) - set(range(1, len(current_round.matches) + 1))
+        errors.extend(f"board {board}: n'existe pas" for board in sorted(unknown_boards))
+
+        if errors:
+            raise ValueError("Résultats refusés : " + " ; ".join(errors))
+
+        # the round written, and the next one when created in advance (started)
+        written = [current_round]
+        next_number = self.current_round_number + 1
+        if self.knockout_bracket is None and next_number < len(self.round_id_list):
+            written.append(self.rounds[next_number])
+
+        saved = copy.deepcopy(self.to_dict())
+        with table_lock(self.db), table_lock(Round.db):
+            check_version(self.db, "tournament_id", self.tournament_id, self.version)
+            Round.check_versions(written)
+
+            try:
+                # one write for the round, one (if needed) for the next round
+                current_round.matches = new_matches
+                if current_round.state != FINISHED:
+                    current_round.finish()
+                current_round.update()
+
+                self._advance()
+                self.update()
+            except Exception:
+                # not saved (a failed rating is, see update) : the rounds are
+                # read again, as written
+                if self.version == saved["version"]:
+                    self.__dict__.update(Tournament.from_dict(saved).__dict__)
+                raise
+
+    def scores(self) -> dict:
+        """Scores of every player, all rounds being read at once"""
+
+        return scores_from_rounds(self.rounds)
+
+    def _complete(self) -> None:
+        """Mark the tournament as completed, its games are rated by update
+
+        Neither the ratings nor the statistics can be applied twice : they are
+        only written once the tournament itself is saved, a conflict on that
+        save (retried from a fresh read) has rated nothing.
+        """
+
+        if self.status == "Completed":
+            return
+
+        self.status = "Completed"
+        self._to_rate = True
+
+    def _rate(self) -> None:
+        """Career statistics and ratings of the players of a completed tournament"""
+
+        # career statistics use the ratings before the tournament, then the
+        # incremental rating update : only the rounds of this tournament are read
+        ratings = Player.read_ratings()
+        PlayerStats.apply_tournament(self, ratings)
+        Elo.apply_tournament(self, ratings=ratings)
+
     def get_current_round(self):
-        """Get the current round number for the tournament."""
+        """Get the current round for the tournament
+
+        The ongoing round, found in the round state index. Tournaments whose
+        rounds have no state yet (or completed ones) use current_round_number,
+        and so does a round of the index no longer ongoing on disk.
+        """
 
         if not self.round_id_list:
             logging.warning("No rounds have been computed yet.")
             return None
 
-        current_round_id = self.round_id_list[-1]
+        # rounds may be created in advance (round-robin)
+        if 0 <= self.current_round_number < len(self.round_id_list):
+            numbered_id = self.round_id_list[self.current_round_number]
+        else:
+            numbered_id = self.round_id_list[-1]
+
+        rounds_by_id = {r.round_id: r for r in self.rounds}
+        current_round_id = Round.states().current(self.tournament_id)
+        indexed = rounds_by_id.get(current_round_id)
+        if indexed is None or indexed.state != ONGOING:
+            current_round_id = numbered_id
         logging.warning(f"Current Round ID: {current_round_id}")
 
         # try to get current round data
-        current_round = Round.search_by("round_id", current_round_id)
+        current_round = rounds_by_id.get(current_round_id)
 
         if not current_round:
             logging.warning(f"No data found for Round ID: {current_round_id}")
@@ -389,77 +939,52 @@ class Tournament:
 
         return current_round
 
-    def update_current_round(self, match_list=None):
-        """Update the current round number for the tournament."""
+    def unfinished_boards(self) -> List[int]:
+        """Boards (from 1) of the current round still waiting for a result"""
 
-        # Check if there are rounds to update
-        if not self.round_id_list:
-            logging.warning("No rounds have been computed yet.")
-            return
+        current_round = self.get_current_round()
+        if current_round is None or current_round.state == FINISHED:
+            return []
 
-        # Find the round instance of the current round
-        current_round_id = self.round_id_list[-1]
-        current_round_data = Round.search_by("round_id", current_round_id)
+        return current_round.unfinished_boards()
 
-        if not current_round_data:
-            logging.warning(f"No data found for Round ID: {current_round_id}")
-        else:
-            logging.info(
-                f"Found data for Round ID: {current_round_id}, Data: {current_round_data}"
-            )
-            return
+    def update_current_round(self, match_list=None):
+        """Update the current round with its played matches and move on.
 
-        current_round = self.get_current_round()
+        match_list is either the matches of the current round or, as before,
+        the matches of every round (the current one is used). Kept for
+        compatibility, see submit_results.
+        """
 
-        # Log or print relevant information
-        logging.info(f"Before update - Current Round ID: {current_round.round_id}")
-        logging.info(f"Before update - Current Round: {current_round}")
-        print(
-            "*****************************************************************************************"
-        )
-        # Update the round with match_list
-        if match_list:
-            # Check if match_list is a list with elements for each round
-            if len(match_list) != self.N_ROUNDS:
-                logging.error(
-                    f"Invalid match_list length: {len(match_list)} (expected {self.N_ROUNDS}). Content: {match_list}"
-                )
-                return
-            current_round.matches = match_list[self.current_round_number]
+        if not match_list:
+            logging.warning("No results given.")
+            return
 
-            # Log or print relevant information
-            logging.info(f"Updated Round ID: {current_round.round_id}")
-            logging.info(f"Updated Round: {current_round}")
+        # whole tournament list : keep the current round
+        if len(match_list) == self.n_rounds and all(
+            isinstance(item[0][0], (list, tuple)) for item in match_list
+        ):
+            match_list = match_list[self.current_round_number]
 
-            try:
-                # Update the current round
-                current_round.update()
-            except Exception as e:
-                # Log the exception
-                logging.error(f"Error updating current round: {e}")
-
-        # Increment round number
-        if self.current_round_number >= 0:
-            if self.current_round_number < self.N_ROUNDS - 1:
-                self.current_round_number += 1
-
-                match_list_for_next_round = match_list[self.current_round_number]
-                new_round_number = self._add_round(
-                    self.current_round_number, match_list_for_next_round
-                )  # add to the DB
-                self.round_id_list.append(
-                    new_round_number
-                )  # add new round number to the round id list
-            else:
-                self.status = "Completed"
-                logging.warning("Tournament is completed.")
+        current_round = self.get_current_round()
+        if current_round is None:
+            logging.warning("No rounds have been computed yet.")
+            return
 
-        self._next_round()
-        self.update()
+        boards = {
+            tuple(p[0] for p in match): board
+            for board, match in enumerate(current_round.matches, start=1)
+        }
+        results = {}
+        for (player_a, score_a), (player_b, score_b) in match_list:
+            if (player_a, player_b) in boards:
+                results[boards[(player_a, player_b)]] = (score_a, score_b)
+            elif (player_b, player_a) in boards:
+                results[boards[(player_b, player_a)]] = (score_b, score_a)
+            else:
+                raise ValueError(f"Match inconnu : {player_a} - {player_b}.")
 
-        # Log or print relevant information after the update
-        logging.info(f"After update - Current Round ID: {current_round.round_id}")
-        logging.info(f"After update - Current Round: {current_round}")
+        self.submit_results(results)
 
     def __repr__(self) -> str:
         """Tournament representation"""
@@ -470,18 +995,39 @@ class Tournament:
             f"matches={self.round_id_list}, participants={self.player_id_list})"
         )
 
-    def get_score(self, player_id):
-        player_score = 0
+    @property
+    def results_matrix(self) -> ResultsMatrix:
+        """Results between every pair of players, built once from the rounds
+
+        Kept until one of the rounds is written (a result entered, by any
+        process) or a round added.
+        """
+
+        key = (tuple((r.round_id, r.version) for r in self.rounds), tuple(self.player_id_list))
+        if self._results is None or self._results_key != key:
+            self._results = ResultsMatrix.from_rounds(self.player_id_list, self.rounds)
+            self._results_key = key
+            self._standings = {}
+
+        return self._results
 
-        # Iterate through rounds
-        for round_id in self.round_id_list:
-            round_data = Round.search_by("round_id", round_id)
+    def standings(self, order: List[str] | None = None) -> List[Standing]:
+        """Standings with Buchholz, median Buchholz, Sonneborn-Berger and direct encounter
 
-            if round_data:
-                for match in round_data.matches:
-                    # Iterate matches to find player's score
-                    for player_tuple in match:
-                        if player_tuple[0] == player_id:
-                            player_score += player_tuple[1]
+        order - List[str] - tiebreaks applied after the points - default = None
+            (tiebreaks.DEFAULT_ORDER)
+
+        Computed once per set of results, see results_matrix.
+        """
+
+        matrix = self.results_matrix
+        key = tuple(order) if order is not None else None
+        if key not in self._standings:
+            self._standings[key] = matrix.standings(order)
+
+        return self._standings[key]
+
+    def get_score(self, player_id):
+        """Score of one player (see scores for all of them)"""
 
-        return player_score
+        return self.scores().get(player_id, 0)
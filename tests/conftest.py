@@ -7,6 +7,7 @@ import secrets
 
 import pytest
 
+from chess.models import storage
 from chess.models.players import Player
 from chess.models.rounds import Round
 from chess.models.tournaments import Tournament
@@ -73,3 +74,52 @@ def last_tournament():
     tournament = tournament_list[-1]
 
     return tournament
+
+
+@pytest.fixture
+def tmp_db(tmp_path):
+    """point every model table to empty json files in a temporary folder"""
+
+    data_dir = storage.DATA_DIR
+    storage.set_data_dir(tmp_path)
+
+    yield tmp_path
+
+    storage.set_data_dir(data_dir)
+
+
+@pytest.fixture
+def new_tournament(tmp_db):
+    """create tournaments with registered players, in the temporary tables
+
+    Optional args (of the returned function):
+        n_players - int - players registered - default = 4
+        prefix - str - their ids are prefix + number, zero-padded to sort like
+            the numbers ("p0" ... or "p00" ...), created if missing - default = "p"
+        ratings - bool - rated 2000, 1999 ... in that order - default = False
+            (Player.DEFAULT_RATING)
+        started - bool - "In Progress", its first round paired - default = True
+        name, start_date, end_date, and any other Tournament arg - max_players
+            defaults to n_players
+    """
+
+    def new(n_players=4, prefix="p", ratings=False, started=True, name="Open",
+            start_date="2023-01-01", end_date="2023-12-31", **kwargs) -> Tournament:  # fmt: skip
+        t = Tournament(name, start_date, end_date,
+                       **{"max_players": n_players or Tournament.N_PLAYERS, **kwargs})  # fmt: skip
+        t.create()
+
+        width = len(str(n_players - 1))
+        player_ids = [f"{prefix}{i:0{width}d}" for i in range(n_players)]
+        for i, player_id in enumerate(player_ids):
+            if Player.read_one(player_id) is None:
+                rating = 2000 - i if ratings else Player.DEFAULT_RATING
+                Player("x", "y", player_id=player_id, rating=rating).create()
+        if player_ids:
+            t.add_players(player_ids)
+        if started:
+            t.update_status("In Progress")
+
+        return t
+
+    return new
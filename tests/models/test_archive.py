@@ -0,0 +1,85 @@
+import os
+
+from chess.models import archive
+from chess.models.ratings import Elo
+from chess.models.rounds import Round
+from chess.models.tournaments import Tournament
+
+
+def _tournament(tournament_id, end_date, status="Completed"):
+    """a tournament with one played round"""
+
+    t = Tournament(tournament_id, "2023-01-01", end_date, tournament_id=tournament_id)
+    t.status = status
+    t.player_id_list = ["a", "b"]
+    t.create()
+    t._add_round(0, [[["a", 1], ["b", 0]]])
+
+    return t
+
+
+class TestArchive:
+    def test_archive_completed(self, tmp_db):
+        """only completed tournaments leave the hot tables"""
+
+        _tournament("done", "2023-06-30")
+        _tournament("running", "2023-06-30", status="In Progress")
+
+        assert Tournament.archive_completed() == ["done"]
+
+        assert [t.tournament_id for t in Tournament.read_all()] == ["running"]
+        assert [d["round_id"] for d in Round.db.all()] == ["running_round_0"]
+        assert os.path.exists(tmp_db / "archive" / "2023.json.gz")
+
+    def test_read_through(self, tmp_db):
+        """archived tournaments and rounds are still readable"""
+
+        _tournament("done", "2024-01-31")
+        Tournament.archive_completed()
+
+        t = Tournament.search("done")
+        assert t.status == "Completed"
+        assert [r.round_id for r in t.rounds] == ["done_round_0"]
+        assert t.get_score("a") == 1
+        assert len(Tournament.read_all(include_archived=True)) == 1
+
+    def test_player_index_keeps_archived(self, tmp_db):
+        """archiving moves a tournament out of the table, not out of the player index"""
+
+        _tournament("done", "2024-01-31")
+        _tournament("running", "2024-01-31", status="In Progress")
+        assert Tournament.tournament_ids_of("a") == ["done", "running"]
+
+        Tournament.archive_completed()
+
+        assert sorted(Tournament.tournament_ids_of("a")) == ["done", "running"]
+
+    def test_archive_before(self, tmp_db):
+        """seasons are split by end date year, before filters them"""
+
+        _tournament("old", "2022-12-31")
+        _tournament("new", "2023-12-31")
+
+        assert Tournament.archive_completed(before="2023-01-01") == ["old"]
+        assert Tournament.archive_completed() == ["new"]
+        assert set(archive.load_index()["tournaments"].values()) == {"2022", "2023"}
+
+    def test_archived_copies(self, tmp_db):
+        """modifying a read tournament does not change the archive"""
+
+        _tournament("done", "2023-06-30")
+        Tournament.archive_completed()
+
+        Tournament.search("done").round_id_list.append("x")
+
+        assert Tournament.search("done").round_id_list == ["done_round_0"]
+
+    def test_recompute_includes_archive(self, tmp_db):
+        """ratings replay archived tournaments too"""
+
+        _tournament("done", "2023-06-30")
+        Tournament.archive_completed()
+
+        engine = Elo.recompute(Tournament.read_all(include_archived=True))
+
+        assert engine.ratings["a"] > engine.ratings["b"]
@@ -0,0 +1,60 @@
+import pytest
+
+from chess.models.bracket import Bracket, Step, seed_positions
+
+
+class TestBracket:
+    def test_seed_positions(self):
+        """1 and 2 in opposite halves, 1 to 4 in different quarters"""
+
+        assert seed_positions(8) == [1, 8, 4, 5, 2, 7, 3, 6]
+        positions = seed_positions(256)
+        assert sorted(positions) == list(range(1, 257))
+        assert positions.index(2) >= 128
+        assert len({positions.index(seed) // 64 for seed in (1, 2, 3, 4)}) == 4
+
+    def test_byes(self):
+        """the top seeds skip the first round"""
+
+        bracket = Bracket.seeded(["a", "b", "c", "d", "e"])
+
+        assert bracket.size == 8
+        assert bracket.stage_pairs(0) == [("a", None), ("d", "e"), ("b", None), ("c", None)]
+        assert bracket.path("b") == [Step(0, None, True), Step(1, "c", None)]
+        assert bracket.current_stage() == 0
+
+    def test_advance(self):
+        """winners go up stage by stage until the champion"""
+
+        players = [f"p{i:03d}" for i in range(256)]
+        bracket = Bracket.seeded(players)
+
+        for stage in range(bracket.n_stages):
+            assert bracket.current_stage() == stage
+            pairs = bracket.stage_pairs(stage)
+            assert len(pairs) == 128 >> stage
+            for upper, lower in pairs:
+                bracket.advance(max(upper, lower))  # the lower seed wins
+
+        assert bracket.current_stage() is None
+        assert bracket.champion == "p255"
+        assert len(bracket.path("p255")) == 8
+        assert bracket.path("p000") == [Step(0, "p255", False)]
+
+    def test_advance_refused(self):
+        """eliminated players, unknown players and unknown opponents"""
+
+        bracket = Bracket.seeded(["a", "b", "c", "d"])
+        bracket.advance("a")
+
+        for player in ("d", "a", "z"):
+            with pytest.raises(ValueError):
+                bracket.advance(player)
+
+    def test_shared_list(self):
+        """the bracket works on the saved list"""
+
+        nodes = Bracket.seeded(["a", "b"]).nodes
+        Bracket(nodes).advance("b")
+
+        assert Bracket(list(nodes)).champion == "b"
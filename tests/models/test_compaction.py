@@ -0,0 +1,106 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from chess.models import compaction, storage
+from chess.models.players import Player
+from chess.models.rounds import Round
+from chess.models.tournaments import Tournament
+
+
+def _fill_tables():
+    """a real tournament with 2 rounds, an orphan round and test data"""
+
+    Player("magnus", "carlsen", player_id="real").create()
+    Player("testabc", "testdef", player_id="test").create()
+
+    t = Tournament("Open", "2023-01-01", "2023-12-31", tournament_id="open")
+    t.player_id_list = ["real"]
+    t.create()
+    t._add_rounds([[], []])
+
+    Round(0, [], round_id="orphan").create()
+    Tournament("TestTournament_x", "2023-01-01", "2023-12-31").create()
+
+
+class TestCompaction:
+    def test_iter_documents_small_chunks(self, tmp_db, monkeypatch):
+        """documents are decoded even when split across chunks"""
+
+        _fill_tables()
+        monkeypatch.setattr(compaction, "CHUNK_SIZE", 5)
+
+        path = tmp_db / "rounds.json"
+        docs = [doc for _, _, doc in compaction.iter_documents(path)]
+
+        assert docs == list(json.load(open(path))["_default"].values())
+
+    def test_orphan_rounds_dropped(self, tmp_db):
+        """unreferenced rounds go, the rest stays"""
+
+        _fill_tables()
+        reports = compaction.compact(tmp_db)
+
+        assert [r["round_id"] for r in Round.db.all()] == ["open_round_0", "open_round_1"]
+        assert len(Player.read_all()) == 2
+        assert len(Tournament.read_all()) == 2
+        assert sum(r.bytes_reclaimed for r in reports) > 0
+
+    def test_drop_test_data(self, tmp_db):
+        """test players and tournaments are dropped, ids renumbered"""
+
+        _fill_tables()
+        compaction.compact(tmp_db, drop_test_data=True)
+
+        assert [p.player_id for p in Player.read_all()] == ["real"]
+        assert [t.tournament_id for t in Tournament.read_all()] == ["open"]
+
+        raw = json.load(open(tmp_db / "rounds.json"))
+        assert list(raw["_default"]) == ["1", "2"]
+
+    def test_stale_cache_removed(self, tmp_db):
+        """the cache file of a rewritten table is removed"""
+
+        _fill_tables()
+        storage.close_all()
+        Player.read_all()
+        assert (tmp_db / "players.json.cache").exists()
+
+        compaction.compact(tmp_db, drop_test_data=True)
+
+        assert not (tmp_db / "players.json.cache").exists()
+        assert [p.player_id for p in Player.read_all()] == ["real"]
+
+    def test_no_temporary_file_left(self, tmp_db):
+        """the rewrite replaces the files in place"""
+
+        _fill_tables()
+        compaction.compact(tmp_db)
+
+        assert sorted(p.name for p in tmp_db.iterdir()) == [
+            "players.json",
+            "rounds.json",
+            "tournaments.json",
+        ]
+
+    @pytest.mark.skipif(storage.fcntl is None, reason="no flock")
+    def test_other_process_keeps_writing(self, tmp_db):
+        """a process with the table open writes to the compacted file, not the old one"""
+
+        Player("magnus", "carlsen", player_id="p1").create()
+        Player("testabc", "testdef", player_id="p2").create()
+
+        env = dict(os.environ, CHESS_DATA_DIR=str(tmp_db))
+        command = [sys.executable, "-m", "chess.models.compaction", "--drop-test-data"]
+        subprocess.run(command, env=env, check=True, capture_output=True)
+
+        Player("hikaru", "nakamura", player_id="p3").create()
+
+        script = "from chess.models.players import Player; print([p.player_id for p in Player.read_all()])"
+        fresh = subprocess.run([sys.executable, "-c", script], env=env, check=True,
+                               capture_output=True, text=True)  # fmt: skip
+        assert fresh.stdout.strip() == "['p1', 'p3']"
+        assert [p.player_id for p in Player.read_all()] == ["p1", "p3"]
@@ -0,0 +1,321 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+from tinydb import where
+
+from chess.models import storage, tournaments
+from chess.models.concurrency import ConflictError, retry_on_conflict
+from chess.models.players import Player
+from chess.models.ratings import Elo
+from chess.models.rounds import Round
+from chess.models.stats import PlayerStats
+from chess.models.tournaments import Tournament
+
+# run in other processes : add 1 to max_players, N times, with retries
+INCREMENT = """
+import sys
+from chess.models.concurrency import retry_on_conflict
+from chess.models.tournaments import Tournament
+
+def increment():
+    t = Tournament.read_one("open")
+    t.max_players += 1
+    t.update()
+
+for _ in range(int(sys.argv[1])):
+    retry_on_conflict(increment, attempts=100, delay=0.001)
+"""
+
+# run in other processes : create N tournaments, no retry needed
+CREATE = """
+import sys
+from chess.models.tournaments import Tournament
+
+for i in range(int(sys.argv[1])):
+    Tournament("New", "2024-01-01", "2024-01-02", tournament_id=f"{sys.argv[2]}_{i}").create()
+"""
+
+
+class TestCompareAndSwap:
+    def test_version_bumped(self, new_tournament):
+        """every update bumps the version, saved with the document"""
+
+        t = new_tournament(0, started=False, tournament_id="open")
+        t.update()
+        t.update()
+
+        assert t.version == 2
+        assert Tournament.read_one("open").version == 2
+
+    def test_stale_update_refused(self, new_tournament):
+        """the second writer of the same version gets a conflict, nothing is lost"""
+
+        new_tournament(0, started=False, tournament_id="open")
+        first, second = Tournament.read_one("open"), Tournament.read_one("open")
+        first.name = "Open d'été"
+        first.update()
+
+        second.location = "Lyon"
+        with pytest.raises(ConflictError):
+            second.update()
+
+        saved = Tournament.read_one("open")
+        assert (saved.name, saved.location, saved.version) == ("Open d'été", "", 1)
+        assert second.version == 0
+
+    def test_rounds_and_players(self, tmp_db):
+        """same rule for rounds and players"""
+
+        Round(0, [], round_id="r").create()
+        Player("jean", "dupont", player_id="p").create()
+
+        for read in (lambda: Round.search_by("round_id", "r"), lambda: Player.read_one("p")):
+            first, second = read(), read()
+            first.update()
+            with pytest.raises(ConflictError):
+                second.update()
+
+    def test_update_ratings_bumps_version(self, tmp_db):
+        """a player read before a rating change can not overwrite it"""
+
+        Player("jean", "dupont", player_id="p").create()
+        stale = Player.read_one("p")
+
+        Player.update_ratings({"p": 1600.0})
+
+        with pytest.raises(ConflictError):
+            stale.update()
+        assert Player.read_one("p").rating == 1600.0
+
+    def test_legacy_document(self, tmp_db):
+        """documents saved without a version are version 0"""
+
+        Tournament.db.insert({"tournament_id": "old", "name": "Old", "start_date": "",
+                              "end_date": ""})  # fmt: skip
+
+        t = Tournament.read_one("old")
+        t.update()
+
+        assert Tournament.db.all()[0]["version"] == 1
+
+    def test_deleted_document(self, new_tournament):
+        """updating a deleted document is a conflict"""
+
+        t = new_tournament(0, started=False, tournament_id="open")
+        Tournament.read_one("open").delete()
+
+        with pytest.raises(ConflictError):
+            t.update()
+
+    def test_submit_results_one_unit(self, new_tournament):
+        """a stale tournament writes no round at all, the retry pairs once"""
+
+        t = new_tournament(tournament_id="open", tournament_format="swiss")
+        Tournament.read_one("open").update()  # t is now stale
+
+        with pytest.raises(ConflictError):
+            t.submit_results({1: "1-0", 2: "0-1"})
+        assert Round.read_many(t.round_id_list)[0].unfinished_boards() == [1, 2]
+        assert len(Round.db.all()) == 1
+
+        retry_on_conflict(
+            lambda: Tournament.read_one("open").submit_results({1: "1-0", 2: "0-1"})
+        )
+
+        saved = Tournament.read_one("open")
+        assert (saved.current_round_number, len(saved.round_id_list)) == (1, 2)
+        assert len(Round.db.all()) == 2
+
+    def test_submit_results_next_round_stale(self, new_tournament, monkeypatch):
+        """the next round changed elsewhere : no round written, the tournament untouched"""
+
+        t = new_tournament(tournament_id="open")
+        current, next_round = t.rounds[0], t.rounds[1]
+        check_version = tournaments.check_version
+
+        def other_writer_first(*args):
+            # another writer, once t read its rounds and before it locked the tables
+            Round.db.update({"version": next_round.version + 1},
+                            where("round_id") == next_round.round_id)  # fmt: skip
+            check_version(*args)
+
+        monkeypatch.setattr(tournaments, "check_version", other_writer_first)
+
+        with pytest.raises(ConflictError):
+            t.submit_results({1: "1-0", 2: "0-1"})
+
+        assert Round.read_many([current.round_id])[0].unfinished_boards() == [1, 2]
+        assert (t.current_round_number, t.version) == (0, Tournament.read_one("open").version)
+        assert (current.state, current.unfinished_boards()) == ("ongoing", [1, 2])
+
+    def test_submit_results_failed_save(self, new_tournament, monkeypatch):
+        """the tournament save fails : the tournament is back as it was read"""
+
+        t = new_tournament(tournament_id="open")
+        version = t.version
+
+        def failed(self):
+            raise ConflictError("open")
+
+        monkeypatch.setattr(Tournament, "update", failed)
+        with pytest.raises(ConflictError):
+            t.submit_results({1: "1-0", 2: "0-1"})
+
+        assert (t.current_round_number, t.version, t.status) == (0, version, "In Progress")
+        # the rounds are the ones on disk
+        on_disk = Round.read_many(t.round_id_list)
+        assert [r.version for r in t.rounds] == [r.version for r in on_disk]
+
+
+class TestRetry:
+    def test_retry_reapplies(self, new_tournament):
+        """the function is called again after a conflict"""
+
+        new_tournament(0, started=False, tournament_id="open")
+        stale = Tournament.read_one("open")
+        Tournament.read_one("open").update()
+        calls = []
+
+        def rename():
+            t = stale if not calls else Tournament.read_one("open")
+            calls.append(t.version)
+            t.name = "Renamed"
+            t.update()
+            return t.version
+
+        assert retry_on_conflict(rename, delay=0) == 2
+        assert calls == [0, 1]
+
+    def test_gives_up(self, tmp_db):
+        """the last conflict is raised"""
+
+        def always():
+            raise ConflictError("toujours")
+
+        with pytest.raises(ConflictError):
+            retry_on_conflict(always, attempts=3, delay=0)
+
+    def test_threads(self, new_tournament):
+        """concurrent writers all land"""
+
+        new_tournament(0, started=False, tournament_id="open")
+
+        def increment():
+            t = Tournament.read_one("open")
+            t.max_players += 1
+            t.update()
+
+        def worker():
+            for _ in range(10):
+                retry_on_conflict(increment, attempts=100, delay=0.001)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        t = Tournament.read_one("open")
+        assert (t.max_players, t.version) == (4 + 40, 40)
+
+    @pytest.mark.skipif(storage.fcntl is None, reason="no flock")
+    def test_processes(self, tmp_db, new_tournament):
+        """writers in other processes do not lose each other's updates"""
+
+        new_tournament(0, started=False, tournament_id="open")
+        env = dict(os.environ, CHESS_DATA_DIR=str(tmp_db))
+        processes = [
+            subprocess.Popen([sys.executable, "-c", INCREMENT, "15"], env=env)
+            for _ in range(3)
+        ]
+        assert [p.wait() for p in processes] == [0, 0, 0]
+
+        t = Tournament.read_one("open")
+        assert (t.max_players, t.version) == (4 + 45, 45)
+
+    @pytest.mark.skipif(storage.fcntl is None, reason="no flock")
+    def test_processes_with_inserts(self, tmp_db, new_tournament):
+        """inserts made meanwhile by other processes do not overwrite updates"""
+
+        new_tournament(0, started=False, tournament_id="open")
+        env = dict(os.environ, CHESS_DATA_DIR=str(tmp_db))
+        processes = [
+            subprocess.Popen([sys.executable, "-c", INCREMENT, "30"], env=env),
+            subprocess.Popen([sys.executable, "-c", CREATE, "30", "a"], env=env),
+            subprocess.Popen([sys.executable, "-c", CREATE, "30", "b"], env=env),
+        ]
+        assert [p.wait() for p in processes] == [0, 0, 0]
+
+        t = Tournament.read_one("open")
+        assert (t.max_players, t.version) == (4 + 30, 30)
+        assert len(Tournament.read_all()) == 1 + 60
+
+
+class TestRatings:
+    def test_only_entrants_bumped(self, tmp_db):
+        """completing a tournament leaves the other players' versions alone"""
+
+        for player_id in "abc":
+            Player("x", "y", player_id=player_id).create()
+        bystander = Player.read_one("c")
+        t = Tournament("Open", "2024-01-01", "2024-01-02", tournament_id="open",
+                       round_id_list=["r"])  # fmt: skip
+        Round(0, [[["a", 1], ["b", 0]]], round_id="r").create()
+
+        Elo.apply_tournament(t)
+
+        bystander.update()
+        assert [Player.read_one(i).version for i in "abc"] == [1, 1, 1]
+
+    def test_unchanged_rating_not_bumped(self, tmp_db):
+        """writing the same rating again is not a change"""
+
+        Player("jean", "dupont", player_id="p").create()
+        reader = Player.read_one("p")
+
+        Player.update_ratings({"p": Player.DEFAULT_RATING})
+
+        reader.update()
+        assert Player.read_one("p").version == 1
+
+    def test_completed_once(self, new_tournament):
+        """a conflict on the completing save rates nothing, the retry rates once"""
+
+        t = new_tournament(2, tournament_id="open")
+        Tournament.read_one("open").update()  # t is now stale
+
+        with pytest.raises(ConflictError):
+            t.submit_results({1: "1-0"})
+        assert Player.read_one("p0").rating == Player.DEFAULT_RATING
+        assert PlayerStats.read_many(["p0"])[0].tournaments == 0
+
+        retry_on_conflict(lambda: Tournament.read_one("open").submit_results({1: "1-0"}))
+
+        assert Tournament.read_one("open").status == "Completed"
+        assert Player.read_one("p0").rating == Player.DEFAULT_RATING + Elo.K_FACTOR / 2
+        assert PlayerStats.read_many(["p0"])[0].tournaments == 1
+
+    def test_failed_rating_done_again(self, new_tournament, monkeypatch):
+        """the rating fails after the completing save : the next update rates"""
+
+        t = new_tournament(2, tournament_id="open")
+        rate = Tournament._rate
+
+        def failed(self):
+            raise OSError("disque plein")
+
+        monkeypatch.setattr(Tournament, "_rate", failed)
+        with pytest.raises(OSError):
+            t.submit_results({1: "1-0"})
+        assert (t.status, Tournament.read_one("open").status) == ("Completed", "Completed")
+        assert Player.read_one("p0").rating == Player.DEFAULT_RATING
+
+        monkeypatch.setattr(Tournament, "_rate", rate)
+        t.update()
+        t.update()
+
+        assert Player.read_one("p0").rating == Player.DEFAULT_RATING + Elo.K_FACTOR / 2
+        assert PlayerStats.read_many(["p0"])[0].tournaments == 1
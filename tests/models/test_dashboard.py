@@ -0,0 +1,67 @@
+from chess.models.dashboard import events_of_the_day
+from chess.models.players import Player
+from chess.models.rounds import Round
+from chess.models.tournaments import Tournament
+
+
+class TestDashboard:
+    def test_events_of_the_day(self, new_tournament):
+        """running tournaments of the day only, with boards and results"""
+
+        t = new_tournament(name="open", start_date="2024-06-01", end_date="2024-06-03",
+                           prefix="a", location="Paris")  # fmt: skip
+        new_tournament(name="other", start_date="2024-05-31", end_date="2024-06-01", prefix="b")
+        new_tournament(name="later", start_date="2024-07-01", end_date="2024-07-02", prefix="c")
+        Tournament("not started", "2024-06-01", "2024-06-03").create()
+        t.submit_results({1: "1-0", 2: "1/2-1/2"})
+
+        events = events_of_the_day("2024-06-01")
+
+        assert sorted(e["name"] for e in events) == ["open", "other"]
+        event = next(e for e in events if e["name"] == "open")
+        assert event["location"] == "Paris"
+        assert event["round_number"] == 2
+        assert len(event["boards"]) == 2
+        first_board = event["boards"][0]
+        assert first_board["board"] == 1
+        assert first_board["white"]["name"] == "X Y"
+        assert first_board["result"] is None
+
+    def test_results_are_formatted(self, new_tournament):
+        """played boards show their result"""
+
+        t = new_tournament(name="open", start_date="2024-06-01", end_date="2024-06-03")
+        t.n_rounds = 1
+        t.update()
+        t.submit_results({1: "0-1", 2: "1/2-1/2"})
+        t.status = "In Progress"
+        t.current_round_number = 0
+        t.update()
+
+        (event,) = events_of_the_day("2024-06-02")
+
+        assert [b["result"] for b in event["boards"]] == ["0-1", "1/2-1/2"]
+
+    def test_reads_are_batched(self, new_tournament, monkeypatch):
+        """one read of rounds and one of players whatever the number of events"""
+
+        for i in range(3):
+            new_tournament(name=f"open {i}", start_date="2024-06-01", end_date="2024-06-03",
+                           prefix=f"p{i}_")  # fmt: skip
+
+        calls = []
+        for model in (Player, Round):
+            read_many = model.read_many
+            monkeypatch.setattr(
+                model,
+                "read_many",
+                lambda ids, read_many=read_many, model=model: calls.append(model)
+                or read_many(ids),
+            )
+        monkeypatch.setattr(Player, "read_one", None)
+
+        events = events_of_the_day("2024-06-02")
+
+        assert len(events) == 3
+        assert sorted(calls, key=str) == sorted([Player, Round], key=str)
+        assert all(board["black"]["rating"] == 1500 for e in events for board in e["boards"])
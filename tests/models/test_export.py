@@ -0,0 +1,83 @@
+import csv
+import json
+
+import pytest
+
+from chess.models import export, synthetic
+from chess.models.tournaments import Tournament
+
+
+@pytest.fixture
+def season(tmp_db):
+    """a few generated tournaments of every format"""
+
+    synthetic.generate(
+        n_players=60,
+        n_tournaments=6,
+        tournament_size=8,
+        formats=["round_robin", "swiss", "knockout"],
+    )
+
+    return tmp_db
+
+
+class TestExport:
+    def test_csv_results(self, season):
+        """one row per board, in tournament then round order"""
+
+        path = season / "results.csv"
+        assert export.export("csv", str(path)) == 6
+
+        with open(path, newline="") as handle:
+            rows = list(csv.DictReader(handle))
+
+        assert list(rows[0]) == export.RESULT_COLUMNS
+        assert len(rows) == 2 * (28 + 12 + 7)
+        assert {row["result"] for row in rows} <= {"1-0", "0-1", "1/2-1/2"}
+
+    def test_workers_keep_the_order(self, season):
+        """the thread pool writes the same file as a single worker"""
+
+        export.export("jsonl", str(season / "one.jsonl"), max_workers=1)
+        export.export("jsonl", str(season / "many.jsonl"), max_workers=8)
+
+        assert (season / "one.jsonl").read_text() == (season / "many.jsonl").read_text()
+
+    def test_jsonl_standings(self, season):
+        """points of the standings add up to the games played"""
+
+        path = season / "standings.jsonl"
+        export.export("jsonl", str(path), kind="standings")
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert len(lines) == 6
+        for doc in lines:
+            assert "results" not in doc
+            points = [row["points"] for row in doc["standings"]]
+            assert points == sorted(points, reverse=True)
+            assert [row["rank"] for row in doc["standings"]] == list(range(1, 9))
+
+    def test_trf(self, season):
+        """one fixed width report per tournament"""
+
+        folder = season / "trf"
+        export.export("trf", str(folder))
+
+        t = Tournament.read_all()[0]
+        lines = (folder / f"{t.tournament_id}.trf").read_text().splitlines()
+        players = [line for line in lines if line.startswith("001")]
+
+        assert lines[0] == f"012 {t.name}"
+        assert len(players) == 8
+        for line in players:
+            assert line[4:8].strip().isdigit()
+            # 7 rounds of 10 characters after the rank
+            assert len(line) == 89 + 7 * 10
+            assert line[96] in "wb"
+            assert line[98] in "10="
+
+    def test_unknown_format(self, season):
+        """only csv, jsonl and trf"""
+
+        with pytest.raises(ValueError):
+            export.export("xml", str(season / "out.xml"))
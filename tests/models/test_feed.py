@@ -0,0 +1,176 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from chess.models import feed as feed_module
+from chess.models.feed import ChangeFeed, listen
+from chess.models.rounds import Round
+from chess.models.tournaments import Tournament
+
+
+@pytest.fixture(autouse=True)
+def feed(monkeypatch):
+    monkeypatch.setattr(ChangeFeed, "_observers", [])
+    yield ChangeFeed
+    ChangeFeed.stop()
+
+
+class TestObservers:
+    def test_create_update_delete(self, new_tournament):
+        """every write of a tournament or a round is published, with its content"""
+
+        changes = []
+        ChangeFeed.subscribe(changes.append)
+
+        t = new_tournament(0, started=False, tournament_id="open")
+        t.name = "Open d'été"
+        t.update()
+        r = Round(0, [[["a", -1], ["b", -1]]], round_id="r")
+        r.create()
+        r.matches[0][0][1] = 1
+        r.update()
+        t.delete()
+
+        assert [(c.kind, c.action, c.id) for c in changes] == [
+            ("tournament", "created", "open"),
+            ("tournament", "updated", "open"),
+            ("round", "created", "r"),
+            ("round", "updated", "r"),
+            ("tournament", "deleted", "open"),
+        ]
+        assert changes[1].document["name"] == "Open d'été"
+        assert changes[2].document["matches"][0][0][1] == -1  # a copy, not the round
+        assert changes[3].document["version"] == 1
+        assert changes[4].document is None
+        assert [c.seq for c in changes] == sorted(c.seq for c in changes)
+
+    def test_kinds_and_unsubscribe(self, new_tournament):
+        """an observer only gets the kinds it asked for, until it unsubscribes"""
+
+        rounds = []
+        unsubscribe = ChangeFeed.subscribe(rounds.append, kinds=["round"])
+
+        new_tournament(0, started=False, tournament_id="open")
+        Round.create_many([Round(0, [], round_id="r0"), Round(1, [], round_id="r1")])
+        unsubscribe()
+        Round(2, [], round_id="r2").create()
+
+        assert [c.id for c in rounds] == ["r0", "r1"]
+        assert not ChangeFeed.active()
+
+    def test_failing_observer(self, new_tournament):
+        """an observer error never reaches the writer nor the other observers"""
+
+        changes = []
+        ChangeFeed.subscribe(lambda c: 1 / 0)
+        ChangeFeed.subscribe(changes.append)
+
+        new_tournament(0, started=False, tournament_id="open")
+
+        assert Tournament.read_one("open") is not None
+        assert len(changes) == 1
+
+
+class TestStreams:
+    def test_asyncio(self, new_tournament):
+        """async iteration over the changes of another thread"""
+
+        async def follow() -> list:
+            received = []
+            stream = ChangeFeed.changes()
+            waiting = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0)  # subscribed
+            threading.Thread(target=new_tournament, args=(0,), kwargs={"started": False}).start()
+            received.append(await asyncio.wait_for(waiting, 5))
+            await stream.aclose()
+            return received
+
+        received = asyncio.run(follow())
+
+        assert [(c.kind, c.action) for c in received] == [("tournament", "created")]
+        assert not ChangeFeed.active()
+
+    def test_socket(self, tmp_db, new_tournament):
+        """other processes read the changes as json lines on a unix socket"""
+
+        server = ChangeFeed.serve()
+        received = []
+
+        def client():
+            for change in listen(kinds=["tournament"]):
+                received.append(change)
+
+        thread = threading.Thread(target=client, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 5
+        while server.n_clients < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        t = new_tournament(0, started=False, tournament_id="open")
+        Round(0, [], round_id="r").create()
+        t.update()
+        ChangeFeed.stop()
+        thread.join(5)
+
+        assert [(c.action, c.id) for c in received] == [("created", "open"), ("updated", "open")]
+        assert received[1].document["version"] == 1
+        assert not (tmp_db / "feed.sock").exists()
+
+    def test_stop_keeps_observers(self, new_tournament):
+        """stopping the socket server leaves the other observers subscribed"""
+
+        changes = []
+        ChangeFeed.subscribe(changes.append)
+        ChangeFeed.serve()
+        ChangeFeed.stop()
+
+        new_tournament(0, started=False, tournament_id="open")
+
+        assert [(c.action, c.id) for c in changes] == [("created", "open")]
+
+    def test_socket_in_use(self, tmp_db):
+        """a socket left by a stopped server is replaced, a running one is not"""
+
+        path = str(tmp_db / "feed.sock")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as left:
+            left.bind(path)  # bound, nobody accepts : like a killed server
+
+        server = ChangeFeed.serve(path)
+        assert server.path == path
+
+        with pytest.raises(ValueError):
+            feed_module.FeedServer(path).start()
+        assert os.path.exists(path) and ChangeFeed._server is server
+
+    def test_slow_client(self, tmp_db, monkeypatch):
+        """a client that does not read never blocks the writers, nor gets half a line"""
+
+        monkeypatch.setattr(feed_module, "MAX_PENDING", 1 << 16)
+        server = ChangeFeed.serve()
+        slow = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        slow.connect(str(tmp_db / "feed.sock"))
+        deadline = time.monotonic() + 5
+        while server.n_clients < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        document = {"name": "x" * 50_000}  # lines larger than the socket buffer
+        for i in range(200):
+            ChangeFeed.publish("tournament", "updated", str(i), document)
+
+        data = b""
+        slow.settimeout(5)
+        while chunk := slow.recv(1 << 16):
+            data += chunk
+        slow.close()
+
+        lines = data.split(b"\n")
+        assert lines[-1] == b""  # dropped after a whole line
+        assert 0 < len(lines) - 1 < 200
+        assert [json.loads(line)["id"] for line in lines[:-1]] == [
+            str(i) for i in range(len(lines) - 1)
+        ]
@@ -0,0 +1,135 @@
+import pytest
+
+from chess.models.rounds import Round
+from chess.models.tournaments import Tournament
+
+
+def _play_current_round(t):
+    """first player of every board wins, then move to the next round"""
+
+    current_round = Round.search_by("round_id", t.round_id_list[t.current_round_number])
+    current_round.matches = [
+        [[a, 1], [b, 0]] if b is not None else [[a, score_a], [b, 0]]
+        for (a, score_a), (b, _) in current_round.matches
+    ]
+    current_round.update()
+    t._next_round()
+
+
+class TestFormats:
+    def test_invalid_format(self):
+        """unknown formats are refused"""
+
+        with pytest.raises(ValueError):
+            Tournament("t", "2023-01-01", "2023-12-31", tournament_format="blitz")
+
+    def test_max_players(self, new_tournament):
+        """max_players is set per tournament"""
+
+        t = new_tournament(6, ratings=True, started=False)
+
+        with pytest.raises(AttributeError):
+            t.add_player("one_too_many")
+
+    def test_round_robin(self, new_tournament):
+        """all rounds are created at start"""
+
+        t = new_tournament(10, ratings=True, started=False)
+        t.update_status("In Progress")
+
+        assert t.n_rounds == 9
+        assert len(t.round_id_list) == 9
+
+        for _ in range(9):
+            _play_current_round(t)
+
+        assert t.status == "Completed"
+        assert sum(t.scores().values()) == 45
+
+    def test_swiss(self, new_tournament):
+        """swiss rounds are paired one at a time, without rematches"""
+
+        t = new_tournament(65, ratings=True, started=False, tournament_format="swiss")
+        t.update_status("In Progress")
+
+        assert t.n_rounds == 7
+        assert len(t.round_id_list) == 1
+
+        for _ in range(7):
+            _play_current_round(t)
+
+        assert t.status == "Completed"
+        assert len(t.round_id_list) == 7
+
+        met = [
+            frozenset((a[0], b[0]))
+            for round_ in Round.read_many(t.round_id_list)
+            for a, b in round_.matches
+            if b[0] is not None
+        ]
+        assert len(met) == len(set(met))
+
+    def test_knockout(self, new_tournament):
+        """winners go through until the final"""
+
+        t = new_tournament(8, ratings=True, started=False, tournament_format="knockout")
+        t.update_status("In Progress")
+
+        for _ in range(3):
+            _play_current_round(t)
+
+        final = Round.read_many(t.round_id_list)[-1]
+        assert t.status == "Completed"
+        assert [[m[0][0], m[1][0]] for m in final.matches] == [["p0", "p1"]]
+
+    def test_knockout_byes(self, new_tournament):
+        """6 players : the 2 top seeds have a bye, then the bracket goes on"""
+
+        t = new_tournament(6, ratings=True, started=False, tournament_format="knockout")
+        t.update_status("In Progress")
+
+        first = Round.read_many(t.round_id_list)[0]
+        assert t.n_rounds == 3
+        assert [[m[0][0], m[1][0]] for m in first.matches] == [
+            ["p0", None], ["p3", "p4"], ["p1", None], ["p2", "p5"],
+        ]  # fmt: skip
+
+        for _ in range(3):
+            _play_current_round(t)
+
+        assert t.status == "Completed"
+        assert t.knockout_bracket.champion == "p0"
+        assert [step.opponent for step in t.knockout_bracket.path("p0")] == [
+            None, "p3", "p1",
+        ]  # fmt: skip
+
+    def test_knockout_tiebreak(self, new_tournament):
+        """a drawn game is replayed, colours reversed, before the next stage"""
+
+        t = new_tournament(4, ratings=True, started=False, tournament_format="knockout")
+        t.update_status("In Progress")
+
+        t.submit_results({1: "1/2-1/2", 2: "1-0"})
+
+        tiebreak = t.get_current_round()
+        assert [[m[0][0], m[1][0]] for m in tiebreak.matches] == [["p3", "p0"]]
+        assert t.n_rounds == 3
+
+        t.submit_results({1: "1-0"})
+        t.submit_results({1: "0-1"})
+
+        final = Round.read_many(t.round_id_list)[-1]
+        assert [[m[0][0], m[1][0]] for m in final.matches] == [["p3", "p1"]]
+        assert t.status == "Completed"
+        assert t.knockout_bracket.champion == "p1"
+        assert len(Tournament.read_one(t.tournament_id).round_id_list) == 3
+
+    def test_knockout_result_missing(self, new_tournament):
+        """the bracket only moves on played games"""
+
+        t = new_tournament(4, ratings=True, started=False, tournament_format="knockout")
+        t.update_status("In Progress")
+
+        with pytest.raises(ValueError):
+            t._next_round()
+        assert t.knockout_bracket.current_stage() == 0
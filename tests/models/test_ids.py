@@ -0,0 +1,80 @@
+import datetime
+
+from chess.models import ids
+from chess.models.players import Player
+from chess.models.rounds import Round
+from chess.models.tournaments import Tournament
+
+
+class TestIds:
+    def test_monotonic_and_unique(self):
+        """ids created in a row are strictly increasing"""
+
+        created = [ids.new_id() for _ in range(10000)]
+
+        assert created == sorted(created)
+        assert len(set(created)) == len(created)
+        assert all(len(i) == ids.LENGTH for i in created)
+
+    def test_round_trip(self):
+        """decode(encode(x)) == x, the date is read back"""
+
+        value = (1 << 127) + 12345
+        assert ids.decode(ids.encode(value)) == value
+
+        id_ = ids.make_id(ids.milliseconds("2024-03-01T12:00:00"), 42)
+        assert ids.created_at(id_) == datetime.datetime(
+            2024, 3, 1, 12, tzinfo=datetime.timezone.utc
+        )
+        assert ids.created_at(id_ + "_round_0") == ids.created_at(id_)
+
+    def test_old_ids(self):
+        """hex ids are still accepted but carry no date"""
+
+        assert not ids.is_ulid("02d62209")
+        assert ids.created_at("02d62209") is None
+        assert not ids.in_range("02d62209", ids.id_range("1970-01-01", "2100-01-01"))
+
+    def test_id_range(self):
+        """bounds include the start and exclude the end"""
+
+        bounds = ids.id_range("2024-01-01", "2024-02-01")
+        in_january = ids.make_id(ids.milliseconds("2024-01-31T23:59:59.999"), 7)
+        in_february = ids.make_id(ids.milliseconds("2024-02-01"), 0)
+
+        assert ids.in_range(ids.make_id(ids.milliseconds("2024-01-01"), 0), bounds)
+        assert ids.in_range(in_january, bounds)
+        assert not ids.in_range(in_february, bounds)
+
+
+class TestCreatedBetween:
+    def test_models_use_new_ids(self, tmp_db):
+        """default ids are ULIDs, round ids start with the tournament id"""
+
+        player = Player("new", "id")
+        t = Tournament("ids", "2024-01-01", "2024-01-31")
+        t.create()
+        t._add_round(0, [])
+
+        assert ids.is_ulid(player.player_id)
+        assert ids.is_ulid(t.tournament_id)
+        assert t.round_id_list[0].startswith(t.tournament_id)
+
+    def test_range_scan(self, tmp_db):
+        """models created in a period are found by id range"""
+
+        old = ids.make_id(ids.milliseconds("2020-06-01"), 1)
+        new = ids.make_id(ids.milliseconds("2024-06-01"), 1)
+        for player_id in (new, old, "02d62209"):
+            Player("x", "y", player_id=player_id).create()
+        Tournament("old", "2020-06-01", "2020-06-02", tournament_id=old).create()
+        Round(1, [], round_id=f"{old}_round_1").create()
+        Round(0, [], round_id=f"{old}_round_0").create()
+
+        assert [p.player_id for p in Player.created_between("2020-01-01", "2025-01-01")] == [
+            old,
+            new,
+        ]
+        assert [t.name for t in Tournament.created_between("2020-01-01", "2021-01-01")] == ["old"]
+        assert [r.round_number for r in Round.created_between("2020-01-01", "2021-01-01")] == [0, 1]
+        assert Player.created_between("2021-01-01", "2022-01-01") == []
@@ -0,0 +1,65 @@
+import json
+
+from chess.models import imports
+from chess.models.players import Player
+
+
+class TestImport:
+    def test_csv_import(self, tmp_db):
+        """names normalised, duplicates of the table and of the file skipped"""
+
+        Player("jean", "dupont", birthdate="1980-05-04").create()
+        path = tmp_db / "registrations.csv"
+        path.write_text(
+            "firstname,lastname,birthdate,rating\n"
+            "JEAN,Dupont,04/05/1980,\n"
+            "marie,curie,1967-11-07,1850\n"
+            " Marie , CURIE ,07/11/1967,1850\n"
+            "paul,,1990-01-01,\n"
+            "anne,martin,31/02/1990,\n"
+        )
+
+        report = imports.import_players(str(path), batch_size=1)
+
+        assert (report.rows, report.imported, report.duplicates, report.rejected) == (5, 1, 2, 2)
+        marie = Player.search_by("lastname", "CURIE")
+        assert len(marie) == 1
+        assert marie[0].firstname == "Marie"
+        assert marie[0].rating == 1850
+        assert Player.search_name("curie")[0].lastname == "CURIE"
+
+    def test_jsonl_batches(self, tmp_db, monkeypatch):
+        """one write per batch"""
+
+        path = tmp_db / "registrations.jsonl"
+        path.write_text(
+            "\n".join(
+                json.dumps({"firstname": f"p{i}", "lastname": "x", "birthdate": "2000-01-01"})
+                for i in range(25)
+            )
+            + "\nnot json\n"
+        )
+
+        writes = []
+        insert_multiple = Player.db.insert_multiple
+        monkeypatch.setattr(
+            Player.db, "insert_multiple", lambda docs: writes.append(1) or insert_multiple(docs)
+        )
+
+        report = imports.import_players(str(path), batch_size=10)
+
+        assert report.imported == 25
+        assert report.rejected == 1
+        assert len(writes) == 3
+        assert len(Player.read_all()) == 25
+
+    def test_dry_run(self, tmp_db):
+        """nothing written"""
+
+        path = tmp_db / "registrations.csv"
+        path.write_text("firstname,lastname\nada,lovelace\n")
+
+        report = imports.import_players(str(path), dry_run=True)
+
+        assert report.imported == 1
+        assert Player.read_all() == []
@@ -0,0 +1,110 @@
+from itertools import combinations
+
+from chess.models.pairings import (
+    PairingHistory,
+    berger_schedule,
+    pairs_to_matches,
+    swiss_pairs,
+)
+from chess.models.players import Player
+from chess.models.rounds import Round
+from chess.models.tournaments import Tournament
+
+
+class TestBerger:
+    def test_every_pair_meets_once(self):
+        """n players => n-1 rounds, every pair exactly once"""
+
+        players = [f"p{i}" for i in range(8)]
+        schedule = berger_schedule(players)
+
+        assert len(schedule) == 7
+        met = [frozenset(pair) for pairs in schedule for pair in pairs]
+        assert len(met) == len(set(met))
+        assert set(met) == {frozenset(c) for c in combinations(players, 2)}
+
+    def test_odd_number_of_players(self):
+        """a bye (None) is added and stored second"""
+
+        schedule = berger_schedule(["a", "b", "c"])
+
+        assert len(schedule) == 3
+        for pairs in schedule:
+            byes = [pair for pair in pairs if None in pair]
+            assert len(byes) == 1
+            assert byes[0][1] is None
+
+    def test_pairs_to_matches(self):
+        """matches start unplayed"""
+
+        assert pairs_to_matches([("a", "b")]) == [[["a", -1], ["b", -1]]]
+
+
+class TestPairingHistory:
+    def test_has_met_and_colours(self):
+        """pairs, colours and byes are recorded"""
+
+        history = PairingHistory(["a", "b", "c"])
+        history.add_round([[["a", 1], ["b", 0]], [["c", 1], [None, 0]]])
+        history.add_round([[["c", -1], ["a", -1]]])
+
+        assert history.has_met("a", "b") and history.has_met("b", "a")
+        assert not history.has_met("b", "c")
+        assert history.colours("a") == "WB"
+        assert history.colour_balance("c") == 1
+        assert history.byes == {"c"}
+
+    def test_unknown_players(self):
+        """players missing from the list are added on the fly"""
+
+        history = PairingHistory(["a"])
+        history.add_round([[["a", 1], ["late", 0]]])
+
+        assert history.has_met("late", "a")
+        assert not history.has_met("a", "nobody")
+
+    def test_swiss_pairs_avoid_rematch_and_balance_colours(self):
+        """a and b already met : a plays c, with black after a white"""
+
+        history = PairingHistory(["a", "b", "c", "d"])
+        history.add_round([[["a", 1], ["b", 0]], [["d", 0], ["c", 1]]])
+
+        assert swiss_pairs(["a", "b", "c", "d"], history) == [("c", "a"), ("b", "d")]
+
+    def test_tournament_history_follows_new_rounds(self, tmp_db, monkeypatch):
+        """the history is built once and updated by _add_round"""
+
+        t = Tournament("history", "2023-01-01", "2023-12-31")
+        t.player_id_list = ["a", "b", "c", "d"]
+        t.create()
+        t._add_round(0, [[["a", 1], ["b", 0]], [["c", 1], ["d", 0]]])
+        t.pairing_history
+
+        monkeypatch.setattr(Round, "read_many", None)
+        t._add_round(1, [[["a", -1], ["c", -1]], [["b", -1], ["d", -1]]])
+
+        assert t.pairing_history.has_met("a", "c")
+        assert t.pairing_history.colours("a") == "WW"
+
+
+class TestSeeding:
+    def test_start_seeds_and_schedules(self, tmp_db):
+        """players are sorted by rating and all rounds are created at once"""
+
+        t = Tournament("seeded", "2023-01-01", "2023-12-31")
+        t.create()
+        for i, rating in enumerate([1400, 1800, 1500, 2000]):
+            p = Player("x", "y", player_id=f"p{i}", rating=rating)
+            p.create()
+            t.add_player(p.player_id)
+
+        t.update_status("In Progress")
+
+        assert t.player_id_list == ["p3", "p1", "p2", "p0"]
+        assert len(t.round_id_list) == 3
+
+        first_round = Round.search_by("round_id", t.round_id_list[0])
+        assert [[m[0][0], m[1][0]] for m in first_round.matches] == [
+            ["p3", "p0"],
+            ["p1", "p2"],
+        ]
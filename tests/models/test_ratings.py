@@ -0,0 +1,78 @@
+import pytest
+
+from chess.models.players import Player
+from chess.models.ratings import Elo
+from chess.models.rounds import Round
+from chess.models.tournaments import Tournament
+
+
+def _completed_tournament(name, end_date, rounds):
+    """create a completed tournament with the given list of round matches"""
+
+    t = Tournament(name, "2023-01-01", end_date, status="Completed")
+    for i, matches in enumerate(rounds):
+        r = Round(i, matches, round_id=f"{t.tournament_id}_round_{i}")
+        r.create()
+        t.round_id_list.append(r.round_id)
+    t.create()
+
+    return t
+
+
+class TestElo:
+    def test_expected_score(self):
+        """equal ratings give 0.5 and both sides sum to 1"""
+
+        assert Elo.expected_score(1500, 1500) == 0.5
+        assert Elo.expected_score(1600, 1400) + Elo.expected_score(
+            1400, 1600
+        ) == pytest.approx(1)
+
+    def test_rate_batch_uses_ratings_before_round(self):
+        """a round is rated from pre round ratings"""
+
+        engine = Elo({"a": 1500, "b": 1500, "c": 1500})
+        engine.rate_batch([("a", "b", 1), ("b", "c", 1)])
+
+        assert engine.ratings["a"] == pytest.approx(1510)
+        assert engine.ratings["b"] == pytest.approx(1500)
+        assert engine.ratings["c"] == pytest.approx(1490)
+
+    def test_unplayed_matches_are_skipped(self):
+        """scores at -1 are not rated"""
+
+        r = Round(0, [[["a", -1], ["b", -1]], [["c", 1], ["d", 0]]])
+
+        assert Elo.games_from_round(r) == [("c", "d", 1.0)]
+
+    def test_recompute_is_chronological(self, tmp_db):
+        """replaying tournaments in order gives a deterministic result"""
+
+        for player_id in "abcd":
+            Player("x", "y", player_id=player_id).create()
+
+        _completed_tournament("late", "2024-01-01", [[[["b", 1], ["a", 0]]]])
+        _completed_tournament("early", "2023-01-01", [[[["a", 1], ["b", 0]]]])
+
+        engine = Elo.recompute(Tournament.read_all())
+        engine.save()
+
+        ratings = Player.read_ratings()
+        assert ratings["a"] < ratings["b"]
+        assert ratings["c"] == Player.DEFAULT_RATING
+
+    def test_apply_tournament(self, tmp_db):
+        """incremental update only moves the players of the tournament"""
+
+        for player_id in "abc":
+            Player("x", "y", player_id=player_id).create()
+
+        t = _completed_tournament("t", "2024-01-01", [[[["a", 0.5], ["b", 0.5]]]])
+        Player.update_ratings({"a": 1600.0})
+
+        Elo.apply_tournament(t)
+
+        ratings = Player.read_ratings()
+        assert ratings["a"] < 1600
+        assert ratings["b"] > Player.DEFAULT_RATING
+        assert ratings["c"] == Player.DEFAULT_RATING
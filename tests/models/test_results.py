@@ -0,0 +1,84 @@
+import pytest
+
+from chess.models.pairings import parse_result
+from chess.models.rounds import Round
+from chess.models.tournaments import Tournament
+
+
+class TestParseResult:
+    def test_legal(self):
+        assert parse_result("1-0") == (1, 0)
+        assert parse_result("1/2-1/2") == (0.5, 0.5)
+        assert parse_result((0, 1)) == (0, 1)
+
+    @pytest.mark.parametrize("result", ["2-0", (1, 1), (0.5, 0), "x", None])
+    def test_illegal(self, result):
+        with pytest.raises(ValueError):
+            parse_result(result)
+
+
+class TestSubmitResults:
+    def test_round_written_and_next_round(self, new_tournament):
+        """results are saved and the tournament moves on"""
+
+        t = new_tournament()
+        t.submit_results({1: "1-0", 2: "1/2-1/2"})
+
+        assert t.current_round_number == 1
+        saved = Round.search_by("round_id", t.round_id_list[0])
+        assert [[p[1] for p in m] for m in saved.matches] == [[1, 0], [0.5, 0.5]]
+        assert Tournament.read_one(t.tournament_id).current_round_number == 1
+
+    def test_all_or_nothing(self, new_tournament):
+        """one bad board and nothing is written"""
+
+        t = new_tournament()
+
+        with pytest.raises(ValueError) as error:
+            t.submit_results({1: "1-0", 2: (1, 1), 5: "0-1"})
+
+        assert "board 2" in str(error.value) and "board 5" in str(error.value)
+        assert t.current_round_number == 0
+        saved = Round.search_by("round_id", t.round_id_list[0])
+        assert all(p[1] == -1 for m in saved.matches for p in m)
+
+    def test_missing_board(self, new_tournament):
+        """every board needs a result"""
+
+        t = new_tournament()
+
+        with pytest.raises(ValueError):
+            t.submit_results({1: "1-0"})
+
+    def test_swiss_next_round_paired(self, new_tournament):
+        """the next swiss round is created with the results"""
+
+        t = new_tournament(5, tournament_format="swiss")
+        t.submit_results({1: "1-0", 2: "0-1"})
+
+        assert len(t.round_id_list) == 2
+        assert t.current_round_number == 1
+        assert t.get_current_round().round_number == 1
+
+    def test_full_tournament(self, new_tournament):
+        """the last round completes the tournament"""
+
+        t = new_tournament()
+        for _ in range(3):
+            t.submit_results({1: "1-0", 2: "0-1"})
+
+        assert t.status == "Completed"
+        with pytest.raises(ValueError):
+            t.submit_results({1: "1-0", 2: "0-1"})
+
+    def test_update_current_round_compatibility(self, new_tournament):
+        """the old entry point still works, with matches in any order"""
+
+        t = new_tournament()
+        (a, _), (b, _) = t.get_current_round().matches[0]
+        (c, _), (d, _) = t.get_current_round().matches[1]
+
+        t.update_current_round([[(b, 0), (a, 1)], [(c, 0.5), (d, 0.5)]])
+
+        assert t.current_round_number == 1
+        assert t.scores() == {a: 1, c: 0.5, d: 0.5}
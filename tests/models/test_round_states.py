@@ -0,0 +1,169 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from tinydb import where
+
+from chess.helpers import now
+from chess.models import storage
+from chess.models.rounds import FINISHED, ONGOING, PENDING, Round, RoundStates
+from chess.models.tournaments import Tournament
+
+# run in another process : results of the current round of a tournament
+SUBMIT = """
+import sys
+from chess.models.tournaments import Tournament
+
+Tournament.read_one(sys.argv[1]).submit_results({1: "1-0", 2: "0-1"})
+"""
+
+
+class TestRoundStates:
+    def test_lifecycle(self, new_tournament):
+        """pending, ongoing then finished, with timestamps"""
+
+        t = new_tournament(tournament_id="open")
+        rounds = Round.read_many(t.round_id_list)
+
+        assert [r.status for r in rounds] == [ONGOING, PENDING, PENDING]
+        assert rounds[0].started_at is not None and rounds[1].started_at is None
+        assert t.unfinished_boards() == [1, 2]
+
+        t.submit_results({1: "1-0", 2: "0-1"})
+
+        first, second, _ = Round.read_many(t.round_id_list)
+        assert (first.status, second.status) == (FINISHED, ONGOING)
+        assert first.finished_at[:10] == now()[:10]
+        assert t.get_current_round().round_id == second.round_id
+        assert t.unfinished_boards() == [1, 2]
+
+    def test_keyed_lookups(self, new_tournament, monkeypatch):
+        """current round and rounds finished today without reading the table"""
+
+        a = new_tournament(prefix="a_p", tournament_id="a")
+        b = new_tournament(prefix="b_p", tournament_id="b", tournament_format="swiss")
+        a.submit_results({1: "1-0", 2: "1-0"})
+        b.submit_results({1: "1/2-1/2", 2: "1-0"})
+        states = Round.states()
+
+        def no_scan():
+            raise AssertionError("table read")
+
+        monkeypatch.setattr(Round.db, "all", no_scan)
+
+        assert states.current("a") == a.round_id_list[1]
+        assert states.current("b") == b.round_id_list[1]
+        assert states.round_ids("a", PENDING) == [a.round_id_list[2]]
+        assert states.finished_on(now()[:10]) == [a.round_id_list[0], b.round_id_list[0]]
+        assert states.finished_on("2000-01-01") == []
+
+    def test_completed(self, new_tournament):
+        """every round finished, the last one stays the current one"""
+
+        t = new_tournament(2, tournament_id="open")
+        t.submit_results({1: "1-0"})
+
+        assert t.status == "Completed"
+        assert Round.states().current("open") is None
+        assert t.get_current_round().round_id == t.round_id_list[-1]
+        assert t.unfinished_boards() == []
+        assert [r.round_id for r in Round.finished_on()] == t.round_id_list
+
+    def test_other_process(self, tmp_db, new_tournament):
+        """rounds advanced by another process : the index is rebuilt"""
+
+        t = new_tournament(tournament_id="open")
+        assert t.get_current_round().round_id == t.round_id_list[0]
+
+        env = dict(os.environ, CHESS_DATA_DIR=str(tmp_db))
+        subprocess.run([sys.executable, "-c", SUBMIT, "open"], env=env, check=True)
+
+        t = Tournament.read_one("open")
+        assert t.current_round_number == 1
+        assert t.get_current_round().round_id == t.round_id_list[1]
+        assert t.unfinished_boards() == [1, 2]
+
+    def test_rounds_follow_other_process(self, tmp_db, new_tournament):
+        """rounds cached on a tournament are read again after another process wrote"""
+
+        t = new_tournament(tournament_id="open")
+        assert t.rounds[0].state == ONGOING
+
+        env = dict(os.environ, CHESS_DATA_DIR=str(tmp_db))
+        subprocess.run([sys.executable, "-c", SUBMIT, "open"], env=env, check=True)
+
+        assert [r.state for r in t.rounds] == [FINISHED, ONGOING, PENDING]
+
+    def test_rounds_kept_per_tournament(self, new_tournament, monkeypatch):
+        """rounds of a tournament not read again for its own writes or another tournament's"""
+
+        a = new_tournament(prefix="a_p", tournament_id="a")
+        b = new_tournament(prefix="b_p", tournament_id="b")
+        a.rounds, b.rounds
+        read = []
+        read_many = Round.read_many
+        monkeypatch.setattr(Round, "read_many", lambda ids: read.append(ids) or read_many(ids))
+
+        b.submit_results({1: "1-0", 2: "0-1"})
+        a.submit_results({1: "1-0", 2: "0-1"})
+
+        assert [r.state for r in a.rounds] == [FINISHED, ONGOING, PENDING]
+        assert [r.state for r in b.rounds] == [FINISHED, ONGOING, PENDING]
+        assert read == []
+
+        # written by another instance : only that round is read again
+        Tournament.read_one("a").submit_results({1: "1-0", 2: "0-1"})
+        read.clear()
+        assert [r.state for r in a.rounds] == [FINISHED, FINISHED, ONGOING]
+        assert read == [a.round_id_list[1:]]
+
+    def test_index_not_ongoing_on_disk(self, new_tournament):
+        """an ongoing round of the index finished on disk : current_round_number"""
+
+        t = new_tournament(tournament_id="open")
+        Round.states()
+        first = Round.read_many(t.round_id_list)[0]
+        first.finish()
+        # written behind the index, like a write it could not notice
+        Round.db.update({"status": first.status}, where("round_id") == first.round_id)
+        Round._states._key = storage.table_key(Round.db)
+
+        assert Round.states().current("open") == first.round_id
+        t.current_round_number = 1
+        assert t.get_current_round().round_id == t.round_id_list[1]
+
+    def test_legacy_rounds(self, tmp_db):
+        """rounds saved with "Created" are pending, current_round_number decides"""
+
+        Round(0, [], round_id="old_round_0", status="Created").create()
+        Round(1, [], round_id="old_round_1", status="Created").create()
+        t = Tournament("Old", "2023-01-01", "2023-01-02", tournament_id="old",
+                       round_id_list=["old_round_0", "old_round_1"],
+                       current_round_number=1, status="In Progress")  # fmt: skip
+
+        assert Round.states().round_ids("old", PENDING) == ["old_round_0", "old_round_1"]
+        assert t.get_current_round().round_id == "old_round_1"
+
+    def test_transitions_refused(self, tmp_db):
+        """a round starts once and finishes once"""
+
+        r = Round(0, [])
+        r.start()
+        with pytest.raises(ValueError):
+            r.start()
+        r.finish()
+        with pytest.raises(ValueError):
+            r.finish()
+
+    def test_index_follows_updates(self):
+        """a round moves between states, the index keeps one entry"""
+
+        states = RoundStates()
+        doc = {"round_id": "t_round_0", "round_number": 0, "status": ONGOING}
+        states.add(doc)
+        states.add(dict(doc, status=FINISHED, finished_at="2024-05-01_12:00:00"))
+
+        assert states.current("t") is None
+        assert states.round_ids("t", FINISHED) == ["t_round_0"]
+        assert states.finished_on("2024-05-01") == ["t_round_0"]
@@ -0,0 +1,124 @@
+import os
+import subprocess
+import sys
+
+from chess.models.players import Player
+from chess.models.search import NameIndex, normalize
+
+
+def _names(players):
+    return [(p.firstname, p.lastname) for p in players]
+
+
+class TestNameIndex:
+    def test_normalize(self):
+        """case and accents are ignored"""
+
+        assert normalize("Élodie DURAND") == "elodie durand"
+
+    def test_prefix_and_ranking(self):
+        """exact tokens rank before prefixes"""
+
+        index = NameIndex(
+            [
+                {"player_id": "1", "firstname": "Jean", "lastname": "DUPONTEL"},
+                {"player_id": "2", "firstname": "Jean", "lastname": "DUPONT"},
+                {"player_id": "3", "firstname": "Marc", "lastname": "DURAND"},
+            ]
+        )
+
+        assert [d["player_id"] for d in index.search("dupont")] == ["2", "1"]
+        assert [d["player_id"] for d in index.search("jean dup")] == ["2", "1"]
+        assert index.search("du", limit=1)[0]["player_id"] in {"1", "2", "3"}
+
+    def test_fuzzy(self):
+        """a typo still finds the player"""
+
+        index = NameIndex([{"player_id": "1", "firstname": "Magnus", "lastname": "CARLSEN"}])
+
+        assert [d["player_id"] for d in index.search("carlsne")] == ["1"]
+
+    def test_fuzzy_overlap(self):
+        """candidates share enough trigrams of the query, however common they are"""
+
+        docs = [{"player_id": str(i), "firstname": "Laurent", "lastname": f"DUP{i:03}"}
+                for i in range(300)]  # fmt: skip
+        docs.append({"player_id": "x", "firstname": "Jean", "lastname": "DUPONT"})
+        index = NameIndex(docs)
+
+        assert index.search("dupnt")[0]["player_id"] == "x"
+        assert index.search("jaen dupont")[0]["player_id"] == "x"
+        assert index.search("zzzzz") == []
+
+    def test_bounded_scan(self):
+        """a player is found among more namesakes than a query looks at"""
+
+        docs = [{"player_id": f"{i:05}", "firstname": "Laurent", "lastname": "MARTIN"}
+                for i in range(NameIndex.MAX_SCAN * 2)]  # fmt: skip
+        docs.append({"player_id": "x", "firstname": "Laurent", "lastname": "DURAND"})
+        index = NameIndex(docs)
+
+        assert [d["player_id"] for d in index.search("laurent durand")] == ["x"]
+        assert [d["player_id"] for d in index.search("laurnt durand")] == ["x"]
+        assert len(index.search("laurent", limit=500)) == NameIndex.MAX_CANDIDATES
+
+    def test_same_player_twice(self):
+        """the last document of a player wins, in bulk too"""
+
+        index = NameIndex(
+            [
+                {"player_id": "1", "firstname": "Anna", "lastname": "USHENINA"},
+                {"player_id": "1", "firstname": "Anna", "lastname": "MUZYCHUK"},
+            ]
+        )
+
+        assert index.search("ushenina") == []
+        assert [d["lastname"] for d in index.search("anna")] == ["MUZYCHUK"]
+
+    def test_remove(self):
+        """removed players are not found anymore"""
+
+        index = NameIndex([{"player_id": "1", "firstname": "Anna", "lastname": "USHENINA"}])
+        index.remove("1")
+
+        assert index.search("anna") == []
+        assert len(index) == 0
+
+
+class TestPlayerSearchName:
+    def test_index_follows_create_and_update(self, tmp_db):
+        """create and update keep the index in sync"""
+
+        Player("jean", "dupont", player_id="1").create()
+        assert _names(Player.search_name("dupo")) == [("Jean", "DUPONT")]
+
+        p = Player("marie", "curie", player_id="2")
+        p.create()
+        assert _names(Player.search_name("CUR")) == [("Marie", "CURIE")]
+
+        p.lastname = "SKLODOWSKA"
+        p.update()
+        assert Player.search_name("curie") == []
+        assert _names(Player.search_name("sklo")) == [("Marie", "SKLODOWSKA")]
+
+    def test_index_follows_other_process(self, tmp_db):
+        """players created by another process are found"""
+
+        Player("jean", "dupont", player_id="1").create()
+        assert len(Player.search_name("dupont")) == 1
+
+        env = dict(os.environ, CHESS_DATA_DIR=str(tmp_db))
+        script = "from chess.models.players import Player; Player('paul', 'dupont').create()"
+        subprocess.run([sys.executable, "-c", script], env=env, check=True)
+
+        assert _names(Player.search_name("dupont")) == [("Jean", "DUPONT"), ("Paul", "DUPONT")]
+
+    def test_ratings_in_index(self, tmp_db):
+        """a search returns the rating written by update_ratings"""
+
+        Player("jean", "dupont", player_id="1").create()
+        Player.search_name("dupont")
+
+        Player.update_ratings({"1": 1700.0})
+
+        assert Player.search_name("dupont")[0].rating == 1700.0
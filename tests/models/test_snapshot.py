@@ -0,0 +1,115 @@
+import pytest
+
+from chess.models import snapshot as snapshot_module
+from chess.models.rounds import Round
+from chess.models.snapshot import Snapshot, export_history, export_rounds
+
+
+def _rounds(n):
+    return [
+        Round(
+            i % 7,
+            [[[f"p{i}", 1], [f"p{i + 1}", 0]], [[f"p{i + 2}", 0.5], [None, 0]]],
+            round_id=f"t{i // 7}_round_{i % 7}",
+            status="Finished",
+        )
+        for i in range(n)
+    ]
+
+
+class TestSnapshot:
+    def test_round_trip(self, tmp_path):
+        """every round can be read back by id"""
+
+        rounds = _rounds(50)
+        path = tmp_path / "rounds.snap"
+        assert export_rounds(path, rounds) == 50
+
+        with Snapshot(path) as snapshot:
+            assert len(snapshot) == 50
+            for round_ in rounds:
+                same = snapshot.get(round_.round_id)
+                assert same.round_number == round_.round_number
+                assert same.status == "Finished"
+                assert same.matches == round_.matches
+
+    def test_missing_and_order(self, tmp_path):
+        """unknown ids give None, iteration is sorted by round_id"""
+
+        path = tmp_path / "rounds.snap"
+        export_rounds(path, _rounds(10))
+
+        with Snapshot(path) as snapshot:
+            assert snapshot.get("nope") is None
+            assert snapshot.get("a" * 100) is None
+            ids = [r.round_id for r in snapshot]
+            assert ids == sorted(ids)
+            assert [r.round_id for r in snapshot.read_many(["t1_round_0", "x"])] == [
+                "t1_round_0"
+            ]
+
+    def test_empty(self, tmp_path):
+        """an empty snapshot is valid"""
+
+        path = tmp_path / "rounds.snap"
+        export_rounds(path, [])
+
+        with Snapshot(path) as snapshot:
+            assert len(snapshot) == 0
+            assert snapshot.get("t0_round_0") is None
+
+    def test_crash_keeps_previous(self, tmp_path, monkeypatch):
+        """a failed export leaves the previous snapshot, and no temporary file"""
+
+        path = tmp_path / "rounds.snap"
+        export_rounds(path, _rounds(3))
+
+        pad = snapshot_module._pad
+
+        def full_disk(value, width):
+            # fails with the players section, the header is already written
+            if value.startswith("p"):
+                raise OSError("disque plein")
+            return pad(value, width)
+
+        monkeypatch.setattr(snapshot_module, "_pad", full_disk)
+        with pytest.raises(OSError):
+            export_rounds(path, _rounds(10))
+        monkeypatch.undo()
+
+        with Snapshot(path) as snapshot:
+            assert len(snapshot) == 3
+        assert [p.name for p in tmp_path.iterdir()] == ["rounds.snap"]
+
+    def test_old_matches_skipped(self, tmp_path, caplog):
+        """matches that are not a pair of [id, score] sides are skipped and counted"""
+
+        side = [["p1", 1], ["p2", 0], ["p3", 1], ["p4", 0]]
+        matches = [
+            [side, side],
+            [["p1", 1], ["p2", 0], ["p3", 1], ["p4", 0]],
+            [["p1", 1], ["p2", 0]],
+        ]
+        path = tmp_path / "rounds.snap"
+
+        assert export_rounds(path, [Round(0, matches, round_id="old_round_0")]) == 1
+        with Snapshot(path) as snapshot:
+            assert snapshot.get("old_round_0").matches == [[["p1", 1], ["p2", 0]]]
+        assert "2 matches that are not pairs" in caplog.text
+
+    def test_not_a_snapshot(self, tmp_path):
+        """other files are refused"""
+
+        path = tmp_path / "rounds.json"
+        path.write_bytes(b"{}" * 40)
+
+        with pytest.raises(ValueError):
+            Snapshot(path)
+
+    def test_export_history(self, tmp_db):
+        """the rounds table is exported"""
+
+        Round.create_many(_rounds(3))
+        path = tmp_db / "rounds.snap"
+
+        assert export_history(path) == 3
@@ -0,0 +1,61 @@
+import pytest
+
+from chess.models.players import Player
+from chess.models.stats import PlayerStats, main
+
+
+def _play(t, results):
+    """complete a round-robin tournament with the results of every round"""
+
+    for round_results in results:
+        t.submit_results(round_results)
+
+    return t
+
+
+class TestPlayerStats:
+    def test_updated_on_completion(self, new_tournament):
+        """completing a tournament adds it to the career of its players"""
+
+        _play(new_tournament(end_date="2023-06-01"), [{1: "1-0", 2: "1/2-1/2"}] * 3)
+
+        stats = {s.player_id: s for s in PlayerStats.read_many(["p0", "p1", "p2", "p3"])}
+        assert all(s.tournaments == 1 and s.games == 3 for s in stats.values())
+        assert sum(s.points for s in stats.values()) == 6
+        assert sum(s.wins for s in stats.values()) == sum(s.losses for s in stats.values()) == 3
+        assert sum(s.draws for s in stats.values()) == 6
+        assert stats["p0"].average_opponent == Player.DEFAULT_RATING
+
+    def test_performance(self):
+        """average opponent rating +/- 400 per win / loss"""
+
+        s = PlayerStats("a", games=4, wins=3, draws=1, opponents_rating=4 * 1600)
+
+        assert s.performance == pytest.approx(1900)
+        assert PlayerStats("b").performance is None
+
+    def test_unknown_player(self, tmp_db):
+        """empty statistics for a player without completed tournaments"""
+
+        assert PlayerStats.read_one("nobody").tournaments == 0
+
+    def test_rebuild_matches_incremental(self, new_tournament):
+        """the rebuild command gives back what was maintained incrementally"""
+
+        player_ids = ["p0", "p1", "p2", "p3"]
+        first = new_tournament(name="first", end_date="2023-06-01")
+        _play(first, [{1: "1-0", 2: "0-1"}] * 3)
+        second = new_tournament(name="second", end_date="2023-07-01")
+        _play(second, [{1: "1/2-1/2", 2: "1-0"}] * 3)
+        incremental = {s.player_id: s.to_dict() for s in PlayerStats.read_many(player_ids)}
+
+        PlayerStats.delete_all()
+        main([])
+        rebuilt = {s.player_id: s.to_dict() for s in PlayerStats.read_many(player_ids)}
+
+        for player_id in player_ids:
+            assert rebuilt[player_id]["tournaments"] == 2
+            assert rebuilt[player_id]["points"] == incremental[player_id]["points"]
+            assert rebuilt[player_id]["opponents_rating"] == pytest.approx(
+                incremental[player_id]["opponents_rating"]
+            )
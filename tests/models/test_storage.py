@@ -0,0 +1,180 @@
+import os
+import subprocess
+import sys
+
+from chess.models import storage
+from chess.models.players import Player
+
+
+class TestLazyStorage:
+    def test_import_does_no_io(self, tmp_path):
+        """importing the models opens no file"""
+
+        env = dict(os.environ, CHESS_DATA_DIR=str(tmp_path))
+        code = "import chess.models.tournaments, chess.models.ratings"
+        subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+        assert os.listdir(tmp_path) == []
+
+    def test_table_opened_on_first_access(self, tmp_db):
+        """the json file is created on first use, in the data dir"""
+
+        assert not (tmp_db / "players.json").exists()
+
+        Player("first", "access").create()
+
+        assert (tmp_db / "players.json").exists()
+        assert len(Player.read_all()) == 1
+
+    def test_set_data_dir(self, tmp_db, tmp_path_factory):
+        """tables are reopened in the new folder"""
+
+        Player("first", "folder").create()
+
+        other = tmp_path_factory.mktemp("other")
+        storage.set_data_dir(other)
+
+        assert Player.read_all() == []
+
+
+class TestTableCache:
+    def test_cache_file_reused_by_new_process(self, tmp_db, monkeypatch):
+        """an unchanged table is not parsed again by another storage"""
+
+        Player("cached", "table").create()
+        storage.close_all()
+
+        Player.read_all()
+        assert (tmp_db / "players.json.cache").exists()
+        storage.close_all()
+
+        monkeypatch.setattr(storage.json, "loads", None)
+        assert [p.lastname for p in Player.read_all()] == ["TABLE"]
+
+    def test_changed_file_is_parsed(self, tmp_db):
+        """a table written by someone else invalidates the cache"""
+
+        Player("first", "player").create()
+        Player.read_all()
+        storage.close_all()
+
+        (tmp_db / "players.json").write_text(
+            '{"_default": {"1": {"player_id": "x", "firstname": "Other", '
+            '"lastname": "ONE", "birthdate": "1970-01-01"}}}'
+        )
+
+        assert [p.firstname for p in Player.read_all()] == ["Other"]
+
+    def test_reads_are_copies(self, tmp_db):
+        """modifying what was read does not modify the cache"""
+
+        Player("first", "player").create()
+
+        Player.db.all()[0]["firstname"] = "Changed"
+
+        assert Player.read_all()[0].firstname == "First"
+
+    def test_broken_cache_file_is_ignored(self, tmp_db):
+        """a truncated cache file is rebuilt"""
+
+        Player("first", "player").create()
+        storage.close_all()
+        Player.read_all()
+        storage.close_all()
+
+        (tmp_db / "players.json.cache").write_bytes(b"CHTC")
+
+        assert len(Player.read_all()) == 1
+
+    def test_same_tick_write_seen_under_lock(self, tmp_db):
+        """size and mtime unchanged : the lock checks the content hash"""
+
+        Player("first", "player", player_id="p").create()
+        path = tmp_db / "players.json"
+        stat = path.stat()
+        path.write_text(path.read_text().replace('"First"', '"Other"'))
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        assert Player.read_one("p").firstname == "First"  # size and mtime only
+        with Player.db.storage.locked():
+            assert Player.read_one("p").firstname == "Other"
+
+    def test_write_path_skips_cache_file(self, tmp_db):
+        """writes, and reads under the lock, never write the cache file"""
+
+        Player("first", "player", player_id="p").create()
+        Player.read_one("p").update()
+
+        assert not (tmp_db / "players.json.cache").exists()
+
+
+class TestTableWriter:
+    def test_open_table_follows_new_file(self, tmp_db):
+        """a table opened before the replace reads and writes the new file"""
+
+        Player("first", "player", player_id="p1").create()
+        with storage.TableWriter(str(tmp_db / "players.json")) as writer:
+            writer.write(Player("second", "player", player_id="p2").to_dict())
+        Player("third", "player", player_id="p3").create()
+
+        script = "from chess.models.players import Player; print(len(Player.read_all()))"
+        env = dict(os.environ, CHESS_DATA_DIR=str(tmp_db))
+        fresh = subprocess.run([sys.executable, "-c", script], env=env, check=True,
+                               capture_output=True, text=True)  # fmt: skip
+        assert fresh.stdout.strip() == "2"
+        assert [p.player_id for p in Player.read_all()] == ["p2", "p3"]
+
+
+class _Index(dict):
+    """player_id => firstname, with the ids applied"""
+
+    def __init__(self, docs):
+        super().__init__((d["player_id"], d["firstname"]) for d in docs)
+        self.applied = []
+
+    def add(self, doc):
+        self.applied.append(doc["player_id"])
+        self[doc["player_id"]] = doc["firstname"]
+
+    def remove(self, doc_id):
+        self.applied.append(doc_id)
+        self.pop(doc_id, None)
+
+
+def _other_process(tmp_db, code):
+    script = f"from tinydb import where; from chess.models.players import Player; {code}"
+    env = dict(os.environ, CHESS_DATA_DIR=str(tmp_db))
+    subprocess.run([sys.executable, "-c", script], env=env, check=True)
+
+
+class TestTableIndex:
+    def test_other_process_changes_applied(self, tmp_db, monkeypatch):
+        """after a write of another process only the changed documents are applied"""
+
+        monkeypatch.setattr(storage.TableIndex, "SLICE", 2)
+        index = storage.TableIndex("player_id", _Index)
+        for i in range(5):
+            Player(f"player{i}", "test", player_id=f"p{i}").create()
+        assert len(index.get(Player.db)) == 5
+
+        _other_process(tmp_db, "Player('third', 'player', player_id='p5').create()")
+        assert index.get(Player.db)["p5"] == "Third"
+        _other_process(tmp_db, "Player.db.remove(where('player_id') == 'p1')")
+        assert "p1" not in index.get(Player.db)
+
+        # p2 to p4 moved one place up : compared by id, not applied again
+        assert index.get(Player.db).applied == ["p5", "p1"]
+
+    def test_own_write_then_other_process(self, tmp_db):
+        """a document this process wrote and another one removed leaves the index"""
+
+        index = storage.TableIndex("player_id", _Index)
+        index.get(Player.db)
+        _other_process(tmp_db, "Player('other', 'player', player_id='p0').create()")
+        player = Player("first", "player", player_id="p1")
+        player.create()
+        index.wrote(Player.db, [player.to_dict()])
+
+        _other_process(tmp_db, "Player.db.remove(where('player_id') == 'p1')")
+
+        assert index.get(Player.db) == {"p0": "Other"}
@@ -0,0 +1,66 @@
+from chess.models import synthetic
+from chess.models.players import Player
+from chess.models.rounds import Round
+from chess.models.tournaments import Tournament
+
+
+class TestSynthetic:
+    def test_same_seed_same_data(self, tmp_db, tmp_path_factory):
+        """generation is reproducible, another seed gives other data"""
+
+        files = {}
+        for name, seed in (("a", 1), ("b", 1), ("c", 2)):
+            folder = tmp_path_factory.mktemp(name)
+            synthetic.generate(folder, n_players=50, n_tournaments=6, seed=seed)
+            files[name] = [(folder / t).read_text() for t in ("players.json", "rounds.json")]
+
+        assert files["a"] == files["b"]
+        assert files["a"] != files["c"]
+
+    def test_tables_are_readable(self, tmp_db):
+        """the models read the generated tables, tournaments are complete"""
+
+        report = synthetic.generate(
+            n_players=40,
+            n_tournaments=3,
+            tournament_size=8,
+            formats=["round_robin", "swiss", "knockout"],
+        )
+
+        assert len(Player.read_all()) == 40
+        tournaments = Tournament.read_all()
+        assert [t.tournament_format for t in tournaments] == ["round_robin", "swiss", "knockout"]
+        assert report.rounds == 7 + 3 + 3
+        assert report.games == 28 + 12 + 7
+
+        for t in tournaments:
+            assert t.status == "Completed"
+            assert len(t.rounds) == t.n_rounds
+            assert sum(t.scores().values()) == sum(len(r.matches) for r in t.rounds)
+            for round_ in t.rounds:
+                seated = [p for match in round_.matches for p, _ in match if p]
+                assert len(seated) == len(set(seated))
+
+        # knockout : half the players leave at every round
+        assert [len(r.matches) for r in tournaments[2].rounds] == [4, 2, 1]
+
+    def test_knockout_byes(self, tmp_db):
+        """same bracket as Tournament : byes for the top seeds"""
+
+        synthetic.generate(n_players=10, n_tournaments=1, tournament_size=6, formats=["knockout"])
+
+        t = Tournament.read_all()[0]
+        first = t.rounds[0].matches
+        assert [len(r.matches) for r in t.rounds] == [4, 2, 1]
+        assert [m[1][0] for m in first if m[1][0] is None] == [None, None]
+        (white, _), (black, _) = t.rounds[-1].matches[0]
+        assert t.knockout_bracket.champion in (white, black)
+
+    def test_existing_tables_replaced(self, tmp_db):
+        """the generated tables replace the current ones"""
+
+        Round(0, [], round_id="old").create()
+
+        synthetic.generate(n_players=10, n_tournaments=1, tournament_size=4)
+
+        assert "old" not in [doc["round_id"] for doc in Round.db.all()]
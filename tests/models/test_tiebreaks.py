@@ -0,0 +1,124 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from chess.models.players import Player
+from chess.models.rounds import Round
+from chess.models.tiebreaks import ResultsMatrix
+from chess.models.tournaments import Tournament
+
+
+def _rounds(*rounds):
+    """Rounds of (white, black, "1-0" | "0-1" | "=") games"""
+
+    scores = {"1-0": (1, 0), "0-1": (0, 1), "=": (0.5, 0.5)}
+    return [
+        Round(n, [[[a, scores[r][0]], [b, scores[r][1]]] for a, b, r in games])
+        for n, games in enumerate(rounds)
+    ]
+
+
+class TestResultsMatrix:
+    def test_tiebreaks(self):
+        """values computed by hand on a 4 players round-robin"""
+
+        rounds = _rounds(
+            [("a", "b", "1-0"), ("c", "d", "=")],
+            [("a", "c", "="), ("b", "d", "1-0")],
+            [("a", "d", "1-0"), ("b", "c", "=")],
+        )
+
+        standings = ResultsMatrix.from_rounds(["a", "b", "c", "d"], rounds).standings()
+
+        assert [tuple(line) for line in standings] == [
+            (1, "a", 2.5, 3.5, 1.5, 2.75, 0),
+            (2, "c", 1.5, 4.5, 1.5, 2.25, 0.5),  # same buchholz as b, better SB
+            (3, "b", 1.5, 4.5, 1.5, 1.25, 0.5),
+            (4, "d", 0.5, 5.5, 1.5, 0.75, 0),
+        ]
+
+    def test_direct_encounter(self):
+        """tied players who met : the winner first, whatever the seeds"""
+
+        rounds = _rounds(
+            [("b", "c", "1-0"), ("a", "d", "0-1")],
+            [("b", "d", "0-1"), ("c", "a", "1-0")],
+        )
+        matrix = ResultsMatrix.from_rounds(["c", "b", "a", "d"], rounds)
+
+        assert [line.player_id for line in matrix.standings()] == ["d", "b", "c", "a"]
+        assert matrix.direct_encounter() == [0, 1, 0, 0]
+        # without direct encounter, the seed decides
+        assert [line.player_id for line in matrix.standings(order=[])] == ["d", "c", "b", "a"]
+
+    def test_direct_encounter_needs_all_games(self):
+        """not applied when two of the tied players did not meet"""
+
+        rounds = _rounds([("a", "b", "1-0"), ("c", "d", "1-0")])
+        matrix = ResultsMatrix.from_rounds(["a", "b", "c", "d"], rounds)
+
+        assert matrix.direct_encounter() == [0, 0, 0, 0]
+
+    def test_byes_and_unplayed(self):
+        """a bye gives points but no opponent, unplayed games are ignored"""
+
+        rounds = [
+            Round(0, [[["a", 1], ["b", 0]], [["c", 1], [None, 0]]]),
+            Round(1, [[["a", -1], ["c", -1]], [["b", 1], [None, 0]]]),
+        ]
+        matrix = ResultsMatrix.from_rounds(["a", "b", "c"], rounds)
+
+        assert list(matrix.points) == [1, 1, 1]
+        assert matrix.buchholz() == [1, 1, 0]
+        assert matrix.opponents[2] == []
+
+    def test_unknown_tiebreak(self):
+        with pytest.raises(ValueError):
+            ResultsMatrix(["a"]).standings(order=["koya"])
+
+
+class TestTournamentStandings:
+    def test_cached_until_next_result(self, tmp_db):
+        """standings are computed once per set of results"""
+
+        t = Tournament("Open", "2024-01-01", "2024-01-02", max_players=4)
+        t.create()
+        for i in range(4):
+            Player("x", "y", player_id=f"p{i}", rating=2000 - i).create()
+        t.add_players([f"p{i}" for i in range(4)])
+        t.update_status("In Progress")
+
+        first = t.standings()
+        assert t.standings() is first
+        assert [line.points for line in first] == [0, 0, 0, 0]
+
+        t.submit_results({1: "1-0", 2: "1/2-1/2"})
+
+        after = t.standings()
+        assert after is not first
+        assert sorted(line.points for line in after) == [0, 0.5, 0.5, 1]
+
+    def test_results_of_other_process(self, tmp_db):
+        """results entered by another process are in the next standings"""
+
+        t = Tournament("Open", "2024-01-01", "2024-01-02", tournament_id="open", max_players=2)
+        t.create()
+        for i in range(2):
+            Player("x", "y", player_id=f"p{i}", rating=2000 - i).create()
+        t.add_players(["p0", "p1"])
+        t.update_status("In Progress")
+        assert [line.points for line in t.standings()] == [0, 0]
+
+        env = dict(os.environ, CHESS_DATA_DIR=str(tmp_db))
+        script = (
+            "from chess.models.tournaments import Tournament; "
+            "Tournament.read_one('open').submit_results({1: '0-1'})"
+        )
+        subprocess.run([sys.executable, "-c", script], env=env, check=True)
+
+        assert [(line.player_id, line.points) for line in t.standings()] == [
+            ("p1", 1),
+            ("p0", 0),
+        ]
@@ -1,5 +1,8 @@
 import logging
+import os
 import secrets
+import subprocess
+import sys
 
 import pytest
 
@@ -116,3 +119,116 @@ class TestTournamentBase:
         # assert
         assert same_tournament.location != old_location
         assert same_tournament.location == new_location
+
+
+class TestTournamentRounds:
+    """Test the lazy rounds accessor"""
+
+    def test_rounds_read_once(self, new_tournament, monkeypatch):
+        """rounds are read in one batch and then cached"""
+
+        t = new_tournament()
+
+        calls = []
+        read_many = Round.read_many
+        monkeypatch.setattr(
+            Round, "read_many", lambda ids: calls.append(ids) or read_many(ids)
+        )
+
+        assert [r.round_id for r in t.rounds] == t.round_id_list
+        t.rounds
+        t.get_current_round()
+        t.scores()
+
+        assert len(calls) == 1
+
+    def test_rounds_invalidated_on_update(self, new_tournament):
+        """a round update is seen through the accessor"""
+
+        t = new_tournament()
+        t.rounds
+
+        same_round = Round.search_by("round_id", t.round_id_list[0])
+        (a, _), (b, _) = same_round.matches[0]
+        same_round.matches[0] = [[a, 1], [b, 0]]
+        same_round.update()
+
+        assert t.get_score(a) == 1
+
+    def test_rounds_not_saved(self, new_tournament):
+        """the cache never reaches the database"""
+
+        t = new_tournament()
+        t.rounds
+        t.update()
+
+        assert "_rounds" not in Tournament.db.all()[0]
+
+
+class TestPlayerIndex:
+    """Test the player => tournaments reverse index"""
+
+    def test_player_tournaments(self, tmp_db):
+        """registrations are indexed on add_players and create"""
+
+        player = Player("x", "y", player_id="p0")
+        player.create()
+        first = Tournament("first", "2023-01-01", "2023-01-31")
+        first.create()
+        first.add_player("p0")
+
+        assert Tournament.tournament_ids_of("p0") == [first.tournament_id]
+
+        second = Tournament("second", "2023-02-01", "2023-02-28")
+        second.player_id_list = ["p0", "p1"]
+        second.create()
+
+        assert [t.name for t in player.tournaments()] == ["first", "second"]
+        assert Tournament.tournament_ids_of("p1") == [second.tournament_id]
+        assert Tournament.tournament_ids_of("nobody") == []
+
+    def test_delete_and_update(self, tmp_db):
+        """deleted tournaments and removed players leave the index"""
+
+        t = Tournament("t", "2023-01-01", "2023-01-31")
+        t.create()
+        t.add_players(["a", "b"])
+        other = Tournament("other", "2023-01-01", "2023-01-31")
+        other.create()
+        other.add_players(["a"])
+
+        t.player_id_list = ["b"]
+        t.update()
+        assert Tournament.tournament_ids_of("a") == [other.tournament_id]
+
+        other.delete()
+        assert Tournament.tournament_ids_of("a") == []
+        assert Tournament.read_one(other.tournament_id) is None
+
+    def test_index_built_once(self, tmp_db, monkeypatch):
+        """lookups do not scan the tournaments table"""
+
+        t = Tournament("t", "2023-01-01", "2023-01-31")
+        t.player_id_list = ["a"]
+        t.create()
+        Tournament.player_index()
+
+        monkeypatch.setattr(Tournament.db, "all", None)
+
+        assert Tournament.tournament_ids_of("a") == [t.tournament_id]
+
+    def test_other_process(self, tmp_db):
+        """registrations written by another process reach the index"""
+
+        t = Tournament("t", "2023-01-01", "2023-01-31", tournament_id="t")
+        t.create()
+        assert Tournament.tournament_ids_of("a") == []
+
+        env = dict(os.environ, CHESS_DATA_DIR=str(tmp_db))
+        script = (
+            "from chess.models.tournaments import Tournament; "
+            "Tournament.read_one('t').add_players(['a'])"
+        )
+        subprocess.run([sys.executable, "-c", script], env=env, check=True)
+
+        assert Tournament.tournament_ids_of("a") == ["t"]